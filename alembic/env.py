@@ -18,7 +18,7 @@ import alembic.context
 import cads_common.logging
 import sqlalchemy as sa
 
-import cads_catalogue
+import cads_catalogue.database
 
 
 def run_migrations_offline() -> None:
@@ -0,0 +1,24 @@
+"""ts_rank2 as sql function.
+
+Revision ID: 2c7e4a9d5f18
+Revises: 6d2f8b1e0a93
+Create Date: 2026-10-19 18:40:12.118305
+
+"""
+
+from alembic import op
+from cads_catalogue import database
+
+# revision identifiers, used by Alembic.
+revision = "2c7e4a9d5f18"
+down_revision = "6d2f8b1e0a93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(database.add_rank_function_sql)
+
+
+def downgrade() -> None:
+    op.execute(database.add_rank_function_plpgsql_sql)
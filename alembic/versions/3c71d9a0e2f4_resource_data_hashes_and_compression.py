@@ -0,0 +1,51 @@
+"""resource_data hashes and compressed constraints.
+
+Revision ID: 3c71d9a0e2f4
+Revises: 9a6c2e4d1b78
+Create Date: 2026-10-19 15:02:41.630217
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c71d9a0e2f4"
+down_revision = "9a6c2e4d1b78"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "zstd_dictionaries",
+        sa.Column("zstd_dictionary_id", sa.Integer, primary_key=True),
+        sa.Column("dictionary", sa.LargeBinary, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+    )
+    op.add_column(
+        "resource_data", sa.Column("constraints_zstd", sa.LargeBinary, nullable=True)
+    )
+    op.add_column(
+        "resource_data",
+        sa.Column(
+            "zstd_dictionary_id",
+            sa.Integer,
+            sa.ForeignKey("zstd_dictionaries.zstd_dictionary_id"),
+            nullable=True,
+        ),
+    )
+    # NULL hashes: all the fields are written at the next update
+    op.add_column(
+        "resource_data",
+        sa.Column("data_hashes", dialect_postgresql.JSONB, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("resource_data", "data_hashes")
+    op.drop_column("resource_data", "zstd_dictionary_id")
+    op.drop_column("resource_data", "constraints_zstd")
+    op.drop_table("zstd_dictionaries")
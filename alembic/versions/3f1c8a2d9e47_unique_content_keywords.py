@@ -0,0 +1,63 @@
+"""unique content keywords.
+
+Revision ID: 3f1c8a2d9e47
+Revises: ddf161fdce37
+Create Date: 2026-10-19 09:12:41.518203
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f1c8a2d9e47"
+down_revision = "ddf161fdce37"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    # merge duplicated keywords into the one with lowest id
+    duplicates_sql = """
+    SELECT keyword_id, keep_id FROM (
+        SELECT keyword_id,
+               min(keyword_id) OVER (PARTITION BY keyword_name) AS keep_id
+        FROM content_keywords WHERE keyword_name IS NOT NULL
+    ) AS k WHERE keyword_id != keep_id
+    """
+    conn.execute(
+        sa.text(
+            f"""
+    INSERT INTO contents_keywords_m2m (content_id, keyword_id)
+    SELECT DISTINCT m.content_id, d.keep_id
+    FROM contents_keywords_m2m AS m JOIN ({duplicates_sql}) AS d
+    ON m.keyword_id = d.keyword_id
+    ON CONFLICT DO NOTHING
+    """
+        )
+    )
+    conn.execute(
+        sa.text(
+            f"""
+    DELETE FROM contents_keywords_m2m
+    WHERE keyword_id IN (SELECT keyword_id FROM ({duplicates_sql}) AS d)
+    """
+        )
+    )
+    conn.execute(
+        sa.text(
+            f"""
+    DELETE FROM content_keywords
+    WHERE keyword_id IN (SELECT keyword_id FROM ({duplicates_sql}) AS d)
+    """
+        )
+    )
+    op.create_unique_constraint(
+        "content_keywords_keyword_name_key", "content_keywords", ["keyword_name"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("content_keywords_keyword_name_key", "content_keywords")
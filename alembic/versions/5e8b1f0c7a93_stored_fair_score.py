@@ -0,0 +1,41 @@
+"""stored fair score.
+
+Revision ID: 5e8b1f0c7a93
+Revises: c4d7a9e3b215
+Create Date: 2026-10-19 11:03:52.730611
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e8b1f0c7a93"
+down_revision = "c4d7a9e3b215"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("resources", sa.Column("fair_score", sa.Integer))
+    # backfill from the FAIR reports already stored
+    op.execute(
+        """
+        UPDATE resources SET fair_score = trunc(
+            (resource_data.fair_data #>> '{summary,score_percent,FAIR}')::numeric
+        )::integer
+        FROM resource_data
+        WHERE resource_data.resource_uid = resources.resource_uid
+        AND jsonb_typeof(resource_data.fair_data #> '{summary,score_percent,FAIR}')
+            = 'number'
+        """
+    )
+    op.create_index(
+        op.f("ix_resources_fair_score"), "resources", ["fair_score"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_resources_fair_score"), table_name="resources")
+    op.drop_column("resources", "fair_score")
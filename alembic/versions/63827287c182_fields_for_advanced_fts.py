@@ -38,7 +38,7 @@ def upgrade() -> None:
         postgresql_using="gin",
     )
     op.add_column("resources", sa.Column("popularity", sa.Integer, default=1))
-    op.execute(database.add_rank_function_sql)
+    op.execute(database.add_rank_function_plpgsql_sql)
 
 
 def downgrade() -> None:
@@ -0,0 +1,25 @@
+"""resources row fingerprint.
+
+Revision ID: 6d2f8b1e0a93
+Revises: b4e0f6a21c59
+Create Date: 2026-10-19 17:25:41.530218
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6d2f8b1e0a93"
+down_revision = "b4e0f6a21c59"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("resources", sa.Column("row_fingerprint", sa.String))
+
+
+def downgrade() -> None:
+    op.drop_column("resources", "row_fingerprint")
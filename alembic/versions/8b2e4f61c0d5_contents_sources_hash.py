@@ -0,0 +1,25 @@
+"""contents sources hash.
+
+Revision ID: 8b2e4f61c0d5
+Revises: 3f1c8a2d9e47
+Create Date: 2026-10-18 09:12:37.402118
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b2e4f61c0d5"
+down_revision = "3f1c8a2d9e47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("contents", sa.Column("sources_hash", sa.String))
+
+
+def downgrade() -> None:
+    op.drop_column("contents", "sources_hash")
@@ -0,0 +1,39 @@
+"""stored adaptor costing flag.
+
+Revision ID: 9a6c2e4d1b78
+Revises: 5e8b1f0c7a93
+Create Date: 2026-10-19 12:21:07.418903
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a6c2e4d1b78"
+down_revision = "5e8b1f0c7a93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("resources", sa.Column("has_adaptor_costing", sa.Boolean))
+    # backfill from the adaptor configurations already stored
+    op.execute(
+        """
+        UPDATE resources SET has_adaptor_costing = coalesce(
+            resource_data.adaptor_configuration ? 'costing', false
+        )
+        FROM resource_data
+        WHERE resource_data.resource_uid = resources.resource_uid
+        """
+    )
+    op.execute(
+        "UPDATE resources SET has_adaptor_costing = false "
+        "WHERE has_adaptor_costing IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("resources", "has_adaptor_costing")
@@ -0,0 +1,49 @@
+"""facet index.
+
+Revision ID: 9e3b5c7a1d42
+Revises: 2c7e4a9d5f18
+Create Date: 2026-10-19 20:05:37.402816
+
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9e3b5c7a1d42"
+down_revision = "2c7e4a9d5f18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "facet_index",
+        sa.Column(
+            "facet_id",
+            sa.Integer,
+            sa.ForeignKey("facets.facet_id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("category_name", sa.String),
+        sa.Column("category_value", sa.String),
+        sa.Column("resource_ids", dialect_postgresql.ARRAY(sa.Integer), nullable=False),
+    )
+    op.execute(
+        """
+        INSERT INTO facet_index (facet_id, category_name, category_value, resource_ids)
+        SELECT f.facet_id, f.category_name, f.category_value,
+            array_agg(rf.resource_id ORDER BY rf.resource_id)
+        FROM facets f
+        JOIN resources_facets rf ON rf.facet_id = f.facet_id
+        JOIN resources r ON r.resource_id = rf.resource_id
+        WHERE r.hidden IS NOT TRUE
+        GROUP BY f.facet_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("facet_index")
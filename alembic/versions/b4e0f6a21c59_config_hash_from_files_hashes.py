@@ -0,0 +1,27 @@
+"""config hash from hashes of the configuration files.
+
+Revision ID: b4e0f6a21c59
+Revises: 3c71d9a0e2f4
+Create Date: 2026-10-19 16:40:12.208514
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b4e0f6a21c59"
+down_revision = "3c71d9a0e2f4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # adaptor_properties_hash is now computed from the hashes of the source files:
+    # reset the hash of the sources, so that the next update recomputes it once
+    # for all the datasets, even if their folders have not changed
+    op.execute("UPDATE resources SET sources_hash = NULL")
+
+
+def downgrade() -> None:
+    # the previous version computes adaptor_properties_hash from the data
+    op.execute("UPDATE resources SET sources_hash = NULL")
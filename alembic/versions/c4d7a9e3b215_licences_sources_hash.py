@@ -0,0 +1,25 @@
+"""licences sources hash.
+
+Revision ID: c4d7a9e3b215
+Revises: 8b2e4f61c0d5
+Create Date: 2026-10-19 08:41:05.118394
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4d7a9e3b215"
+down_revision = "8b2e4f61c0d5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("licences", sa.Column("sources_hash", sa.String))
+
+
+def downgrade() -> None:
+    op.drop_column("licences", "sources_hash")
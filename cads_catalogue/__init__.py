@@ -22,11 +22,21 @@ except ImportError:  # pragma: no cover
     # Local copy or not installed with setuptools
     __version__ = "999"
 
+import importlib
+from typing import Any
 
-from .database import Licence, Resource, ResourceLicence, init_database
-from .entry_points import info, main, update_catalogue
-from .licence_manager import load_licences_from_folder
-from .manager import load_resource_from_folder
+# public objects by module: imported on first access, for a fast startup of the CLI
+LAZY_ATTRIBUTES = {
+    "Licence": "database",
+    "Resource": "database",
+    "ResourceLicence": "database",
+    "init_database": "database",
+    "info": "entry_points",
+    "main": "entry_points",
+    "update_catalogue": "entry_points",
+    "load_licences_from_folder": "licence_manager",
+    "load_resource_from_folder": "manager",
+}
 
 __all__ = [
     "__version__",
@@ -40,3 +50,10 @@ __all__ = [
     "update_catalogue",
     "main",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in LAZY_ATTRIBUTES:
+        module = importlib.import_module(f".{LAZY_ATTRIBUTES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
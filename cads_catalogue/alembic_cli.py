@@ -5,7 +5,7 @@ from typing import Optional, Sequence
 
 from alembic.config import CommandLine, Config
 
-import cads_catalogue
+import cads_catalogue.config
 
 alembic_ini_path = os.path.abspath(os.path.join(__file__, "..", "..", "alembic.ini"))
 
@@ -0,0 +1,346 @@
+"""bulk loading of the resources in an empty catalogue database."""
+
+# Copyright 2022, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import glob
+import io
+import json
+import os
+import pathlib
+from typing import Any, Dict, List, Sequence
+
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+
+from cads_catalogue import config, database, maintenance, manager, utils
+
+logger = structlog.get_logger(__name__)
+
+# tables written by COPY, in order of writing
+BOOTSTRAP_TABLES = [
+    database.Resource.__table__,
+    database.ResourceData.__table__,
+    database.Facet.__table__,
+    database.ResourceLicence.__table__,
+    database.ResourceFacet.__table__,
+    database.related_resources,
+]
+
+
+def array_literal(items: Sequence[Any]) -> str:
+    """Return the text of a PostgreSQL array, quoting the items as PostgreSQL does."""
+    texts = []
+    for item in items:
+        if item is None:
+            texts.append("NULL")
+            continue
+        text = str(item)
+        if (
+            not text
+            or text.upper() == "NULL"
+            or any(c in text for c in '{},"\\')
+            or any(c.isspace() for c in text)
+        ):
+            text = '"%s"' % text.replace("\\", "\\\\").replace('"', '\\"')
+        texts.append(text)
+    return "{%s}" % ",".join(texts)
+
+
+def csv_value(value: Any, column: sa.Column) -> str:
+    """Return the value of a column as a field of PostgreSQL COPY in csv format.
+
+    Parameters
+    ----------
+    value: python value, as accepted by the column
+    column: the column of the value
+
+    Returns
+    -------
+    str: the field of the csv (NULL is an unquoted empty field)
+    """
+    if value is None:
+        if isinstance(column.type, sa.JSON) and not column.type.none_as_null:
+            # as written by SQLAlchemy
+            value = "null"
+        else:
+            return ""
+    elif isinstance(column.type, sa.JSON):
+        value = json.dumps(value)
+    elif isinstance(value, (list, tuple)):
+        # also for not array columns, as adapted by psycopg2
+        value = array_literal(value)
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, bytes):
+        value = "\\x" + value.hex()
+    elif isinstance(value, (datetime.date, datetime.datetime)):
+        value = value.isoformat()
+    value = str(value).replace('"', '""')
+    return f'"{value}"'
+
+
+def copy_rows(
+    session: sa.orm.session.Session, table: sa.Table, rows: List[dict[str, Any]]
+) -> int:
+    """Write rows in a table with COPY FROM STDIN, in csv format.
+
+    The columns written are the ones of the rows and the ones with a python default,
+    which is applied to the rows without a value.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    table: the table to write
+    rows: the rows to write, dictionaries column name -> value
+
+    Returns
+    -------
+    int: number of rows written
+    """
+    if not rows:
+        return 0
+    names = set().union(*rows)
+    columns = [
+        c
+        for c in table.columns
+        if c.computed is None and (c.name in names or c.default is not None)
+    ]
+    defaults = dict()
+    for column in columns:
+        if column.default is not None and column.default.is_callable:
+            defaults[column.name] = column.default.arg(None)  # type: ignore
+        elif column.default is not None and column.default.is_scalar:
+            defaults[column.name] = column.default.arg  # type: ignore
+    buffer = io.StringIO()
+    for row in rows:
+        fields = [
+            csv_value(row[c.name] if c.name in row else defaults.get(c.name), c)
+            for c in columns
+        ]
+        buffer.write(",".join(fields) + "\n")
+    buffer.seek(0)
+    columns_sql = ", ".join(f'"{c.name}"' for c in columns)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({columns_sql}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+    logger.info(f"copied {len(rows)} rows in table {table.name}")
+    return len(rows)
+
+
+def reserve_ids(
+    session: sa.orm.session.Session, column: sa.Column, count: int
+) -> List[int]:
+    """Return new values of a serial column, taken from its sequence."""
+    if not count:
+        return []
+    sequence = sa.cast(
+        sa.func.pg_get_serial_sequence(column.table.name, column.name),  # type: ignore
+        dialect_postgresql.REGCLASS,
+    )
+    return list(
+        session.scalars(
+            sa.select(sa.func.nextval(sequence)).select_from(
+                sa.func.generate_series(1, count)
+            )
+        )
+    )
+
+
+def copy_prepared_resources(
+    session: sa.orm.session.Session, prepared_resources: List[dict[str, Any]]
+) -> None:
+    """
+    Write in the db the records of resources prepared by `manager.prepare_resource_sync`.
+
+    Resources, resource_data, facets and association tables are written with COPY.
+    The tables involved must not contain resources.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    prepared_resources: list of resources prepared by `manager.prepare_resource_sync`
+    """
+    resource_ids = reserve_ids(
+        session, database.Resource.__table__.c.resource_id, len(prepared_resources)
+    )
+    resource_data_ids = reserve_ids(
+        session,
+        database.ResourceData.__table__.c.resource_data_id,
+        len(prepared_resources),
+    )
+    resource_rows = []
+    resource_data_rows = []
+    licence_rows = []
+    for prepared, resource_id, resource_data_id in zip(
+        prepared_resources, resource_ids, resource_data_ids
+    ):
+        resource_rows.append(dict(prepared["resource"], resource_id=resource_id))
+        resource_data_rows.append(
+            dict(
+                prepared["resource_data"],
+                resource_data_id=resource_data_id,
+                data_hashes=manager.resource_data_hashes(
+                    prepared["resource_data"], prepared["known_hashes"]
+                ),
+            )
+        )
+        for licence_id in dict.fromkeys(prepared["licence_ids"]):
+            licence_rows.append({"resource_id": resource_id, "licence_id": licence_id})
+
+    facet_table = database.Facet.__table__
+    facet_ids: Dict[str, int] = dict(
+        session.execute(
+            sa.select(
+                facet_table.c.facet_name, sa.func.min(facet_table.c.facet_id)
+            ).group_by(facet_table.c.facet_name)
+        )
+        .tuples()
+        .all()
+    )
+    new_facet_names = sorted(
+        {f for p in prepared_resources for f in p["facets"]} - set(facet_ids)
+    )
+    facet_rows = []
+    for facet_name, facet_id in zip(
+        new_facet_names,
+        reserve_ids(session, facet_table.c.facet_id, len(new_facet_names)),
+    ):
+        category_name, category_value = [r.strip() for r in facet_name.split(":")]
+        facet_rows.append(
+            {
+                "facet_id": facet_id,
+                "category_name": category_name,
+                "category_value": category_value,
+                "facet_name": facet_name,
+            }
+        )
+        facet_ids[facet_name] = facet_id
+    resource_facet_rows = [
+        {"resource_id": resource_id, "facet_id": facet_ids[facet_name]}
+        for prepared, resource_id in zip(prepared_resources, resource_ids)
+        for facet_name in prepared["facets"]
+    ]
+
+    # relationships between resources, computed on transient objects
+    resource_objs = []
+    for prepared, resource_id in zip(prepared_resources, resource_ids):
+        dataset = prepared["resource"]
+        resource_objs.append(
+            database.Resource(
+                resource_id=resource_id,
+                resource_uid=dataset["resource_uid"],
+                portal=dataset.get("portal"),
+                hidden=dataset.get("hidden", False),
+                related_resources_keywords=dataset.get("related_resources_keywords")
+                or [],
+                facets=[database.Facet(facet_name=f) for f in prepared["facets"]],
+            )
+        )
+    related_rows = [
+        {"child_resource_id": res1.resource_id, "parent_resource_id": res2.resource_id}
+        for res1, res2 in manager.find_related_resources(resource_objs)
+    ]
+
+    copy_rows(session, database.Resource.__table__, resource_rows)
+    copy_rows(session, database.ResourceData.__table__, resource_data_rows)
+    copy_rows(session, facet_table, facet_rows)
+    copy_rows(session, database.ResourceLicence.__table__, licence_rows)
+    copy_rows(session, database.ResourceFacet.__table__, resource_facet_rows)
+    copy_rows(session, database.related_resources, related_rows)
+
+
+def bootstrap_resources(
+    session: sa.orm.session.Session,
+    resources_folder_paths: List[str] | List[pathlib.Path],
+    cim_folder_path: str | pathlib.Path,
+    storage_settings: config.ObjectStorageSettings,
+    override_md: dict[str, Any] = {},
+) -> List[str]:
+    """
+    Load metadata of resources from files and write them in an empty catalogue db.
+
+    Resources are prepared as in `manager.update_catalogue_resources` (a resource
+    failing is logged and skipped), then they are written with COPY: GIN indexes
+    are dropped before writing and built again after, then the tables are analysed.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resources_folder_paths: paths to the root folder containing metadata files for resources
+    cim_folder_path: the folder path containing CIM generated Quality Assessment layouts
+    storage_settings: object with settings to access the object storage
+    override_md: dictionary of override metadata for resources
+
+    Returns
+    -------
+    list: list of resource uids loaded
+    """
+    if session.scalar(sa.select(sa.func.count()).select_from(database.Resource)):
+        raise ValueError(
+            "the catalogue already contains resources: use update-catalogue"
+        )
+    prepared_resources: List[dict[str, Any]] = []
+    for resources_folder_path in resources_folder_paths:
+        folders = glob.glob(os.path.join(resources_folder_path, "*/"))
+        for resource_folder_path in sorted(folders):
+            resource_uid = os.path.basename(resource_folder_path.rstrip(os.sep))
+            folders_to_consider_for_hash = [resource_folder_path]
+            cim_resource_folder_path = os.path.join(cim_folder_path, resource_uid)
+            if os.path.exists(cim_resource_folder_path):
+                folders_to_consider_for_hash.append(cim_resource_folder_path)
+            try:
+                with session.begin_nested():
+                    sources_hash = str(
+                        utils.folders2hash(folders_to_consider_for_hash).hexdigest()
+                    )
+                    resource = manager.load_resource_to_sync(
+                        session,
+                        resource_folder_path,
+                        cim_folder_path,
+                        storage_settings,
+                        override_md.get(resource_uid, dict()),
+                        sources_hash,
+                    )
+                    prepared_resources.append(
+                        manager.prepare_resource_sync(
+                            session, resource, storage_settings
+                        )
+                    )
+            except Exception:  # noqa
+                logger.exception(
+                    "loading of resource '%s' failed, error follows" % resource_uid
+                )
+    gin_indexes = maintenance.get_gin_indexes(BOOTSTRAP_TABLES)
+    connection = session.connection()
+    for index in gin_indexes:
+        index.drop(bind=connection, checkfirst=True)
+    copy_prepared_resources(session, prepared_resources)
+    for index in gin_indexes:
+        logger.info(f"building index {index.name}")
+        index.create(bind=connection)
+    analyze_tables(session, BOOTSTRAP_TABLES)
+    return [p["resource"]["resource_uid"] for p in prepared_resources]
+
+
+def analyze_tables(session: sa.orm.session.Session, tables: List[sa.Table]) -> None:
+    """Update the planner statistics of some tables."""
+    for table in tables:
+        session.execute(sa.text(f"ANALYZE {table.name}"))
@@ -0,0 +1,250 @@
+"""compressed storage of the constraints of the resources (requires zstandard)."""
+
+# Copyright 2022, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib.util
+import json
+import os
+from typing import Any, Dict, List
+
+import sqlalchemy as sa
+import structlog
+
+from cads_catalogue import database, utils
+
+logger = structlog.get_logger(__name__)
+
+# store the constraints of the resources compressed with zstd
+COMPRESS_CONSTRAINTS = utils.str2bool(os.getenv("CATALOGUE_COMPRESS_CONSTRAINTS", "0"))
+ZSTD_LEVEL = int(os.getenv("CATALOGUE_ZSTD_LEVEL", 10))
+# size (in bytes) of the dictionaries trained, default of zstd
+ZSTD_DICTIONARY_SIZE = int(os.getenv("CATALOGUE_ZSTD_DICTIONARY_SIZE", 112640))
+# dictionaries already loaded from the db, by id (they are never modified)
+DICTIONARIES: Dict[int, Any] = dict()
+
+
+def is_compression_enabled() -> bool:
+    """Return True if constraints are to be stored compressed.
+
+    Compression is enabled by the environment variable CATALOGUE_COMPRESS_CONSTRAINTS
+    and it needs the optional package zstandard.
+    """
+    if not COMPRESS_CONSTRAINTS:
+        return False
+    if importlib.util.find_spec("zstandard") is None:
+        logger.warning("zstandard not available: constraints are stored uncompressed")
+        return False
+    return True
+
+
+def get_dictionary(session: sa.orm.session.Session, zstd_dictionary_id: int) -> Any:
+    """Return a zstd dictionary stored in the db.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    zstd_dictionary_id: id of the dictionary
+
+    Returns
+    -------
+    zstandard.ZstdCompressionDict: the dictionary
+    """
+    import zstandard
+
+    if zstd_dictionary_id not in DICTIONARIES:
+        dictionary = session.scalar(
+            sa.select(database.ZstdDictionary.dictionary).filter_by(
+                zstd_dictionary_id=zstd_dictionary_id
+            )
+        )
+        if dictionary is None:
+            raise ValueError("zstd dictionary %r not found" % zstd_dictionary_id)
+        DICTIONARIES[zstd_dictionary_id] = zstandard.ZstdCompressionDict(dictionary)
+    return DICTIONARIES[zstd_dictionary_id]
+
+
+def get_last_dictionary_id(session: sa.orm.session.Session) -> int | None:
+    """Return the id of the last zstd dictionary stored, if any."""
+    return session.scalar(
+        sa.select(sa.func.max(database.ZstdDictionary.zstd_dictionary_id))
+    )
+
+
+def compress_constraints(
+    session: sa.orm.session.Session, constraints_data: Any
+) -> Dict[str, Any]:
+    """Return the resource_data fields storing constraints compressed.
+
+    Constraints are compressed with the last shared dictionary, if any.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    constraints_data: the constraints (content of constraints.json)
+
+    Returns
+    -------
+    dict: values of 'constraints_data', 'constraints_zstd' and 'zstd_dictionary_id'
+    """
+    import zstandard
+
+    if constraints_data is None:
+        return uncompressed_constraints(constraints_data)
+    zstd_dictionary_id = get_last_dictionary_id(session)
+    compressor = zstandard.ZstdCompressor(
+        level=ZSTD_LEVEL,
+        dict_data=(
+            get_dictionary(session, zstd_dictionary_id)
+            if zstd_dictionary_id is not None
+            else None
+        ),
+    )
+    data = json.dumps(constraints_data, separators=(",", ":")).encode("utf-8")
+    return {
+        "constraints_data": None,
+        "constraints_zstd": compressor.compress(data),
+        "zstd_dictionary_id": zstd_dictionary_id,
+    }
+
+
+def uncompressed_constraints(constraints_data: Any) -> Dict[str, Any]:
+    """Return the resource_data fields storing constraints uncompressed."""
+    return {
+        "constraints_data": constraints_data,
+        "constraints_zstd": None,
+        "zstd_dictionary_id": None,
+    }
+
+
+def get_resource_data_constraints(
+    session: sa.orm.session.Session, resource_data: database.ResourceData
+) -> Any:
+    """Return the constraints of a resource_data record, decompressed if needed.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resource_data: the resource_data record
+
+    Returns
+    -------
+    the constraints (content of constraints.json)
+    """
+    if resource_data.constraints_zstd is None:
+        return resource_data.constraints_data
+    import zstandard
+
+    dictionary = None
+    if resource_data.zstd_dictionary_id is not None:
+        dictionary = get_dictionary(session, resource_data.zstd_dictionary_id)  # type: ignore
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return json.loads(decompressor.decompress(resource_data.constraints_zstd))
+
+
+def get_constraints_data(session: sa.orm.session.Session, resource_uid: str) -> Any:
+    """Return the constraints of a resource, whatever the storage format.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resource_uid: uid of the resource
+
+    Returns
+    -------
+    the constraints (content of constraints.json), None if not found
+    """
+    resource_data = session.scalars(
+        sa.select(database.ResourceData).filter_by(resource_uid=resource_uid)
+    ).first()
+    if resource_data is None:
+        return None
+    return get_resource_data_constraints(session, resource_data)
+
+
+def train_dictionary(
+    session: sa.orm.session.Session, dictionary_size: int = ZSTD_DICTIONARY_SIZE
+) -> int | None:
+    """Train and store a zstd dictionary on the constraints of all the resources.
+
+    Samples are the single constraints, so that the dictionary collects the widget
+    names and values shared by the datasets.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    dictionary_size: size in bytes of the dictionary
+
+    Returns
+    -------
+    int | None: id of the dictionary stored, None if not enough data to train it
+    """
+    import zstandard
+
+    samples: List[bytes | bytearray | memoryview] = []
+    for resource_data in session.scalars(sa.select(database.ResourceData)):
+        constraints_data = get_resource_data_constraints(session, resource_data)
+        if isinstance(constraints_data, list):
+            samples += [
+                json.dumps(c, separators=(",", ":")).encode("utf-8")
+                for c in constraints_data
+            ]
+    try:
+        dictionary = zstandard.train_dictionary(dictionary_size, samples)
+    except zstandard.ZstdError:
+        logger.warning(
+            f"not enough constraints ({len(samples)}) to train a zstd dictionary"
+        )
+        return None
+    dictionary_obj = database.ZstdDictionary(dictionary=dictionary.as_bytes())
+    session.add(dictionary_obj)
+    session.flush()
+    logger.info(
+        f"trained zstd dictionary {dictionary_obj.zstd_dictionary_id} "
+        f"on {len(samples)} constraints"
+    )
+    return dictionary_obj.zstd_dictionary_id  # type: ignore
+
+
+def compress_all_constraints(
+    session: sa.orm.session.Session, compress: bool = True
+) -> int:
+    """Store (or restore uncompressed) the constraints of all the resources.
+
+    Compressed constraints use the last dictionary stored.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    compress: False to store the constraints uncompressed
+
+    Returns
+    -------
+    int: number of resource_data records rewritten
+    """
+    count = 0
+    for resource_data in session.scalars(sa.select(database.ResourceData)):
+        constraints_data = get_resource_data_constraints(session, resource_data)
+        if compress:
+            attrs = compress_constraints(session, constraints_data)
+        else:
+            attrs = uncompressed_constraints(constraints_data)
+        data_hashes = dict(resource_data.data_hashes or dict())
+        for field, value in attrs.items():
+            setattr(resource_data, field, value)
+            data_hashes[field] = utils.data2hash(value)
+        resource_data.data_hashes = data_hashes
+        count += 1
+    session.flush()
+    return count
@@ -0,0 +1,275 @@
+"""vectorized analysis of the constraints of a dataset (requires NumPy)."""
+
+# Copyright 2022, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import dataclasses
+from typing import Any, Dict, List, Set, Tuple
+
+import numpy as np
+
+# number of constraints compared at once with all the others looking for inclusions
+CHUNK_SIZE = 256
+
+
+@dataclasses.dataclass
+class EncodedConstraints:
+    """Constraints encoded as integer-coded arrays.
+
+    Each constraint (a dictionary widget name -> list of values) is a row. Values of
+    each widget are coded as the index of the value in the widget's dictionary, and
+    the values allowed by the constraints are the columns set in the widget's mask.
+    """
+
+    # widget names, sorted
+    widgets: List[str]
+    # per-widget dictionary of values: code -> value
+    values: Dict[str, List[Any]]
+    # per-widget boolean array (constraints x values): values allowed by each constraint
+    masks: Dict[str, np.ndarray]
+    # boolean array (constraints x widgets): widgets restricted by each constraint
+    # (a widget with an empty list of values is not restricted)
+    present: np.ndarray
+
+    def __len__(self) -> int:
+        return self.present.shape[0]
+
+
+def encode_constraints(constraints: List[Dict[str, Any]]) -> EncodedConstraints:
+    """Encode constraints as integer-coded arrays.
+
+    Parameters
+    ----------
+    constraints: content of constraints.json, a list of dictionaries widget name -> values
+
+    Returns
+    -------
+    EncodedConstraints: the constraints encoded
+    """
+    widgets = sorted({widget for constraint in constraints for widget in constraint})
+    widget_index = {widget: i for i, widget in enumerate(widgets)}
+    codes: Dict[str, Dict[Any, int]] = {widget: dict() for widget in widgets}
+    cells: Dict[str, Tuple[List[int], List[int]]] = {
+        widget: ([], []) for widget in widgets
+    }
+    present = np.zeros((len(constraints), len(widgets)), dtype=bool)
+    for i, constraint in enumerate(constraints):
+        for widget, values in constraint.items():
+            if not isinstance(values, list):
+                values = [values]
+            present[i, widget_index[widget]] = bool(values)
+            widget_codes = codes[widget]
+            rows, columns = cells[widget]
+            for value in values:
+                rows.append(i)
+                columns.append(widget_codes.setdefault(value, len(widget_codes)))
+    masks = dict()
+    for widget in widgets:
+        masks[widget] = np.zeros((len(constraints), len(codes[widget])), dtype=bool)
+        masks[widget][cells[widget]] = True
+    return EncodedConstraints(
+        widgets=widgets,
+        values={widget: list(codes[widget]) for widget in widgets},
+        masks=masks,
+        present=present,
+    )
+
+
+def decode_constraints(encoded: EncodedConstraints) -> List[Dict[str, List[Any]]]:
+    """Return the constraints encoded (values sorted by code).
+
+    Widgets with an empty list of values are omitted.
+
+    Parameters
+    ----------
+    encoded: the constraints encoded
+
+    Returns
+    -------
+    list: list of dictionaries widget name -> values
+    """
+    constraints: List[Dict[str, List[Any]]] = [dict() for _ in range(len(encoded))]
+    for j, widget in enumerate(encoded.widgets):
+        values = encoded.values[widget]
+        mask = encoded.masks[widget]
+        for i in np.flatnonzero(encoded.present[:, j]):
+            constraints[i][widget] = [values[k] for k in np.flatnonzero(mask[i])]
+    return constraints
+
+
+def signatures(encoded: EncodedConstraints) -> np.ndarray:
+    """Return, for each constraint, the code of its distinct content.
+
+    Parameters
+    ----------
+    encoded: the constraints encoded
+
+    Returns
+    -------
+    numpy.ndarray: codes of the constraints, equal for constraints with the same content
+    """
+    rows = [np.packbits(encoded.present, axis=1)]
+    rows += [np.packbits(encoded.masks[widget], axis=1) for widget in encoded.widgets]
+    _, inverse = np.unique(np.hstack(rows), axis=0, return_inverse=True)
+    return inverse.reshape(-1)
+
+
+def find_duplicates(encoded: EncodedConstraints) -> List[Tuple[int, int]]:
+    """Find constraints equal to a previous one.
+
+    Parameters
+    ----------
+    encoded: the constraints encoded
+
+    Returns
+    -------
+    list: (index of the duplicate, index of the first equal constraint)
+    """
+    if not len(encoded):
+        return []
+    inverse = signatures(encoded)
+    first = np.full(inverse.max() + 1, -1)
+    # indexes assigned in reversed order: the first occurrence is the last to be written
+    first[inverse[::-1]] = np.arange(len(inverse))[::-1]
+    duplicates = np.flatnonzero(first[inverse] != np.arange(len(inverse)))
+    return [(int(i), int(first[inverse[i]])) for i in duplicates]
+
+
+def find_subsumed(encoded: EncodedConstraints) -> List[Tuple[int, int]]:
+    """Find constraints whose combinations are all allowed by another one.
+
+    Constraints are compared only with the ones restricting the same widgets, and
+    duplicates (see `find_duplicates`) are not reported.
+
+    Parameters
+    ----------
+    encoded: the constraints encoded
+
+    Returns
+    -------
+    list: (index of the subsumed constraint, index of a constraint including it)
+    """
+    if not len(encoded):
+        return []
+    inverse = signatures(encoded)
+    _, present_groups = np.unique(encoded.present, axis=0, return_inverse=True)
+    present_groups = present_groups.reshape(-1)
+    subsumed = []
+    for group in np.unique(present_groups):
+        members = np.flatnonzero(present_groups == group)
+        if len(members) < 2:
+            continue
+        widgets = [
+            w for j, w in enumerate(encoded.widgets) if encoded.present[members[0], j]
+        ]
+        allowed = [encoded.masks[w][members].astype(np.float32) for w in widgets]
+        not_allowed = [1 - mask for mask in allowed]
+        for start in range(0, len(members), CHUNK_SIZE):
+            chunk = members[start : start + CHUNK_SIZE]
+            # values of the chunk's constraints not allowed by each constraint
+            excess = np.zeros((len(chunk), len(members)), dtype=np.float32)
+            for a, na in zip(allowed, not_allowed):
+                excess += a[start : start + CHUNK_SIZE] @ na.T
+            included = (excess == 0) & (inverse[chunk, None] != inverse[None, members])
+            for k, row in enumerate(included):
+                others = np.flatnonzero(row)
+                if len(others):
+                    subsumed.append((int(members[start + k]), int(members[others[0]])))
+    return sorted(subsumed)
+
+
+def form_widgets_values(form_data: List[Dict[str, Any]]) -> Dict[str, Set[Any] | None]:
+    """Return the values of the widgets of form.json.
+
+    Parameters
+    ----------
+    form_data: content of form.json
+
+    Returns
+    -------
+    dict: widget name -> set of values, or None for widgets without a list of values
+    """
+
+    def collect_values(details: Dict[str, Any]) -> Set[Any] | None:
+        if "values" in details:
+            return set(details["values"] or [])
+        if "groups" not in details:
+            return None
+        values: Set[Any] = set()
+        for group in details["groups"] or []:
+            values |= collect_values(group) or set()
+        return values
+
+    widgets_values: Dict[str, Set[Any] | None] = dict()
+    for widget in form_data or []:
+        if isinstance(widget, dict) and widget.get("name"):
+            widgets_values[widget["name"]] = collect_values(
+                widget.get("details") or dict()
+            )
+    return widgets_values
+
+
+def check_against_form(
+    encoded: EncodedConstraints, form_data: List[Dict[str, Any]]
+) -> Tuple[List[str], Dict[str, List[Any]]]:
+    """Check the widgets and values of the constraints against form.json.
+
+    Parameters
+    ----------
+    encoded: the constraints encoded
+    form_data: content of form.json
+
+    Returns
+    -------
+    tuple: (widgets not found in the form, widget name -> values not in the form)
+    """
+    widgets_values = form_widgets_values(form_data)
+    unknown_widgets = []
+    unknown_values = dict()
+    for widget in encoded.widgets:
+        if widget not in widgets_values:
+            unknown_widgets.append(widget)
+            continue
+        form_values = widgets_values[widget]
+        if form_values is None:
+            continue
+        codes = np.array([v in form_values for v in encoded.values[widget]], dtype=bool)
+        # only values actually used by some constraints
+        invalid = np.flatnonzero(~codes & encoded.masks[widget].any(axis=0))
+        if len(invalid):
+            unknown_values[widget] = [encoded.values[widget][k] for k in invalid]
+    return unknown_widgets, unknown_values
+
+
+def constraints_statistics(encoded: EncodedConstraints) -> Dict[str, Any]:
+    """Return statistics of the constraints.
+
+    Parameters
+    ----------
+    encoded: the constraints encoded
+
+    Returns
+    -------
+    dict: number of constraints, of combinations allowed (counted with repetitions)
+        and of values of each widget
+    """
+    combinations = np.ones(len(encoded), dtype=np.float64)
+    for j, widget in enumerate(encoded.widgets):
+        counts = encoded.masks[widget].sum(axis=1)
+        combinations *= np.where(encoded.present[:, j], counts, 1)
+    return {
+        "constraints": len(encoded),
+        "combinations": int(combinations.sum()),
+        "widgets": {w: len(encoded.values[w]) for w in encoded.widgets},
+    }
@@ -13,44 +13,53 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
+import hashlib
 import json
 import os
 import pathlib
-from typing import Any, List
+from typing import Any, Iterable, List
 
 import sqlalchemy as sa
 import structlog
 import yaml
-
-from cads_catalogue import config, database, layout_manager, object_storage, utils
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+from sqlalchemy.dialects.postgresql import insert
+
+from cads_catalogue import (
+    config,
+    database,
+    layout_manager,
+    object_storage,
+    orphans,
+    utils,
+)
 
 THIS_PATH = os.path.abspath(os.path.dirname(__file__))
 logger = structlog.get_logger(__name__)
 
 OBJECT_STORAGE_UPLOAD_FIELDS = ["layout", "image"]
+# max number of contents loaded/transformed (and so uploaded) concurrently
+CONTENTS_MAX_WORKERS = int(os.getenv("CONTENTS_MAX_WORKERS", 8))
 
 
-def content_sync(
-    session: sa.orm.session.Session,
+def store_content_files(
     content: dict[str, Any],
     storage_settings: config.ObjectStorageSettings,
-) -> database.Content:
+) -> dict[str, Any]:
     """
-    Update db record with a content's metadata dictionary.
+    Upload to the object storage the files referred by a content (layout excluded).
 
     Parameters
     ----------
-    session: opened SQLAlchemy session
     content: metadata of loaded content
     storage_settings: object with settings to access the object storage
 
     Returns
     -------
-    The created/updated db message
+    modified version of input content metadata, with urls in place of file paths
     """
     content = content.copy()
-    keywords = content.pop("keywords", [])
-    related_datasets = content.pop("related_datasets", [])
     site, ctype, slug = content["site"], content["type"], content["slug"]
     subpath = os.path.join("contents", site, ctype, slug)
     for field in OBJECT_STORAGE_UPLOAD_FIELDS:
@@ -67,61 +76,312 @@ def content_sync(
             subpath=subpath,
             **storage_settings.storage_kws,
         )
+    return content
+
+
+def get_site_context(global_context: dict[str, Any], site: str) -> dict[str, Any]:
+    """
+    Return the context to be used for rendering templates of a site.
+
+    Parameters
+    ----------
+    global_context: dictionary to be used for rendering templates
+    site: site of the content
+
+    Returns
+    -------
+    dictionary of default values updated with values specific for the site
+    """
+    # NOTE: global_context is shared among contents (and threads): do not modify it
+    site_context = dict(global_context.get("default", dict()))
+    site_context.update(global_context.get(site, dict()))
+    return site_context
+
+
+def resolve_keywords(
+    session: sa.orm.session.Session, keywords: Iterable[str]
+) -> dict[str, int]:
+    """
+    Return the ids of the input keywords, inserting the ones not yet in the db.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    keywords: keywords to resolve, in the form '<category name>: <category value>'
+
+    Returns
+    -------
+    dictionary {keyword: keyword_id}. Not compliant keywords are excluded.
+    """
+    kw_records = []
+    for keyword in sorted(set(keywords)):
+        try:
+            category_name, category_value = [r.strip() for r in keyword.split(":")]
+        except ValueError:
+            logger.error(f"keyword '{keyword}' not compliant: it will be ignored")
+            continue
+        kw_records.append(
+            {
+                "category_name": category_name,
+                "category_value": category_value,
+                "keyword_name": keyword,
+            }
+        )
+    if not kw_records:
+        return dict()
+    session.execute(
+        insert(database.ContentKeyword)
+        .values(kw_records)
+        .on_conflict_do_nothing(index_elements=["keyword_name"])
+    )
+    keyword_names = [r["keyword_name"] for r in kw_records]
+    rows = session.execute(
+        sa.select(
+            database.ContentKeyword.keyword_name, database.ContentKeyword.keyword_id
+        ).where(
+            database.ContentKeyword.keyword_name
+            == sa.any_(sa.literal(keyword_names, dialect_postgresql.ARRAY(sa.String)))
+        )
+    )
+    return {keyword_name: keyword_id for keyword_name, keyword_id in rows}
+
+
+def resolve_resource_ids(
+    session: sa.orm.session.Session, resource_uids: Iterable[str]
+) -> dict[str, int]:
+    """
+    Return the ids of the datasets with the input uids.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resource_uids: uids of the datasets to resolve
+
+    Returns
+    -------
+    dictionary {resource_uid: resource_id}. Uids not found in the db are excluded.
+    """
+    resource_uids = sorted(set(resource_uids))
+    if not resource_uids:
+        return dict()
+    rows = session.execute(
+        sa.select(database.Resource.resource_uid, database.Resource.resource_id).where(
+            database.Resource.resource_uid
+            == sa.any_(sa.literal(resource_uids, dialect_postgresql.ARRAY(sa.String)))
+        )
+    )
+    return {resource_uid: resource_id for resource_uid, resource_id in rows}
+
+
+def content_sync(
+    session: sa.orm.session.Session,
+    content: dict[str, Any],
+    storage_settings: config.ObjectStorageSettings,
+    store_files: bool = True,
+    keyword_ids: dict[str, int] | None = None,
+    resource_ids: dict[str, int] | None = None,
+) -> database.Content:
+    """
+    Update db record with a content's metadata dictionary.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    content: metadata of loaded content
+    storage_settings: object with settings to access the object storage
+    store_files: if False, files of the content are assumed to be already uploaded
+    keyword_ids: {keyword: keyword_id} as returned by `resolve_keywords` (computed if None)
+    resource_ids: {resource_uid: resource_id} as returned by `resolve_resource_ids` (computed if None)
+
+    Returns
+    -------
+    The created/updated db message
+    """
+    if store_files:
+        content = store_content_files(content, storage_settings)
+    content = content.copy()
+    keywords = sorted(set(content.pop("keywords", [])))
+    related_datasets = sorted(set(content.pop("related_datasets", [])))
+    site, ctype, slug = content["site"], content["type"], content["slug"]
+    if keyword_ids is None:
+        keyword_ids = resolve_keywords(session, keywords)
+    if resource_ids is None:
+        resource_ids = resolve_resource_ids(session, related_datasets)
 
     # upsert of the content
+    insert_stmt = insert(database.Content).values(**content)
+    do_update_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=["site", "slug", "type"], set_=content
+    ).returning(database.Content)
     db_content = session.scalars(
-        sa.select(database.Content)
-        .filter_by(
-            site=site,
-            type=ctype,
-            slug=slug,
+        do_update_stmt, execution_options={"populate_existing": True}
+    ).one()
+    content_id = db_content.content_id
+    logger.debug(f"upserted content {ctype} '{slug}' for site {site}")
+
+    # build again related keywords
+    session.execute(
+        sa.delete(database.ContentsKeywordM2M).where(
+            database.ContentsKeywordM2M.content_id == content_id
         )
-        .limit(1)
-    ).first()
-    if not db_content:
-        db_content = database.Content(**content)
-        session.add(db_content)
-        logger.debug(f"added content {ctype} '{slug}' for site {site}")
-    else:
-        session.execute(
-            sa.update(database.Content)
-            .filter_by(content_id=db_content.content_id)
-            .values(**content)
+    )
+    keyword_rows = [
+        {"content_id": content_id, "keyword_id": keyword_ids[keyword]}
+        for keyword in keywords
+        if keyword in keyword_ids
+    ]
+    if keyword_rows:
+        session.execute(sa.insert(database.ContentsKeywordM2M), keyword_rows)
+
+    # build again related datasets
+    session.execute(
+        sa.delete(database.ResourceContent).where(
+            database.ResourceContent.content_id == content_id
         )
-        logger.debug("updated content {ctype} '{slug}' for site {site}")
-
-    # build related keywords
-    db_content.keywords = []  # type: ignore
-    for keyword in set(keywords):
-        category_name, category_value = [r.strip() for r in keyword.split(":")]
-        kw_md = {
-            "category_name": category_name,
-            "category_value": category_value,
-            "keyword_name": keyword,
-        }
-        keyword_obj = session.scalars(
-            sa.select(database.ContentKeyword).filter_by(**kw_md).limit(1)
-        ).first()
-        if not keyword_obj:
-            keyword_obj = database.ContentKeyword(**kw_md)
-        db_content.keywords.append(keyword_obj)
-
-    # build related datasets
-    db_content.resources = []  # type: ignore
-    for resource_uid in set(related_datasets):
-        dataset_obj = session.scalars(
-            sa.select(database.Resource).filter_by(resource_uid=resource_uid).limit(1)
-        ).first()
-        if not dataset_obj:
+    )
+    resource_rows = []
+    for resource_uid in related_datasets:
+        if resource_uid not in resource_ids:
             logger.warning(
                 f"dataset uid '{resource_uid}' not found. "
                 f"Skipping relationship with {ctype} '{slug}' for site {site}"
             )
             continue
-        db_content.resources.append(dataset_obj)
+        resource_rows.append(
+            {"content_id": content_id, "resource_id": resource_ids[resource_uid]}
+        )
+    if resource_rows:
+        session.execute(sa.insert(database.ResourceContent), resource_rows)
+
+    # relationships have been written bypassing the ORM
+    session.expire(db_content, ["keywords", "resources"])
     return db_content
 
 
+def find_layout_sources(
+    layout_data: Any, layout_folder_path: str | pathlib.Path
+) -> tuple[List[str], List[str]]:
+    """
+    Return the local files referred inside a layout.json.
+
+    Parameters
+    ----------
+    layout_data: data of the layout.json (or part of it)
+    layout_folder_path: path to the folder containing layout file
+
+    Returns
+    -------
+    tuple (html sources paths, image paths) of absolute paths of files referred
+    """
+    html_paths: List[str] = []
+    image_paths: List[str] = []
+    if isinstance(layout_data, dict):
+        content_source = layout_data.get("content_source")
+        if isinstance(content_source, str):
+            html_paths.append(
+                os.path.abspath(os.path.join(layout_folder_path, content_source))
+            )
+        images = layout_data.get("image")
+        if isinstance(images, dict):
+            images = [images]
+        if isinstance(images, list):
+            for image in images:
+                image_url = image.get("url") if isinstance(image, dict) else None
+                if isinstance(image_url, str) and not utils.is_url(image_url):
+                    image_paths.append(
+                        os.path.abspath(os.path.join(layout_folder_path, image_url))
+                    )
+        values = list(layout_data.values())
+    elif isinstance(layout_data, list):
+        values = layout_data
+    else:
+        values = []
+    for value in values:
+        sub_html_paths, sub_image_paths = find_layout_sources(value, layout_folder_path)
+        html_paths += sub_html_paths
+        image_paths += sub_image_paths
+    return html_paths, image_paths
+
+
+def hash_content_sources(
+    content_folder: str | pathlib.Path, data_raw: dict[str, Any]
+) -> tuple[str, set[str]]:
+    """
+    Compute a hash of all the source files of a content.
+
+    Sources are the files of the content folder and the files referred by the
+    content (image, layout, html sources and images of the layout) also if outside.
+
+    Parameters
+    ----------
+    content_folder: folder path containing content files
+    data_raw: data of the metadata.json (not rendered)
+
+    Returns
+    -------
+    tuple (hash of the sources, set of the template keys used in the sources)
+    """
+    content_folder = os.path.abspath(content_folder)
+    the_hash = utils.folder2hash(content_folder)
+    text_paths = [os.path.join(content_folder, "metadata.json")]
+    other_paths = []
+    for ancillar_file_field in OBJECT_STORAGE_UPLOAD_FIELDS:  # image, layout
+        rel_path = data_raw.get(ancillar_file_field)
+        if not rel_path:
+            continue
+        file_path = os.path.abspath(os.path.join(content_folder, rel_path))
+        if ancillar_file_field != "layout":
+            other_paths.append(file_path)
+            continue
+        text_paths.append(file_path)
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path) as fp:
+            layout_data = json.load(fp)
+        html_paths, image_paths = find_layout_sources(
+            layout_data, os.path.dirname(file_path)
+        )
+        text_paths += html_paths
+        other_paths += image_paths
+    template_keys: set[str] = set()
+    for file_path in text_paths:
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path) as fp:
+            template_keys |= utils.get_template_keys(fp.read())
+    for file_path in sorted(set(text_paths + other_paths)):
+        # files inside the content folder are already included
+        if file_path.startswith(content_folder + os.sep) or not os.path.isfile(
+            file_path
+        ):
+            continue
+        the_hash.update(file_path.encode())
+        the_hash = utils.file2hash(file_path, the_hash)
+    return the_hash.hexdigest(), template_keys
+
+
+def compute_content_hash(
+    sources_hash: str, template_keys: set[str], site_context: dict[str, Any]
+) -> str:
+    """
+    Compute the hash of a content for a site.
+
+    Parameters
+    ----------
+    sources_hash: hash of the source files, as returned by `hash_content_sources`
+    template_keys: template keys used in the source files
+    site_context: context used for rendering templates of the site
+
+    Returns
+    -------
+    the hash of the content, also dependent on the used part of the context
+    """
+    context_slice = {key: site_context.get(key) for key in sorted(template_keys)}
+    the_hash = hashlib.md5(sources_hash.encode())
+    the_hash.update(json.dumps(context_slice, sort_keys=True).encode())
+    return the_hash.hexdigest()
+
+
 def load_content_folder(
     content_folder: str | pathlib.Path, global_context: dict[str, Any] | None = None
 ) -> List[dict[str, Any]] | None:
@@ -143,9 +403,9 @@ def load_content_folder(
     with open(metadata_file_path) as fp:
         data_raw = json.load(fp)
     ret_value = []
+    sources_hash, template_keys = hash_content_sources(content_folder, data_raw)
     for site in data_raw["site"][:]:
-        site_context = global_context.get("default", dict())
-        site_context.update(global_context.get(site, dict()))
+        site_context = get_site_context(global_context, site)
         data = utils.dict_render(data_raw, site_context)
         metadata = {
             "site": site,
@@ -161,6 +421,9 @@ def load_content_folder(
             "related_datasets": data.get("related_datasets", []),
             "data": data.get("data"),
             "hidden": data.get("hidden", False),
+            "sources_hash": compute_content_hash(
+                sources_hash, template_keys, site_context
+            ),
             # managed below:
             # "image": None,
             # "layout": None,
@@ -216,8 +479,7 @@ def transform_layout(
     layout_raw_data = layout_manager.transform_html_blocks(
         layout_data, layout_folder_path
     )
-    site_context = global_context.get("default", dict())
-    site_context.update(global_context.get(site, dict()))
+    site_context = get_site_context(global_context, site)
     layout_data = utils.dict_render(layout_raw_data, site_context)
     images_storage_subpath = f"contents/{content['slug']}"
     layout_data = layout_manager.transform_image_blocks(
@@ -262,6 +524,7 @@ def yaml2context(yaml_path: str | pathlib.Path | None) -> dict[str, Any]:
 def load_contents(
     contents_root_folder: str | pathlib.Path,
     global_context: dict[str, Any] | None = None,
+    max_workers: int = CONTENTS_MAX_WORKERS,
 ) -> List[dict[str, Any]]:
     """
     Load all contents from a folder and return a dictionary of metadata extracted.
@@ -270,15 +533,17 @@ def load_contents(
     ----------
     contents_root_folder: root path where to look for contents (i.e. cads-contents-json root folder)
     global_context: dictionary to be used for rendering templates
+    max_workers: max number of content folders parsed concurrently
 
     Returns
     -------
     List of found contents parsed.
     """
-    loaded_contents = []
+    loaded_contents: List[dict[str, Any]] = []
     if not os.path.isdir(contents_root_folder):
         logger.warning(f"not found folder {contents_root_folder}!")
         return []
+    content_folders = []
     for content_folder_name in sorted(os.listdir(contents_root_folder)):
         content_folder = os.path.join(contents_root_folder, content_folder_name)
         if not os.path.isdir(content_folder):
@@ -289,34 +554,93 @@ def load_contents(
                 "%r doesn't seem a content folder. Skipping" % content_folder
             )
             continue
+        content_folders.append(content_folder)
+
+    def load_folder(content_folder: str) -> List[dict[str, Any]] | None:
         try:
-            contents_md = load_content_folder(content_folder, global_context)
+            return load_content_folder(content_folder, global_context)
         except utils.CADSTemplateKeyError as err:
             logger.error(
                 f"rendering of metadata.json failed: {err} "
                 f"Content in {content_folder} is not loaded."
             )
-            continue
         except Exception:  # noqa
             logger.exception(
                 "failed parsing content in %s, error follows" % content_folder
             )
-            continue
-        if contents_md:
-            loaded_contents += contents_md
+        return None
+
+    # executor.map preserves the order of the folders
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for contents_md in executor.map(load_folder, content_folders):
+            if contents_md:
+                loaded_contents += contents_md
     return loaded_contents
 
 
+def prepare_contents(
+    contents: List[dict[str, Any]],
+    storage_settings: config.ObjectStorageSettings,
+    global_context: dict[str, Any] | None = None,
+    max_workers: int = CONTENTS_MAX_WORKERS,
+) -> List[dict[str, Any]]:
+    """
+    Transform layouts and upload files of contents, using a pool of workers.
+
+    Contents whose processing fails are logged and excluded from the output.
+
+    Parameters
+    ----------
+    contents: list of metadata of loaded contents
+    storage_settings: object with settings to access the object storage
+    global_context: dictionary to be used for rendering templates
+    max_workers: max number of contents processed (and so uploads made) concurrently
+
+    Returns
+    -------
+    list of contents ready to be synced in the db, in the same order of input
+    """
+
+    def prepare_content(content: dict[str, Any]) -> dict[str, Any] | None:
+        site, ctype, slug = content["site"], content["type"], content["slug"]
+        try:
+            content = transform_layout(content, storage_settings, global_context)
+        except utils.CADSTemplateKeyError as err:
+            logger.error(f"Processing layout of content '{slug}' fails: {err}")
+            return None
+        except Exception:  # noqa
+            logger.exception(
+                f"Processing layout for content {ctype} '{slug}' for site {site} fails, error follows"
+            )
+            return None
+        try:
+            content = store_content_files(content, storage_settings)
+        except Exception:  # noqa
+            logger.exception(
+                f"Storing files for content {ctype} '{slug}' for site {site} fails, error follows"
+            )
+            return None
+        return content
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        prepared = list(executor.map(prepare_content, contents))
+    return [content for content in prepared if content is not None]
+
+
 def update_catalogue_contents(
     session: sa.orm.session.Session,
     contents_package_path: str | pathlib.Path,
     storage_settings: config.ObjectStorageSettings,
     remove_orphans: bool = True,
     yaml_path: str | pathlib.Path | None = None,
+    max_workers: int = CONTENTS_MAX_WORKERS,
+    force: bool = False,
 ):
     """
     Load metadata of contents from files and sync each content in the db.
 
+    Contents whose sources_hash matches the one in the db are not updated.
+
     Parameters
     ----------
     session: opened SQLAlchemy session
@@ -324,33 +648,73 @@ def update_catalogue_contents(
     storage_settings: object with settings to access the object storage
     remove_orphans: if True, remove from the database other contents not involved (default True)
     yaml_path: path to yaml file containing variables to be rendered in the json files
+    max_workers: max number of contents loaded and transformed concurrently
+    force: if True, update also contents not changed (default False)
 
     Returns
     -------
     list: list of (site, type, slug) of contents involved
     """
     global_context = yaml2context(yaml_path)
-    contents = load_contents(contents_package_path, global_context)
+    contents = load_contents(contents_package_path, global_context, max_workers)
     logger.info(
         "loaded %s contents from folder %s" % (len(contents), contents_package_path)
     )
-    involved_content_props = []
-    for content in contents[:]:
+    involved_content_props = [(c["site"], c["type"], c["slug"]) for c in contents]
+
+    # bulk resolution of datasets related to the contents
+    resource_ids = resolve_resource_ids(
+        session, [uid for c in contents for uid in c.get("related_datasets", [])]
+    )
+    db_hashes = dict()
+    if not force:
+        db_hashes = {
+            (r.site, r.type, r.slug): r.sources_hash
+            for r in session.execute(
+                sa.select(
+                    database.Content.site,
+                    database.Content.type,
+                    database.Content.slug,
+                    database.Content.sources_hash,
+                )
+            )
+        }
+    contents_to_update = []
+    for content in contents:
         site, ctype, slug = content["site"], content["type"], content["slug"]
-        involved_content_props.append((site, ctype, slug))
-        try:
-            content = transform_layout(content, storage_settings, global_context)
-        except utils.CADSTemplateKeyError as err:
-            logger.error(f"Processing layout of content '{slug}' fails: {err}")
-            continue
-        except Exception:  # noqa
-            logger.exception(
-                f"Processing layout for content {ctype} '{slug}' for site {site} fails, error follows"
+        # links to datasets depend also on which datasets are in the catalogue
+        found_uids = sorted(
+            {uid for uid in content.get("related_datasets", []) if uid in resource_ids}
+        )
+        content["sources_hash"] = hashlib.md5(
+            (content["sources_hash"] + json.dumps(found_uids)).encode()
+        ).hexdigest()
+        if db_hashes.get((site, ctype, slug)) == content["sources_hash"]:
+            logger.info(
+                f"skip updating of content {ctype} '{slug}' for site {site}: no change detected"
             )
             continue
+        contents_to_update.append(content)
+    contents = prepare_contents(
+        contents_to_update, storage_settings, global_context, max_workers
+    )
+
+    # bulk resolution of keywords of the contents
+    keyword_ids = resolve_keywords(
+        session, [kw for c in contents for kw in c.get("keywords", [])]
+    )
+    for content in contents:
+        site, ctype, slug = content["site"], content["type"], content["slug"]
         try:
             with session.begin_nested():
-                content_sync(session, content, storage_settings)
+                content_sync(
+                    session,
+                    content,
+                    storage_settings,
+                    store_files=False,
+                    keyword_ids=keyword_ids,
+                    resource_ids=resource_ids,
+                )
             logger.info(f"content {ctype} '{slug}' for site {site}: db sync successful")
         except Exception:  # noqa
             logger.exception(
@@ -361,16 +725,7 @@ def update_catalogue_contents(
         return involved_content_props
 
     # remove not loaded contents from the db
-    all_db_contents = session.scalars(sa.select(database.Content))
-    for db_content in all_db_contents:
-        content_props = (db_content.site, db_content.type, db_content.slug)
-        if content_props not in involved_content_props:
-            db_content.keywords = []
-            session.delete(db_content)
-            logger.info(
-                f"removed old content {content_props[1]} '{content_props[2]}' "
-                f"for site {content_props[0]}"
-            )
+    orphans.remove_orphan_contents(session, involved_content_props)
 
     return involved_content_props
 
@@ -0,0 +1,232 @@
+"""index of the resources of each facet, for fast facet counts."""
+
+# Copyright 2022, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict, Iterable, List, Set
+
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+
+from cads_catalogue import database
+
+logger = structlog.get_logger(__name__)
+
+
+def get_resources_fingerprints(session: sa.orm.session.Session) -> Dict[int, str]:
+    """Return the row fingerprints of the resources in the db, by resource id."""
+    resource_table = database.Resource.__table__
+    return dict(
+        session.execute(  # type: ignore
+            sa.select(resource_table.c.resource_id, resource_table.c.row_fingerprint)
+        ).all()
+    )
+
+
+def get_changed_resource_ids(
+    fingerprints_before: Dict[int, str], fingerprints_after: Dict[int, str]
+) -> Set[int]:
+    """Return the ids of the resources added, removed or changed between two states.
+
+    Parameters
+    ----------
+    fingerprints_before: row fingerprints by resource id, as before the changes
+    fingerprints_after: row fingerprints by resource id, as after the changes
+
+    Returns
+    -------
+    set: ids of the resources changed
+    """
+    return {
+        resource_id
+        for resource_id in fingerprints_before.keys() | fingerprints_after.keys()
+        if resource_id not in fingerprints_before
+        or resource_id not in fingerprints_after
+        or fingerprints_before[resource_id] != fingerprints_after[resource_id]
+    }
+
+
+def refresh_facet_index(
+    session: sa.orm.session.Session, resource_ids: Iterable[int] | None = None
+) -> int:
+    """Write again the rows of the facet index involving some resources.
+
+    The facets refreshed are the ones of the resources, as found in the db and in the
+    index, so resources removed are removed from the index as well. The whole index
+    is built again if `resource_ids` is None or if the index is empty.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resource_ids: ids of the resources changed (None for all)
+
+    Returns
+    -------
+    int: number of facets of the index written
+    """
+    index_table = database.FacetIndex.__table__
+    facet_table = database.Facet.__table__
+    resources_facets = database.ResourceFacet.__table__
+    resource_table = database.Resource.__table__
+    if resource_ids is not None and not session.scalar(
+        sa.select(sa.func.count()).select_from(index_table)
+    ):
+        resource_ids = None
+    query = (
+        sa.select(
+            facet_table.c.facet_id,
+            facet_table.c.category_name,
+            facet_table.c.category_value,
+            sa.func.array_agg(
+                dialect_postgresql.aggregate_order_by(
+                    resources_facets.c.resource_id, resources_facets.c.resource_id
+                )
+            ),
+        )
+        .join(resources_facets, resources_facets.c.facet_id == facet_table.c.facet_id)
+        .join(
+            resource_table,
+            resource_table.c.resource_id == resources_facets.c.resource_id,
+        )
+        .where(resource_table.c.hidden.is_not(True))
+        .group_by(facet_table.c.facet_id)
+    )
+    if resource_ids is None:
+        session.execute(sa.delete(index_table))
+    else:
+        ids = sa.literal(
+            sorted(set(resource_ids)), dialect_postgresql.ARRAY(sa.Integer)
+        )
+        facet_ids = session.scalars(
+            sa.union(
+                sa.select(resources_facets.c.facet_id).where(
+                    resources_facets.c.resource_id == sa.any_(ids)
+                ),
+                sa.select(index_table.c.facet_id).where(
+                    index_table.c.resource_ids.overlap(ids)
+                ),
+            )
+        ).all()
+        if not facet_ids:
+            return 0
+        session.execute(
+            sa.delete(index_table).where(index_table.c.facet_id.in_(facet_ids))
+        )
+        query = query.where(facet_table.c.facet_id.in_(facet_ids))
+    written = session.execute(
+        sa.insert(index_table)
+        .from_select(
+            ["facet_id", "category_name", "category_value", "resource_ids"], query
+        )
+        .returning(index_table.c.facet_id)
+    ).all()
+    logger.info(f"refreshed {len(written)} facets of the facet index")
+    return len(written)
+
+
+def ids_to_bitmap(ids: Iterable[int]) -> int:
+    """Return the bitmap of some ids: an integer with the bits of the ids set."""
+    bits = bytearray()
+    for id in ids:
+        byte = id >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte + 1 - len(bits)))
+        bits[byte] |= 1 << (id & 7)
+    return int.from_bytes(bits, "little")
+
+
+def bitmap_to_ids(bitmap: int) -> List[int]:
+    """Return the sorted ids of the bits set in a bitmap."""
+    bits = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    return [
+        byte_index * 8 + bit
+        for byte_index, byte in enumerate(bits)
+        if byte
+        for bit in range(8)
+        if byte >> bit & 1
+    ]
+
+
+class FacetBitmaps:
+    """The facet index in memory, as bitmaps of resource ids.
+
+    A selection is a dictionary category name -> category values: a resource is
+    selected if it has at least one of the values of each category. Only the resources
+    with at least one facet are considered, and hidden resources are not.
+    """
+
+    def __init__(self, bitmaps: Dict[str, Dict[str, int]]) -> None:
+        # category name -> category value -> bitmap of the resource ids
+        self.bitmaps = bitmaps
+        self.all = 0
+        for values in bitmaps.values():
+            for bitmap in values.values():
+                self.all |= bitmap
+
+    @classmethod
+    def load(cls, session: sa.orm.session.Session) -> "FacetBitmaps":
+        """Return the bitmaps of the facet index stored in the db."""
+        index_table = database.FacetIndex.__table__
+        bitmaps: Dict[str, Dict[str, int]] = dict()
+        for category_name, category_value, resource_ids in session.execute(
+            sa.select(
+                index_table.c.category_name,
+                index_table.c.category_value,
+                index_table.c.resource_ids,
+            )
+        ):
+            values = bitmaps.setdefault(category_name, dict())
+            # the same facet could be stored more times
+            values[category_value] = values.get(category_value, 0) | ids_to_bitmap(
+                resource_ids
+            )
+        return cls(bitmaps)
+
+    def select(self, facets: Dict[str, List[str]] | None = None) -> int:
+        """Return the bitmap of the resources of a selection of facets."""
+        selected = self.all
+        for category_name, category_values in (facets or dict()).items():
+            values = self.bitmaps.get(category_name, dict())
+            category_selected = 0
+            for category_value in category_values:
+                category_selected |= values.get(category_value, 0)
+            selected &= category_selected
+        return selected
+
+    def resource_ids(self, facets: Dict[str, List[str]] | None = None) -> List[int]:
+        """Return the sorted ids of the resources of a selection of facets."""
+        return bitmap_to_ids(self.select(facets))
+
+    def counts(
+        self, facets: Dict[str, List[str]] | None = None
+    ) -> Dict[str, Dict[str, int]]:
+        """Return the number of resources of a selection, by facet.
+
+        Parameters
+        ----------
+        facets: the selection, dictionary category name -> category values
+
+        Returns
+        -------
+        dict: category name -> category value -> number of resources (if not zero)
+        """
+        selected = self.select(facets)
+        counts: Dict[str, Dict[str, int]] = dict()
+        for category_name, values in self.bitmaps.items():
+            for category_value, bitmap in values.items():
+                count = (bitmap & selected).bit_count()
+                if count:
+                    counts.setdefault(category_name, dict())[category_value] = count
+        return counts
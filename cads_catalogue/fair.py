@@ -14,29 +14,74 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
 import datetime
 import os
+from typing import Any
 
 import requests
+import requests.adapters
 import sqlalchemy as sa
 import structlog
+import urllib3
 from cads_common import portal
 
 from cads_catalogue import database
 
 FAIR_CHEKER_USERNAME = os.getenv("FAIR_CHECKER_USERNAME", "marvel")
 FAIR_CHEKER_PASSWORD = os.getenv("FAIR_CHECKER_PASSWORD", "wonderwoman")
+FAIR_CHECKER_TIMEOUT = float(os.getenv("FAIR_CHECKER_TIMEOUT", 60))
+FAIR_CHECKER_CONCURRENCY = int(os.getenv("FAIR_CHECKER_CONCURRENCY", 4))
+FAIR_CHECKER_RETRIES = int(os.getenv("FAIR_CHECKER_RETRIES", 3))
+FAIR_CHECKER_BACKOFF_FACTOR = float(os.getenv("FAIR_CHECKER_BACKOFF_FACTOR", 2))
 
 logger = structlog.get_logger(__name__)
 
 
-def call_fair_checker(fair_checker_host: str, site_base: str, dataset_uid: str) -> dict:
+def get_http_session(
+    pool_size: int = FAIR_CHECKER_CONCURRENCY,
+    retries: int = FAIR_CHECKER_RETRIES,
+    backoff_factor: float = FAIR_CHECKER_BACKOFF_FACTOR,
+) -> requests.Session:
+    """Return a HTTP session with a connection pool and retries for the FAIR checker.
+
+    Args:
+        pool_size: Max number of connections kept open.
+        retries: Max number of retries of a request.
+        backoff_factor: Factor for the exponential backoff between retries (seconds).
+
+    Returns:        The HTTP session.
+    """
+    retry = urllib3.util.Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        # evaluation requests are idempotent
+        allowed_methods=None,
+        raise_on_status=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    http_session = requests.Session()
+    http_session.mount("http://", adapter)
+    http_session.mount("https://", adapter)
+    return http_session
+
+
+def call_fair_checker(
+    fair_checker_host: str,
+    site_base: str,
+    dataset_uid: str,
+    http_session: requests.Session | None = None,
+) -> dict:
     """Check if the FAIR checker service is reachable.
 
     Args:
         fair_checker_host: Hostname (with port, optionally) of the FAIR checker service.
         site_base: Base URL for DSS portal.
         dataset_uid: Dataset unique identifier.
+        http_session: HTTP session to use (if None, a new connection is used).
 
     Returns:        JSON response from the FAIR checker service.
     """
@@ -50,7 +95,7 @@ def call_fair_checker(fair_checker_host: str, site_base: str, dataset_uid: str)
     }
 
     logger.info("Retrieving FAIR report for resource", dataset_uid=dataset_uid)
-    response = requests.post(
+    response = (http_session or requests).post(
         f"http://{fair_checker_host}/fuji/api/v1/evaluate",
         headers={
             "accept": "application/json",
@@ -58,55 +103,117 @@ def call_fair_checker(fair_checker_host: str, site_base: str, dataset_uid: str)
         },
         json=payload,
         auth=(FAIR_CHEKER_USERNAME, FAIR_CHEKER_PASSWORD),
-        timeout=60,
+        timeout=FAIR_CHECKER_TIMEOUT,
     )
     response.raise_for_status()
     return response.json()
 
 
-def update_fair_score(session: sa.orm.Session, fair_checker_host: str) -> None:
+def extract_fair_score(fair_data: Any) -> int | None:
+    """Extract the FAIR score from a report of the FAIR checker service.
+
+    Args:
+        fair_data: JSON response from the FAIR checker service.
+
+    Returns:        The value of summary.score_percent.FAIR as integer, or None if not found.
+    """
+    try:
+        return int(fair_data["summary"]["score_percent"]["FAIR"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def update_fair_score(
+    session: sa.orm.Session,
+    fair_checker_host: str,
+    concurrency: int = FAIR_CHECKER_CONCURRENCY,
+    only_older_than: datetime.timedelta | None = None,
+    retries: int = FAIR_CHECKER_RETRIES,
+    backoff_factor: float = FAIR_CHECKER_BACKOFF_FACTOR,
+) -> None:
     """Update the FAIR score for all resources in the catalogue.
 
+    Evaluations run concurrently, while results are stored (and committed) one
+    resource at a time, so an interrupted run can be resumed with `only_older_than`.
+
     Args:
-        session_obj: SQLAlchemy session object.
-        fair_checker_service_url: URL of the FAIR checker service.
+        session: SQLAlchemy session object.
+        fair_checker_host: Hostname (with port, optionally) of the FAIR checker service.
+        concurrency: Max number of concurrent requests to the FAIR checker service.
+        only_older_than: If set, skip resources evaluated more recently than this.
+        retries: Max number of retries of a request.
+        backoff_factor: Factor for the exponential backoff between retries (seconds).
     """
-    resources = session.query(database.Resource).all()
-    for resource in resources:
-        site_base = portal.get_site_url(resource.portal) if resource.portal else None
+    query = sa.select(
+        database.Resource.resource_uid, database.Resource.portal
+    ).order_by(database.Resource.fair_timestamp.asc().nulls_first())
+    if only_older_than is not None:
+        threshold = datetime.datetime.now(datetime.timezone.utc) - only_older_than
+        query = query.where(
+            sa.or_(
+                database.Resource.fair_timestamp.is_(None),
+                database.Resource.fair_timestamp < threshold,
+            )
+        )
+    to_evaluate = []
+    for resource_uid, resource_portal in session.execute(query).all():
+        site_base = portal.get_site_url(resource_portal) if resource_portal else None
         if not site_base:
             logger.warning(
                 "Cannot determine site base URL for portal",
-                portal=resource.portal,
-                resource_id=resource.resource_uid,
+                portal=resource_portal,
+                resource_id=resource_uid,
             )
             continue
-        dataset_uid = resource.resource_uid
-        assert dataset_uid is not None
-        try:
-            result = call_fair_checker(fair_checker_host, site_base, dataset_uid)
-        except requests.RequestException as e:
-            logger.error(
-                "Error connecting to FAIR checker service",
-                error=str(e),
-                resource_id=resource.resource_uid,
-            )
-            continue
-        resource.fair_timestamp = datetime.datetime.utcnow()
-        try:
-            session.execute(
-                sa.update(database.ResourceData)
-                .where(database.ResourceData.resource_uid == resource.resource_uid)
-                .values(fair_data=result),
-            )
-            session.add(resource)
-            session.commit()
-        except sa.exc.SQLAlchemyError as e:
-            session.rollback()
-            logger.error(
-                "Error updating FAIR data",
-                error=str(e),
-                resource_id=resource.resource_uid,
-            )
-            continue
-        logger.info("Updated FAIR data", resource_id=resource.resource_uid)
+        to_evaluate.append((resource_uid, site_base))
+    logger.info("Resources to evaluate", count=len(to_evaluate))
+
+    http_session = get_http_session(concurrency, retries, backoff_factor)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+    with http_session, executor:
+        futures = {
+            executor.submit(
+                call_fair_checker,
+                fair_checker_host,
+                site_base,
+                resource_uid,
+                http_session,
+            ): resource_uid
+            for resource_uid, site_base in to_evaluate
+        }
+        # db is updated only by this thread, as soon as each result is available
+        for future in concurrent.futures.as_completed(futures):
+            resource_uid = futures[future]
+            try:
+                result = future.result()
+            except requests.RequestException as e:
+                logger.error(
+                    "Error connecting to FAIR checker service",
+                    error=str(e),
+                    resource_id=resource_uid,
+                )
+                continue
+            try:
+                session.execute(
+                    sa.update(database.ResourceData)
+                    .where(database.ResourceData.resource_uid == resource_uid)
+                    .values(fair_data=result),
+                )
+                session.execute(
+                    sa.update(database.Resource)
+                    .where(database.Resource.resource_uid == resource_uid)
+                    .values(
+                        fair_timestamp=datetime.datetime.utcnow(),
+                        fair_score=extract_fair_score(result),
+                    )
+                )
+                session.commit()
+            except sa.exc.SQLAlchemyError as e:
+                session.rollback()
+                logger.error(
+                    "Error updating FAIR data",
+                    error=str(e),
+                    resource_id=resource_uid,
+                )
+                continue
+            logger.info("Updated FAIR data", resource_id=resource_uid)
@@ -15,6 +15,7 @@
 # limitations under the License.
 
 import copy
+import hashlib
 import json
 import operator
 import os
@@ -27,7 +28,7 @@ from typing import Any, List
 import sqlalchemy as sa
 import structlog
 
-from cads_catalogue import config, database, object_storage
+from cads_catalogue import config, database, object_storage, utils
 
 logger = structlog.get_logger(__name__)
 
@@ -169,13 +170,22 @@ def transform_form(
     form_file_path = os.path.join(resource_folder_path, "form.json")
     resource["form_data"] = None
     resource["form"] = None
+    config_files_hashes = resource.setdefault("config_files_hashes", dict())
+    config_files_hashes["form.json"] = None
+    config_files_hashes["form licences block"] = None
     if not os.path.isfile(form_file_path):
         return resource
     with open(form_file_path) as fp:
-        form_data = json.load(fp)
+        form_text = fp.read()
+    form_data = json.loads(form_text)
     form_data = transform_licences_blocks(
         session, form_data, resource, storage_settings
     )
+    # the configuration hash needs only the hash of the licence block synthesised
+    config_files_hashes["form.json"] = hashlib.md5(
+        form_text.encode("utf-8")
+    ).hexdigest()
+    config_files_hashes["form licences block"] = utils.data2hash(form_data[-1])
     resource["form_data"] = form_data
     resource["form"] = store_form_by_data(form_data, resource, storage_settings)
     return resource
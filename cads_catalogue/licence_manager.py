@@ -21,12 +21,12 @@ import json
 import os
 import pathlib
 import shutil
-from typing import Any, List
+from typing import Any, Iterable, List
 
 import sqlalchemy as sa
 import structlog
 
-from cads_catalogue import config, database, object_storage, utils
+from cads_catalogue import config, database, object_storage, orphans, utils
 
 logger = structlog.get_logger(__name__)
 
@@ -93,6 +93,26 @@ def licence_sync(
     return db_licence
 
 
+def compute_licence_hash(json_filepath: str, licence_md: dict[str, Any]) -> str:
+    """
+    Compute a hash of the source files of a licence.
+
+    Parameters
+    ----------
+    json_filepath: licence json file
+    licence_md: licence metadata loaded from the json file
+
+    Returns
+    -------
+    MD5 hash of the json file, the markdown file and the local attachment
+    """
+    the_hash = utils.file2hash(json_filepath)
+    the_hash = utils.file2hash(licence_md["md_filename"], the_hash)
+    if not utils.is_url(licence_md["download_filename"]):
+        the_hash = utils.file2hash(licence_md["download_filename"], the_hash)
+    return the_hash.hexdigest()
+
+
 def load_licence_md(json_filepath: str) -> dict[str, Any] | None:
     """
     Validate and load licence metadata from an input json file.
@@ -193,7 +213,7 @@ def load_licence_md(json_filepath: str) -> dict[str, Any] | None:
             "licence file %r is not compliant, error follows" % json_filepath
         )
         return None
-
+    licence_md["sources_hash"] = compute_licence_hash(json_filepath, licence_md)
     return licence_md
 
 
@@ -247,31 +267,89 @@ def load_licences_from_folder(licences_folder: str) -> List[dict[str, Any]]:
     return list(licences_md.values())
 
 
+def filter_changed_licences(
+    session: sa.orm.session.Session, licences: List[dict[str, Any]]
+) -> List[dict[str, Any]]:
+    """
+    Return the licences whose sources_hash differs from the one stored in the db.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    licences: list of metadata of loaded licences
+
+    Returns
+    -------
+    list: the loaded licences that are new or changed
+    """
+    db_hashes = {
+        (r.licence_uid, r.revision): r.sources_hash
+        for r in session.execute(
+            sa.select(
+                database.Licence.licence_uid,
+                database.Licence.revision,
+                database.Licence.sources_hash,
+            )
+        )
+    }
+    return [
+        licence
+        for licence in licences
+        if db_hashes.get((licence["licence_uid"], int(licence["revision"])))
+        != licence["sources_hash"]
+    ]
+
+
 def update_catalogue_licences(
     session: sa.orm.session.Session,
     licences_folder_path: str,
     storage_settings: config.ObjectStorageSettings,
+    force: bool = False,
+    licences: List[dict[str, Any]] | None = None,
+    changed_licence_uids: Iterable[str] | None = None,
 ) -> List[tuple]:
     """
     Load metadata of licences from files and sync each licence in the db.
 
+    Licences whose sources_hash matches the one in the db are not updated.
+
     Parameters
     ----------
     session: opened SQLAlchemy session
     licences_folder_path: path to the root folder containing metadata files for licences
     storage_settings: object with settings to access the object storage
+    force: if True, update also licences not changed (default False)
+    licences: licences already loaded from licences_folder_path (if None, they are loaded)
+    changed_licence_uids: uids of the licences changed, as returned by
+        `filter_changed_licences` (if None, they are computed here)
 
     Returns
     -------
     list: list of tuple (licence uid, revision) of licences involved
     """
     involved_licences = []
-    licences = load_licences_from_folder(licences_folder_path)
+    if licences is None:
+        licences = load_licences_from_folder(licences_folder_path)
     logger.info("loaded %s licences from %s" % (len(licences), licences_folder_path))
+    if changed_licence_uids is None:
+        if not force:
+            licences_to_update = filter_changed_licences(session, licences)
+        else:
+            licences_to_update = licences
+        changed_licence_uids = [
+            licence["licence_uid"] for licence in licences_to_update
+        ]
+    changed_uids = set(changed_licence_uids)
     for licence in licences:
         licence_uid = licence["licence_uid"]
         revision = int(licence["revision"])
         involved_licences.append((licence_uid, revision))
+        if licence_uid not in changed_uids:
+            logger.info(
+                "skip updating of licence '%s' (revision %s): no change detected"
+                % (licence_uid, revision)
+            )
+            continue
         try:
             with session.begin_nested():
                 licence_sync(session, licence_uid, licences, storage_settings)
@@ -299,19 +377,7 @@ def remove_orphan_licences(
     keep_licences: list of licence uids to keep
     resources: list of resource_uid
     """
-    all_licences = session.scalars(sa.select(database.Licence))
-    for licence in all_licences:
-        if (licence.licence_uid, licence.revision) in keep_licences:
-            continue
-        related_dataset_uids = [r.resource_uid for r in licence.resources]
-        if set(related_dataset_uids).intersection(set(resources)):
-            continue
-        licence.resources = []
-        session.delete(licence)
-        logger.info(
-            "removed licence '%s' (revision %s)"
-            % (licence.licence_uid, licence.revision)
-        )
+    orphans.remove_orphan_licences(session, keep_licences, resources)
 
 
 def migrate_from_cds_licences(
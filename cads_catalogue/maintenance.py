@@ -14,13 +14,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional
+import os
+from typing import Dict, List, Optional
 
 import sqlalchemy as sa
 import structlog
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+
+from cads_catalogue import database
 
 logger = structlog.get_logger(__name__)
 
+# minimum number of resources to write in a run, as a fraction of the resources
+# in the db, to defer the maintenance of the GIN indexes at the end of the run
+GIN_BULK_UPDATE_FRACTION = float(os.getenv("CATALOGUE_GIN_BULK_UPDATE_FRACTION", 0.25))
+# value of gin_pending_list_limit (in kB) while the maintenance is deferred
+GIN_BULK_PENDING_LIST_LIMIT = int(
+    os.getenv("CATALOGUE_GIN_BULK_PENDING_LIST_LIMIT", 262144)
+)
+
 
 def force_vacuum(
     conn: sa.engine.Connection, only_older_than_days: Optional[int] = None
@@ -68,3 +80,97 @@ def force_vacuum(
         vacuum_sql = sa.text("VACUUM ANALYZE %s" % table)
         conn.execute(vacuum_sql)
         conn.commit()
+
+
+def get_gin_indexes(tables: List[sa.Table]) -> List[sa.Index]:
+    """Return the GIN indexes of some tables."""
+    return [
+        index
+        for table in tables
+        for index in table.indexes
+        if index.dialect_options["postgresql"]["using"] == "gin"
+    ]
+
+
+def is_bulk_update(
+    session: sa.orm.session.Session,
+    expected_updates: int,
+    fraction: float = GIN_BULK_UPDATE_FRACTION,
+) -> bool:
+    """
+    Return True if the resources to write are many compared to the ones in the db.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    expected_updates: (estimated) number of resources to write
+    fraction: minimum fraction of the resources in the db to write
+
+    Returns
+    -------
+    bool: True if at least `fraction` of the resources are to write
+    """
+    if expected_updates <= 0:
+        return False
+    count = session.scalar(sa.select(sa.func.count()).select_from(database.Resource))
+    return expected_updates >= fraction * (count or 0)
+
+
+def defer_gin_maintenance(
+    session: sa.orm.session.Session,
+    pending_list_limit: int = GIN_BULK_PENDING_LIST_LIMIT,
+) -> None:
+    """
+    Let the GIN indexes collect the changes of the current transaction in their pending list.
+
+    Changes are merged in the main structure of an index when its pending list exceeds
+    `pending_list_limit`, or by `clean_gin_pending_lists`. It has no effect on the
+    indexes where the storage parameter 'fastupdate' is off.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    pending_list_limit: maximum size (in kB) of the pending lists
+    """
+    logger.info(
+        "deferring maintenance of GIN indexes (gin_pending_list_limit = %i kB)"
+        % pending_list_limit
+    )
+    session.execute(
+        sa.text("SET LOCAL gin_pending_list_limit = %i" % int(pending_list_limit))
+    )
+
+
+def clean_gin_pending_lists(
+    session: sa.orm.session.Session, tables: List[sa.Table] | None = None
+) -> Dict[str, int]:
+    """
+    Merge the pending lists of GIN indexes in their main structure.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    tables: tables of the indexes, by default the resources table
+
+    Returns
+    -------
+    dict: index name -> number of pages removed from the pending list
+    """
+    if tables is None:
+        tables = [database.Resource.__table__]  # type: ignore
+    cleaned: Dict[str, int] = dict()
+    for index in get_gin_indexes(tables):  # type: ignore
+        index_name = str(index.name)
+        pages = session.scalar(
+            sa.select(
+                sa.func.gin_clean_pending_list(
+                    sa.cast(index_name, dialect_postgresql.REGCLASS)
+                )
+            )
+        )
+        cleaned[index_name] = int(pages or 0)
+        logger.info(
+            "cleaned pending list of GIN index %s: %i pages"
+            % (index_name, cleaned[index_name])
+        )
+    return cleaned
@@ -31,12 +31,17 @@ import yaml
 from sqlalchemy.dialects.postgresql import insert
 
 from cads_catalogue import (
+    compression,
     config,
     database,
     form_manager,
     layout_manager,
+    maintenance,
     object_storage,
+    orphans,
+    parsed_dataset,
     utils,
+    validations,
 )
 
 logger = structlog.get_logger(__name__)
@@ -49,15 +54,43 @@ OBJECT_STORAGE_UPLOAD_FILES = {
     "constraints.json": "constraints",
     "overview.png": "previewimage",
 }
+# sources of the configuration hash, as keys of resource["config_files_hashes"]
+CONFIG_HASH_SOURCES = [
+    "constraints.json",
+    "mapping.json",
+    "form.json",
+    "form licences block",
+    "adaptor.json",
+]
+# fields of resource_data rewritten only if changed (compared by md5)
+RESOURCE_DATA_HASHED_FIELDS = [
+    "adaptor_configuration",
+    "constraints_data",
+    "constraints_zstd",
+    "form_data",
+    "mapping",
+    "zstd_dictionary_id",
+]
 
 
 def compute_config_hash(resource: dict[str, Any]) -> str:
     """Compute a configuration hash on the basis of some other fields.
 
+    If the resource has the hashes of its configuration files (key 'config_files_hashes',
+    see `load_adaptor_information` and `form_manager.transform_form`), the hash
+    combines them, without serialising again the data.
+
     Parameters
     ----------
     resource: dictionary of the resource metadata
     """
+    config_files_hashes = resource.get("config_files_hashes")
+    if config_files_hashes is not None:
+        ret_value = hashlib.md5()
+        for source in CONFIG_HASH_SOURCES:
+            if config_files_hashes.get(source):
+                ret_value.update(f"{source}:{config_files_hashes[source]}".encode())
+        return ret_value.hexdigest()
     source_fields = [
         "constraints_data",
         "mapping",
@@ -129,32 +162,36 @@ def is_resource_to_update(session, resource_folder_paths):
     return False, folders_hash
 
 
-def load_resource_for_object_storage(folder_path: str | pathlib.Path) -> dict[str, Any]:
+def load_resource_for_object_storage(
+    folder_path: str | pathlib.Path | parsed_dataset.ParsedDataset,
+) -> dict[str, Any]:
     """Load absolute paths of files that should be uploaded to the object storage.
 
     Parameters
     ----------
-    folder_path: root folder path where to collect metadata of a resource
+    folder_path: root folder path (or its parsed dataset) where to collect metadata of a resource
 
     Returns
     -------
     dict: dictionary of metadata collected
     """
+    dataset = parsed_dataset.get_parsed_dataset(folder_path)
     metadata = dict()
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        if filename in OBJECT_STORAGE_UPLOAD_FILES and os.path.isfile(file_path):
+    for filename in dataset.file_names():
+        if filename in OBJECT_STORAGE_UPLOAD_FILES:
             db_field_name = OBJECT_STORAGE_UPLOAD_FILES[filename]
-            metadata[db_field_name] = os.path.abspath(file_path)
+            metadata[db_field_name] = os.path.abspath(dataset.path(filename))
     return metadata
 
 
-def load_resource_documentation(folder_path: str | pathlib.Path) -> dict[str, Any]:
+def load_resource_documentation(
+    folder_path: str | pathlib.Path | parsed_dataset.ParsedDataset,
+) -> dict[str, Any]:
     """Load a resource's documentation metadata.
 
     Parameters
     ----------
-    folder_path: root folder path where to collect metadata of a resource
+    folder_path: root folder path (or its parsed dataset) where to collect metadata of a resource
 
     Returns
     -------
@@ -162,21 +199,21 @@ def load_resource_documentation(folder_path: str | pathlib.Path) -> dict[str, An
     """
     metadata: dict[str, Any] = dict()
     metadata["documentation"] = []
-    doc_file_path = os.path.join(folder_path, "documentation.json")
-    if not os.path.isfile(doc_file_path):
+    dataset = parsed_dataset.get_parsed_dataset(folder_path)
+    if not dataset.isfile("documentation.json"):
         return metadata
-    with open(doc_file_path) as fp:
-        data = json.load(fp)
-        metadata["documentation"] = data or []
+    metadata["documentation"] = dataset.load_json("documentation.json") or []
     return metadata
 
 
-def load_adaptor_information(folder_path: str | pathlib.Path) -> dict[str, Any]:
+def load_adaptor_information(
+    folder_path: str | pathlib.Path | parsed_dataset.ParsedDataset,
+) -> dict[str, Any]:
     """Load a resource's adaptor metadata.
 
     Parameters
     ----------
-    folder_path: root folder path where to collect metadata of a resource
+    folder_path: root folder path (or its parsed dataset) where to collect metadata of a resource
 
     Returns
     -------
@@ -188,39 +225,41 @@ def load_adaptor_information(folder_path: str | pathlib.Path) -> dict[str, Any]:
         ("constraints.json", "constraints_data"),
         ("mapping.json", "mapping"),
     ]
+    dataset = parsed_dataset.get_parsed_dataset(folder_path)
     for file_name, db_field in json_files_db_map:
         metadata[db_field] = None
-        file_path = os.path.join(folder_path, file_name)
-        if os.path.isfile(file_path):
-            with open(file_path) as fp:
-                metadata[db_field] = json.load(fp)
+        if dataset.isfile(file_name):
+            metadata[db_field] = dataset.load_json(file_name)
 
     metadata["adaptor"] = None
-    adaptor_code_path = os.path.join(folder_path, "adaptor.py")
-    if os.path.isfile(adaptor_code_path):
-        with open(adaptor_code_path) as fp:
-            metadata["adaptor"] = fp.read()
+    if dataset.isfile("adaptor.py"):
+        metadata["adaptor"] = dataset.read_text("adaptor.py")
+    # used by compute_config_hash
+    metadata["config_files_hashes"] = {
+        file_name: dataset.file_hash(file_name) for file_name, _ in json_files_db_map
+    }
     return metadata
 
 
-def load_fulltext(folder_path: str | pathlib.Path) -> dict[str, Any]:
+def load_fulltext(
+    folder_path: str | pathlib.Path | parsed_dataset.ParsedDataset,
+) -> dict[str, Any]:
     """Find a file `fulltext.txt` in order to populate the field `fulltext`.
 
     Parameters
     ----------
-    folder_path: root folder path where to collect metadata of a resource
+    folder_path: root folder path (or its parsed dataset) where to collect metadata of a resource
 
     Returns
     -------
     dict: dictionary of metadata collected
     """
     metadata: dict[str, Any] = dict()
-    fulltext_path = os.path.join(folder_path, "fulltext.txt")
     metadata["fulltext"] = None
-    if not os.path.isfile(fulltext_path):
+    dataset = parsed_dataset.get_parsed_dataset(folder_path)
+    if not dataset.isfile("fulltext.txt"):
         return metadata
-    with open(fulltext_path) as fp:
-        lines = [r.strip() for r in fp.readlines()]
+    lines = [r.strip() for r in dataset.read_text("fulltext.txt").splitlines()]
 
     # some normalizations
     chars_to_remove = [",", ".", ";", "(", ")"]
@@ -233,24 +272,25 @@ def load_fulltext(folder_path: str | pathlib.Path) -> dict[str, Any]:
     return metadata
 
 
-def load_resource_metadata_file(folder_path: str | pathlib.Path) -> dict[str, Any]:
+def load_resource_metadata_file(
+    folder_path: str | pathlib.Path | parsed_dataset.ParsedDataset,
+) -> dict[str, Any]:
     """Load a resource's metadata from the metadata.json file.
 
     Parameters
     ----------
-    folder_path: root folder path where to collect metadata of a resource
+    folder_path: root folder path (or its parsed dataset) where to collect metadata of a resource
 
     Returns
     -------
     dict: dictionary of metadata collected
     """
     metadata: dict[str, Any] = dict()
-    metadata_file_path = os.path.join(folder_path, "metadata.json")
-    if not os.path.isfile(metadata_file_path):
+    dataset = parsed_dataset.get_parsed_dataset(folder_path)
+    if not dataset.isfile("metadata.json"):
         # some fields are required
-        raise ValueError("'metadata.json' not found in %r" % folder_path)
-    with open(metadata_file_path) as fp:
-        data = json.load(fp)
+        raise ValueError("'metadata.json' not found in %r" % dataset.folder_path)
+    data = dataset.load_json("metadata.json")
 
     metadata["abstract"] = utils.normalize_abstract(data["abstract"])  # required
     metadata["api_enforce_constraints"] = data.get("api_enforce_constraints", False)
@@ -448,12 +488,14 @@ def parse_override_md(override_path: str | pathlib.Path | None) -> dict[str, Any
     return ret_value
 
 
-def load_resource_variables(folder_path: str | pathlib.Path) -> dict[str, Any]:
+def load_resource_variables(
+    folder_path: str | pathlib.Path | parsed_dataset.ParsedDataset,
+) -> dict[str, Any]:
     """Load a resource's variables metadata.
 
     Parameters
     ----------
-    folder_path: root folder path where to collect metadata of a resource
+    folder_path: root folder path (or its parsed dataset) where to collect metadata of a resource
 
     Returns
     -------
@@ -461,11 +503,10 @@ def load_resource_variables(folder_path: str | pathlib.Path) -> dict[str, Any]:
     """
     metadata: dict[str, Any] = dict()
     metadata["variables"] = []
-    variables_file_path = os.path.join(folder_path, "variables.json")
-    if not os.path.isfile(variables_file_path):
+    dataset = parsed_dataset.get_parsed_dataset(folder_path)
+    if not dataset.isfile("variables.json"):
         return metadata
-    with open(variables_file_path) as fp:
-        variables_data = json.load(fp)
+    variables_data = dataset.load_json("variables.json")
     variables: list[dict[str, str]] = []
     for variable_name, properties in variables_data.items():
         variable_item = {
@@ -478,12 +519,14 @@ def load_resource_variables(folder_path: str | pathlib.Path) -> dict[str, Any]:
     return metadata
 
 
-def load_sanity_check_conf(folder_path: str | pathlib.Path) -> dict[str, Any]:
+def load_sanity_check_conf(
+    folder_path: str | pathlib.Path | parsed_dataset.ParsedDataset,
+) -> dict[str, Any]:
     """Load a resource's configuration for sanity check.
 
     Parameters
     ----------
-    folder_path: root folder path where to collect metadata of a resource
+    folder_path: root folder path (or its parsed dataset) where to collect metadata of a resource
 
     Returns
     -------
@@ -491,23 +534,23 @@ def load_sanity_check_conf(folder_path: str | pathlib.Path) -> dict[str, Any]:
     """
     metadata: dict[str, Any] = dict()
     metadata["sanity_check_conf"] = None
-    sanity_check_conf_file_path = os.path.join(folder_path, "requests.yaml")
-    if not os.path.isfile(sanity_check_conf_file_path):
+    dataset = parsed_dataset.get_parsed_dataset(folder_path)
+    sanity_check_conf_file_path = dataset.path("requests.yaml")
+    if not dataset.isfile("requests.yaml"):
+        return metadata
+    try:
+        data = dataset.load_yaml("requests.yaml")
+    except Exception:  # noqa
+        logger.exception(
+            f"sanity check conf file {sanity_check_conf_file_path} is not a valid YAML"
+        )
         return metadata
-    with open(sanity_check_conf_file_path) as fp:
-        try:
-            data = yaml.safe_load(fp.read())
-        except Exception:  # noqa
-            logger.exception(
-                f"sanity check conf file {sanity_check_conf_file_path} is not a valid YAML"
-            )
-            return metadata
     if data is None:
         logger.warning(f"sanity check conf file {sanity_check_conf_file_path} is empty")
         return metadata
     try:
         for request in data:
-            assert request["collection_id"] == os.path.basename(folder_path)
+            assert request["collection_id"] == os.path.basename(dataset.folder_path)
     except (IndexError, KeyError, AssertionError):
         logger.exception(
             f"sanity check conf file {sanity_check_conf_file_path} has not valid format"
@@ -518,7 +561,9 @@ def load_sanity_check_conf(folder_path: str | pathlib.Path) -> dict[str, Any]:
 
 
 def load_resource_from_folder(
-    folder_path: str | pathlib.Path, override_md: dict[str, Any] | None = None
+    folder_path: str | pathlib.Path,
+    override_md: dict[str, Any] | None = None,
+    dataset: parsed_dataset.ParsedDataset | None = None,
 ) -> dict[str, Any]:
     """Load metadata of a resource from an input folder.
 
@@ -526,6 +571,7 @@ def load_resource_from_folder(
     ----------
     folder_path: folder path where to collect metadata of a resource
     override_md: dictionary of resource metadata to override
+    dataset: parsed dataset of the folder, if already built (i.e. for validation)
 
     Returns
     -------
@@ -534,14 +580,10 @@ def load_resource_from_folder(
     if override_md is None:
         override_md = dict()
     metadata: dict[str, Any] = dict()
-    folder_path = str(folder_path).rstrip(os.sep)
-    metadata["resource_uid"] = os.path.basename(folder_path)
     # NOTE: folder to consider is the one containing metadata.json
-    json_folder = os.path.join(folder_path, "json-config")
-    if os.path.isdir(json_folder) and os.path.isfile(
-        os.path.join(json_folder, "metadata.json")
-    ):
-        folder_path = json_folder
+    if dataset is None:
+        dataset = parsed_dataset.ParsedDataset.from_dataset_folder(folder_path)
+    metadata["resource_uid"] = dataset.resource_uid
     loader_functions = [
         load_resource_for_object_storage,
         load_fulltext,
@@ -552,18 +594,185 @@ def load_resource_from_folder(
         load_sanity_check_conf,
     ]
     for loader_function in loader_functions:
-        metadata.update(loader_function(folder_path))
+        metadata.update(loader_function(dataset))
     metadata.update(override_md)
     return metadata
 
 
-def resource_sync(
+def adaptor_has_costing(adaptor_configuration: Any) -> bool:
+    """
+    Return True if costing is defined in the adaptor configuration.
+
+    It follows the semantics of the jsonb `?` operator on the top-level keys.
+
+    Parameters
+    ----------
+    adaptor_configuration: the loaded content of adaptor.json
+
+    Returns
+    -------
+    bool: True if 'costing' is defined
+    """
+    if isinstance(adaptor_configuration, (dict, list)):
+        return "costing" in adaptor_configuration
+    return adaptor_configuration == "costing"
+
+
+def resource_data_hashes(
+    resource_data_attrs: dict[str, Any],
+    known_hashes: dict[str, str | None] | None = None,
+) -> Dict[str, str]:
+    """Return the md5 of the hashed fields of a resource_data record.
+
+    Parameters
+    ----------
+    resource_data_attrs: values of the fields of the resource_data record
+    known_hashes: hashes of (not null) fields already computed, i.e. from the source files
+
+    Returns
+    -------
+    dict: field name -> md5 of the value
+    """
+    known_hashes = known_hashes or dict()
+    data_hashes = dict()
+    for field in RESOURCE_DATA_HASHED_FIELDS:
+        value = resource_data_attrs.get(field)
+        known_hash = known_hashes.get(field)
+        if value is None or known_hash is None:
+            known_hash = utils.data2hash(value)
+        data_hashes[field] = known_hash
+    return data_hashes
+
+
+def upsert_resources_data(
+    session: sa.orm.session.Session,
+    resources_data: List[Tuple[dict[str, Any], dict[str, str | None] | None]],
+) -> Dict[str, List[str]]:
+    """Insert or update resource_data records, rewriting only the fields changed.
+
+    Fields are compared by the md5 stored in `data_hashes`, so unchanged (and usually
+    big) JSONB values are not rewritten. Records with the same fields changed are
+    written with one multi-row statement.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resources_data: list of (values of the fields of the resource_data record,
+        hashes of fields already computed)
+
+    Returns
+    -------
+    dict: resource uid -> names of the fields written
+    """
+    table = database.ResourceData.__table__
+    # the ORM column in the where clause makes the session flush before the select
+    stored_hashes: Dict[str, Dict[str, str] | None] = dict(
+        session.execute(
+            sa.select(table.c.resource_uid, table.c.data_hashes).where(
+                database.ResourceData.resource_uid.in_(
+                    [attrs["resource_uid"] for attrs, _ in resources_data]
+                )
+            )
+        )
+        .tuples()
+        .all()
+    )
+    changed_fields = dict()
+    rows_by_changes = collections.defaultdict(list)
+    for resource_data_attrs, known_hashes in resources_data:
+        resource_uid = resource_data_attrs["resource_uid"]
+        data_hashes = resource_data_hashes(resource_data_attrs, known_hashes)
+        stored = stored_hashes.get(resource_uid) or dict()
+        changed = tuple(
+            field
+            for field in RESOURCE_DATA_HASHED_FIELDS
+            if stored.get(field) != data_hashes[field]
+        )
+        changed_fields[resource_uid] = list(changed)
+        if changed:
+            rows_by_changes[changed].append(
+                dict(resource_data_attrs, data_hashes=data_hashes)
+            )
+    for changed, rows in rows_by_changes.items():
+        insert_stmt = insert(table)
+        do_update_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=["resource_uid"],
+            set_={f: insert_stmt.excluded[f] for f in changed + ("data_hashes",)},
+        )
+        session.execute(do_update_stmt, rows)
+    return changed_fields
+
+
+def upsert_resource_data(
+    session: sa.orm.session.Session,
+    resource_data_attrs: dict[str, Any],
+    known_hashes: dict[str, str | None] | None = None,
+) -> List[str]:
+    """Insert or update the resource_data record, rewriting only the fields changed.
+
+    Fields are compared by the md5 stored in `data_hashes`, so unchanged (and usually
+    big) JSONB values are not rewritten.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resource_data_attrs: values of the fields of the resource_data record
+    known_hashes: hashes of (not null) fields already computed, i.e. from the source files
+
+    Returns
+    -------
+    list: names of the fields written
+    """
+    changed_fields = upsert_resources_data(
+        session, [(resource_data_attrs, known_hashes)]
+    )
+    return changed_fields[resource_data_attrs["resource_uid"]]
+
+
+def compute_row_fingerprint(
+    dataset: dict[str, Any],
+    licences: List[Tuple[str, int]],
+    facets: List[str],
+) -> str:
+    """Return the hash of the fields of a resource record and of its relationships.
+
+    The field 'sources_hash' is not considered: a change of the source files
+    not changing the record does not need a rewrite.
+
+    Parameters
+    ----------
+    dataset: fields of the resource record
+    licences: list of (licence_uid, licence_id) of the licences of the resource
+    facets: list of the facet names of the resource
+
+    Returns
+    -------
+    str: the MD5 hex digest
+    """
+    fields = {
+        k: v for k, v in dataset.items() if k not in ("sources_hash", "row_fingerprint")
+    }
+    return utils.data2hash(
+        {
+            "fields": fields,
+            "licences": [list(licence) for licence in licences],
+            "facets": sorted(set(facets)),
+        }
+    )
+
+
+def prepare_resource_sync(
     session: sa.orm.session.Session,
     resource: dict[str, Any],
     storage_settings: config.ObjectStorageSettings,
-) -> database.Resource:
+) -> dict[str, Any]:
     """
-    Compare db record and file of a resource and make them the same.
+    Prepare the sync of a resource in the db: everything but writing the db records.
+
+    Licences are looked up in the db, files are uploaded to the object storage
+    and the row fingerprint is computed.
+    The hashes in resource["config_files_hashes"] are trusted to describe the
+    configuration data loaded: remove them if the data are modified after loading.
 
     Parameters
     ----------
@@ -573,23 +782,27 @@ def resource_sync(
 
     Returns
     -------
-    The created/updated db resource
+    dict: 'resource' (fields of the resources record), 'resource_data' (fields of the
+        resource_data record), 'known_hashes' (hashes of resource_data fields),
+        'licence_ids' and 'facets' (names of the facets) of the resource
     """
     dataset = resource.copy()
+    config_files_hashes = dataset.pop("config_files_hashes", None) or dict()
     licence_uids = dataset.pop("licence_uids", [])
     facets = dataset.pop("facets", [])
 
-    db_licences = dict()
+    # ids of the last revisions of the licences
+    licence_ids: List[int] = []
     for licence_uid in licence_uids:
-        licence_obj = session.scalars(
-            sa.select(database.Licence)
+        licence_id = session.scalars(
+            sa.select(database.Licence.licence_id)
             .filter_by(licence_uid=licence_uid)
             .order_by(database.Licence.revision.desc())
             .limit(1)
         ).first()
-        if not licence_obj:
+        if licence_id is None:
             raise ValueError("licence_uid = %r not found" % licence_uid)
-        db_licences[licence_uid] = licence_obj
+        licence_ids.append(licence_id)
 
     subpath = os.path.join("resources", dataset["resource_uid"])
     for _, db_field in OBJECT_STORAGE_UPLOAD_FILES.items():
@@ -611,42 +824,292 @@ def resource_sync(
         "mapping": dataset.pop("mapping"),
         "resource_uid": dataset["resource_uid"],
     }
-    # implementing upsert of resource
-    insert_stmt = insert(database.Resource).values(**dataset)
-    do_update_stmt = insert_stmt.on_conflict_do_update(
-        index_elements=["resource_uid"], set_=dataset
-    ).returning(database.Resource)
-    dataset_obj = session.scalars(
-        do_update_stmt, execution_options={"populate_existing": True}
+    dataset["has_adaptor_costing"] = adaptor_has_costing(
+        resource_data_attrs["adaptor_configuration"]
+    )
+    dataset["row_fingerprint"] = compute_row_fingerprint(
+        dataset, list(zip(licence_uids, licence_ids)), facets
+    )
+    if compression.is_compression_enabled():
+        resource_data_attrs.update(
+            compression.compress_constraints(
+                session, resource_data_attrs["constraints_data"]
+            )
+        )
+    else:
+        resource_data_attrs.update(
+            compression.uncompressed_constraints(
+                resource_data_attrs["constraints_data"]
+            )
+        )
+    known_hashes = {
+        "adaptor_configuration": config_files_hashes.get("adaptor.json"),
+        "constraints_data": config_files_hashes.get("constraints.json"),
+        "mapping": config_files_hashes.get("mapping.json"),
+    }
+    if config_files_hashes.get("form.json"):
+        known_hashes["form_data"] = utils.data2hash(
+            [
+                config_files_hashes["form.json"],
+                config_files_hashes.get("form licences block"),
+            ]
+        )
+    return {
+        "resource": dataset,
+        "resource_data": resource_data_attrs,
+        "known_hashes": known_hashes,
+        "licence_ids": licence_ids,
+        "facets": sorted(set(facets)),
+    }
+
+
+def write_prepared_resources(
+    session: sa.orm.session.Session,
+    prepared_resources: List[dict[str, Any]],
+    rewrite_unchanged: bool = False,
+) -> List[str]:
+    """
+    Write in the db the records of resources prepared by `prepare_resource_sync`.
+
+    Records of all the resources are written with multi-row statements.
+    The upsert of a resource record and the rewrite of its licences and facets are
+    skipped if the row fingerprint is not changed (also in force mode), unless
+    `rewrite_unchanged` is True (i.e. to repair a db record modified elsewhere).
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    prepared_resources: list of resources prepared by `prepare_resource_sync`
+    rewrite_unchanged: if True, rewrite the resource records even if their fingerprint
+        is not changed
+
+    Returns
+    -------
+    list: uids of the resources whose record has been rewritten
+    """
+    table = database.Resource.__table__
+    db_rows = {
+        row.resource_uid: row
+        for row in session.execute(
+            sa.select(
+                database.Resource.resource_uid,
+                database.Resource.row_fingerprint,
+                database.Resource.sources_hash,
+            ).where(
+                database.Resource.resource_uid.in_(
+                    [p["resource"]["resource_uid"] for p in prepared_resources]
+                )
+            )
+        )
+    }
+    to_write = []
+    new_sources_hashes = []
+    for prepared in prepared_resources:
+        dataset = prepared["resource"]
+        db_row = db_rows.get(dataset["resource_uid"])
+        if (
+            rewrite_unchanged
+            or db_row is None
+            or db_row.row_fingerprint != dataset["row_fingerprint"]
+        ):
+            to_write.append(prepared)
+            continue
+        logger.info("resource '%s' not changed: skip upsert" % dataset["resource_uid"])
+        sources_hash = dataset.get("sources_hash")
+        if sources_hash is not None and db_row.sources_hash != sources_hash:
+            new_sources_hashes.append(
+                {
+                    "b_resource_uid": dataset["resource_uid"],
+                    "b_sources_hash": sources_hash,
+                }
+            )
+    if new_sources_hashes:
+        session.execute(
+            sa.update(table)
+            .where(table.c.resource_uid == sa.bindparam("b_resource_uid"))
+            .values(sources_hash=sa.bindparam("b_sources_hash")),
+            new_sources_hashes,
+        )
+    # implementing upsert of resources, a statement for each set of fields
+    resource_ids: Dict[str, int] = dict()
+    rows_by_fields = collections.defaultdict(list)
+    for prepared in to_write:
+        rows_by_fields[tuple(sorted(prepared["resource"]))].append(prepared["resource"])
+    for fields, rows in rows_by_fields.items():
+        insert_stmt = insert(table)
+        do_update_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=["resource_uid"],
+            set_={f: insert_stmt.excluded[f] for f in fields},
+        ).returning(table.c.resource_uid, table.c.resource_id)
+        resource_ids.update(session.execute(do_update_stmt, rows).tuples().all())
+    upsert_resources_data(
+        session, [(p["resource_data"], p["known_hashes"]) for p in prepared_resources]
+    )
+    if to_write:
+        write_resources_relationships(session, to_write, resource_ids)
+    # objects already loaded must reflect the changes
+    session.expire_all()
+    return [p["resource"]["resource_uid"] for p in to_write]
+
+
+def write_resources_relationships(
+    session: sa.orm.session.Session,
+    prepared_resources: List[dict[str, Any]],
+    resource_ids: Dict[str, int],
+) -> None:
+    """
+    Rewrite licences and facets of resources prepared by `prepare_resource_sync`.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    prepared_resources: list of resources prepared by `prepare_resource_sync`
+    resource_ids: resource uid -> resource id of the resources
+    """
+    ids = [resource_ids[p["resource"]["resource_uid"]] for p in prepared_resources]
+    for model in (database.ResourceLicence, database.ResourceFacet):
+        session.execute(
+            sa.delete(model).where(model.resource_id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+    licence_rows = [
+        {"resource_id": resource_id, "licence_id": licence_id}
+        for resource_id, prepared in zip(ids, prepared_resources)
+        for licence_id in dict.fromkeys(prepared["licence_ids"])
+    ]
+    if licence_rows:
+        session.execute(sa.insert(database.ResourceLicence.__table__), licence_rows)
+
+    # build again related facets, creating the ones not existing
+    facet_names = sorted({f for p in prepared_resources for f in p["facets"]})
+    facet_table = database.Facet.__table__
+    facet_ids: Dict[str, int] = dict()
+    for facet_name, facet_id in session.execute(
+        sa.select(facet_table.c.facet_name, facet_table.c.facet_id)
+        .where(facet_table.c.facet_name.in_(facet_names))
+        .order_by(facet_table.c.facet_id)
+    ):
+        facet_ids.setdefault(facet_name, facet_id)
+    new_facets = []
+    for facet_name in facet_names:
+        if facet_name in facet_ids:
+            continue
+        category_name, category_value = [r.strip() for r in facet_name.split(":")]
+        new_facets.append(
+            {
+                "category_name": category_name,
+                "category_value": category_value,
+                "facet_name": facet_name,
+            }
+        )
+    if new_facets:
+        facet_ids.update(
+            session.execute(
+                sa.insert(facet_table).returning(
+                    facet_table.c.facet_name, facet_table.c.facet_id
+                ),
+                new_facets,
+            )
+            .tuples()
+            .all()
+        )
+    facet_rows = [
+        {"resource_id": resource_id, "facet_id": facet_ids[facet_name]}
+        for resource_id, prepared in zip(ids, prepared_resources)
+        for facet_name in prepared["facets"]
+    ]
+    if facet_rows:
+        session.execute(sa.insert(database.ResourceFacet.__table__), facet_rows)
+
+
+def resource_sync(
+    session: sa.orm.session.Session,
+    resource: dict[str, Any],
+    storage_settings: config.ObjectStorageSettings,
+    rewrite_unchanged: bool = False,
+) -> database.Resource:
+    """
+    Compare db record and file of a resource and make them the same.
+
+    The hashes in resource["config_files_hashes"] are trusted to describe the
+    configuration data loaded: remove them if the data are modified after loading.
+    The upsert of the resource record and the rewrite of its licences and facets are
+    skipped if the row fingerprint (see `compute_row_fingerprint`) is not changed,
+    unless `rewrite_unchanged` is True (i.e. to repair a db record modified elsewhere).
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resource: metadata of a loaded resource from files
+    storage_settings: object with settings to access the object storage
+    rewrite_unchanged: if True, rewrite the resource record even if its fingerprint
+        is not changed
+
+    Returns
+    -------
+    The created/updated db resource
+    """
+    prepared = prepare_resource_sync(session, resource, storage_settings)
+    write_prepared_resources(session, [prepared], rewrite_unchanged=rewrite_unchanged)
+    return session.scalars(
+        sa.select(database.Resource).filter_by(
+            resource_uid=prepared["resource"]["resource_uid"]
+        )
     ).one()
-    # implementing upsert of resource_data
-    insert_stmt = insert(database.ResourceData).values(**resource_data_attrs)
-    do_update_stmt = insert_stmt.on_conflict_do_update(
-        index_elements=["resource_uid"], set_=resource_data_attrs
-    )  # type: ignore
-    session.execute(do_update_stmt, execution_options={"populate_existing": True}).all()
-
-    dataset_obj.licences = []  # type: ignore
-    for licence_uid in licence_uids:
-        dataset_obj.licences.append(db_licences[licence_uid])
-
-    # build again related facets
-    dataset_obj.facets = []  # type: ignore
-    for facet in set(facets):
-        category_name, category_value = [r.strip() for r in facet.split(":")]
-        facet_md = {
-            "category_name": category_name,
-            "category_value": category_value,
-            "facet_name": facet,
-        }
-        facet_obj = session.scalars(
-            sa.select(database.Facet).filter_by(**facet_md).limit(1)
-        ).first()
-        if not facet_obj:
-            facet_obj = database.Facet(**facet_md)
-        dataset_obj.facets.append(facet_obj)
 
-    return dataset_obj
+
+def resources_sync_batch(
+    session: sa.orm.session.Session,
+    prepared_resources: List[dict[str, Any]],
+    rewrite_unchanged: bool = False,
+) -> List[str]:
+    """
+    Write in the db a batch of resources prepared by `prepare_resource_sync`.
+
+    The batch is written with multi-row statements inside a savepoint. If that fails,
+    each resource is written inside its own savepoint, so that a failing resource
+    does not prevent the sync of the others.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    prepared_resources: list of resources prepared by `prepare_resource_sync`
+    rewrite_unchanged: if True, rewrite the resource records even if their fingerprint
+        is not changed
+
+    Returns
+    -------
+    list: uids of the resources synced
+    """
+    resource_uids = [p["resource"]["resource_uid"] for p in prepared_resources]
+    try:
+        with session.begin_nested():
+            write_prepared_resources(
+                session, prepared_resources, rewrite_unchanged=rewrite_unchanged
+            )
+    except Exception:  # noqa
+        logger.warning(
+            "db sync of a batch of %i resources failed: syncing them one by one"
+            % len(prepared_resources)
+        )
+    else:
+        for resource_uid in resource_uids:
+            logger.info("resource '%s' db sync successful" % resource_uid)
+        return resource_uids
+    synced_uids = []
+    for resource_uid, prepared in zip(resource_uids, prepared_resources):
+        try:
+            with session.begin_nested():
+                write_prepared_resources(
+                    session, [prepared], rewrite_unchanged=rewrite_unchanged
+                )
+            logger.info("resource '%s' db sync successful" % resource_uid)
+            synced_uids.append(resource_uid)
+        except Exception:  # noqa
+            logger.exception(
+                "db sync for resource '%s' failed, error follows" % resource_uid
+            )
+    return synced_uids
 
 
 def find_related_resources(
@@ -714,7 +1177,11 @@ def update_related_resources(session: sa.orm.session.Session):
 
     """
     # could be quite slow
-    all_datasets = session.scalars(sa.select(database.Resource)).all()
+    all_datasets = session.scalars(
+        sa.select(database.Resource).options(
+            *database.resource_loader_options("manager-graph")
+        )
+    ).all()
     # clean related_resources
     for dataset_obj in all_datasets:
         dataset_obj.related_resources = []
@@ -809,6 +1276,171 @@ def normalize_delete_orphans(
     return delete_orphans
 
 
+def log_validation_report(report: Dict[str, Any]) -> None:
+    """Log warnings and errors of the validation report of a resource.
+
+    Parameters
+    ----------
+    report: the report of the validation (see `validations.validate_dataset_report`)
+    """
+    resource_uid = report["resource_uid"]
+    for validator_report in report["validators"]:
+        for message in validator_report["messages"]:
+            log = logger.error if message["level"] == "error" else logger.warning
+            log(
+                f"validation of '{resource_uid}' ({validator_report['validator']}): "
+                f"{message['message']}"
+            )
+    if report["errors"]:
+        logger.error(
+            f"validation of '{resource_uid}' found {report['errors']} errors: "
+            "the resource is loaded anyway"
+        )
+
+
+def load_resource_to_sync(
+    session: sa.orm.session.Session,
+    resource_folder_path: str,
+    cim_folder_path: str | pathlib.Path,
+    storage_settings: config.ObjectStorageSettings,
+    override_md: dict[str, Any],
+    sources_hash: str,
+    validate: bool = False,
+) -> dict[str, Any]:
+    """
+    Load the metadata of a resource from its folder, ready for `resource_sync`.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resource_folder_path: folder path where to read metadata files of the resource
+    cim_folder_path: the folder path containing CIM generated Quality Assessment layouts
+    storage_settings: object with settings to access the object storage
+    override_md: override metadata of the resource
+    sources_hash: hash of the input folders of the resource
+    validate: if True, validate the input files of the resource and log the
+        problems found (reusing the files already read to load the resource)
+
+    Returns
+    -------
+    dict: metadata of the resource
+    """
+    resource_uid = os.path.basename(resource_folder_path.rstrip(os.sep))
+    dataset = parsed_dataset.ParsedDataset.from_dataset_folder(resource_folder_path)
+    if validate:
+        log_validation_report(
+            validations.validate_dataset_report(dataset, loglevel="warning")
+        )
+    resource = load_resource_from_folder(
+        resource_folder_path, override_md, dataset=dataset
+    )
+    resource["sources_hash"] = sources_hash
+    logger.info("resource '%s' loaded successful" % resource_uid)
+    resource = layout_manager.transform_layout(
+        session,
+        resource_folder_path,
+        cim_folder_path,
+        resource,
+        storage_settings,
+    )
+    resource = form_manager.transform_form(
+        session, resource_folder_path, resource, storage_settings
+    )
+    resource["adaptor_properties_hash"] = compute_config_hash(resource)
+    return resource
+
+
+def select_resource_folders(
+    resources_folder_path: str | pathlib.Path,
+    include: List[str] = [],
+    exclude: List[str] = [],
+) -> set[str]:
+    """
+    Return the folders of the resources inside a root folder, filtered by uid.
+
+    Parameters
+    ----------
+    resources_folder_path: path to the root folder containing metadata files for resources
+    include: list of include patterns for the resource uids
+    exclude: list of exclude patterns for the resource uids
+
+    Returns
+    -------
+    set: paths of the folders of the resources
+    """
+    folders = set(glob.glob(os.path.join(resources_folder_path, "*/")))
+    if include:
+        folders = set()
+        for pattern in include:
+            matched = set(glob.glob(os.path.join(resources_folder_path, f"{pattern}/")))
+            folders |= matched
+    if exclude:
+        for pattern in exclude:
+            matched = set(glob.glob(os.path.join(resources_folder_path, f"{pattern}/")))
+            folders -= matched
+    return folders
+
+
+def get_licence_related_uids(
+    session: sa.orm.session.Session, licence_uids: List[str]
+) -> set[str]:
+    """Return the uids of the resources related to some licences."""
+    if not licence_uids:
+        return set()
+    return set(
+        session.scalars(
+            sa.select(database.Resource.resource_uid)
+            .join(database.Resource.licences)
+            .where(database.Licence.licence_uid.in_(licence_uids))
+        )
+    )
+
+
+def estimate_resources_updates(
+    session: sa.orm.session.Session,
+    resources_folder_paths: List[str] | List[pathlib.Path],
+    force: bool = False,
+    include: List[str] = [],
+    exclude: List[str] = [],
+    changed_licence_uids: List[str] = [],
+) -> int:
+    """
+    Return the number of resources that an update will write, at least.
+
+    Without `force`, resources are counted if not in the db (or never updated from
+    their sources) or related to changed licences: changes of the sources are not
+    considered, since detecting them means to read all the files.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    resources_folder_paths: paths to the root folder containing metadata files for resources
+    force: if True, all the resources are updated
+    include: list of include patterns for the resource uids
+    exclude: list of exclude patterns for the resource uids
+    changed_licence_uids: uids of licences changed: the related datasets are updated anyway
+
+    Returns
+    -------
+    int: number of resources to write
+    """
+    resource_uids = set()
+    for resources_folder_path in resources_folder_paths:
+        for folder in select_resource_folders(resources_folder_path, include, exclude):
+            resource_uids.add(os.path.basename(folder.rstrip(os.sep)))
+    if force:
+        return len(resource_uids)
+    hashed_uids = set(
+        session.scalars(
+            sa.select(database.Resource.resource_uid).where(
+                database.Resource.sources_hash.is_not(None)
+            )
+        )
+    )
+    licence_related_uids = get_licence_related_uids(session, changed_licence_uids)
+    return len((resource_uids - hashed_uids) | (resource_uids & licence_related_uids))
+
+
 def update_catalogue_resources_single_folder(
     session: sa.orm.session.Session,
     resources_folder_path: str | pathlib.Path,
@@ -818,6 +1450,10 @@ def update_catalogue_resources_single_folder(
     include: List[str] = [],
     exclude: List[str] = [],
     override_md: dict[str, Any] = {},
+    changed_licence_uids: List[str] = [],
+    validate: bool = False,
+    batch_size: int = 0,
+    rewrite_unchanged: bool = False,
 ) -> List[str]:
     """
     Load metadata of resources from files of a single input folder and sync each resource in the db.
@@ -832,24 +1468,24 @@ def update_catalogue_resources_single_folder(
     include: list of include patterns for the resource uids
     exclude: list of exclude patterns for the resource uids
     override_md: dictionary of override metadata for resources
+    changed_licence_uids: uids of licences changed: the related datasets are updated anyway
+    validate: if True, validate the input files of each resource updated and log the
+        problems found (reusing the files already read to load the resource)
+    batch_size: if greater than 0, write the resources in the db in batches of this
+        size, with multi-row statements (see `resources_sync_batch`)
+    rewrite_unchanged: if True, rewrite the resource records updated even if their
+        fingerprint is not changed (see `write_prepared_resources`)
 
     Returns
     -------
     list: list of resource uids involved
     """
     involved_resource_uids = []
-    # filtering resource uids
-    folders = set(glob.glob(os.path.join(resources_folder_path, "*/")))
-    if include:
-        folders = set()
-        for pattern in include:
-            matched = set(glob.glob(os.path.join(resources_folder_path, f"{pattern}/")))
-            folders |= matched
-    if exclude:
-        for pattern in exclude:
-            matched = set(glob.glob(os.path.join(resources_folder_path, f"{pattern}/")))
-            folders -= matched
+    folders = select_resource_folders(resources_folder_path, include, exclude)
+    # datasets related to changed licences must be updated
+    licence_related_uids = get_licence_related_uids(session, changed_licence_uids)
 
+    prepared_resources: List[dict[str, Any]] = []
     for resource_folder_path in sorted(folders):
         resource_uid = os.path.basename(resource_folder_path.rstrip(os.sep))
         dataset_override_md = override_md.get(resource_uid, dict())
@@ -866,33 +1502,50 @@ def update_catalogue_resources_single_folder(
                 to_update, sources_hash = is_resource_to_update(
                     session, folders_to_consider_for_hash
                 )
-                if not to_update and not force:
+                if (
+                    not to_update
+                    and not force
+                    and resource_uid not in licence_related_uids
+                ):
                     logger.info(
                         "skip updating of '%s': no change detected" % resource_uid
                     )
                     continue
-                resource = load_resource_from_folder(
-                    resource_folder_path, dataset_override_md
-                )
-                resource["sources_hash"] = sources_hash
-                logger.info("resource '%s' loaded successful" % resource_uid)
-                resource = layout_manager.transform_layout(
+                resource = load_resource_to_sync(
                     session,
                     resource_folder_path,
                     cim_folder_path,
-                    resource,
                     storage_settings,
+                    dataset_override_md,
+                    sources_hash,
+                    validate=validate,
                 )
-                resource = form_manager.transform_form(
-                    session, resource_folder_path, resource, storage_settings
-                )
-                resource["adaptor_properties_hash"] = compute_config_hash(resource)
-                resource_sync(session, resource, storage_settings)
-            logger.info("resource '%s' db sync successful" % resource_uid)
+                if batch_size > 0:
+                    prepared_resources.append(
+                        prepare_resource_sync(session, resource, storage_settings)
+                    )
+                else:
+                    resource_sync(
+                        session,
+                        resource,
+                        storage_settings,
+                        rewrite_unchanged=rewrite_unchanged,
+                    )
+            if batch_size <= 0:
+                logger.info("resource '%s' db sync successful" % resource_uid)
         except Exception:  # noqa
             logger.exception(
                 "db sync for resource '%s' failed, error follows" % resource_uid
             )
+        if batch_size > 0 and len(prepared_resources) >= batch_size:
+            resources_sync_batch(
+                session, prepared_resources, rewrite_unchanged=rewrite_unchanged
+            )
+            prepared_resources = []
+    if prepared_resources:
+        resources_sync_batch(
+            session, prepared_resources, rewrite_unchanged=rewrite_unchanged
+        )
     return involved_resource_uids
 
 
@@ -905,10 +1558,17 @@ def update_catalogue_resources(
     include: List[str] = [],
     exclude: List[str] = [],
     override_md: dict[str, Any] = {},
+    changed_licence_uids: List[str] = [],
+    validate: bool = False,
+    batch_size: int = 0,
+    rewrite_unchanged: bool = False,
 ) -> List[str]:
     """
     Load metadata of resources from files and sync each resource in the db.
 
+    If many resources are going to be written (see `maintenance.is_bulk_update`), the
+    maintenance of the GIN indexes is deferred at the end of the run.
+
     Parameters
     ----------
     session: opened SQLAlchemy session
@@ -919,12 +1579,25 @@ def update_catalogue_resources(
     include: list of include patterns for the resource uids
     exclude: list of exclude patterns for the resource uids
     override_md: dictionary of override metadata for resources
+    changed_licence_uids: uids of licences changed: the related datasets are updated anyway
+    validate: if True, validate the input files of each resource updated and log the
+        problems found (reusing the files already read to load the resource)
+    batch_size: if greater than 0, write the resources in the db in batches of this
+        size, with multi-row statements (see `resources_sync_batch`)
+    rewrite_unchanged: if True, rewrite the resource records updated even if their
+        fingerprint is not changed (see `write_prepared_resources`)
 
     Returns
     -------
     list: list of resource uids involved
     """
     involved_resource_uids = []
+    expected_updates = estimate_resources_updates(
+        session, resources_folder_paths, force, include, exclude, changed_licence_uids
+    )
+    gin_bulk_update = maintenance.is_bulk_update(session, expected_updates)
+    if gin_bulk_update:
+        maintenance.defer_gin_maintenance(session)
     for resources_folder_path in resources_folder_paths:
         new_involved = update_catalogue_resources_single_folder(
             session,
@@ -935,8 +1608,14 @@ def update_catalogue_resources(
             include,
             exclude,
             override_md,
+            changed_licence_uids,
+            validate,
+            batch_size,
+            rewrite_unchanged,
         )
         involved_resource_uids += new_involved
+    if gin_bulk_update:
+        maintenance.clean_gin_pending_lists(session)
     return involved_resource_uids
 
 
@@ -949,20 +1628,7 @@ def remove_datasets(session: sa.orm.session.Session, keep_resource_uids: List[st
     session: opened SQLAlchemy session
     keep_resource_uids: list of uids of resources to save
     """
-    # remote not involved resources from the db
-    datasets_to_delete = session.scalars(
-        sa.select(database.Resource).filter(
-            database.Resource.resource_uid.notin_(keep_resource_uids)
-        )
-    )
-    for dataset_to_delete in datasets_to_delete:
-        dataset_to_delete.licences = []
-        dataset_to_delete.messages = []
-        dataset_to_delete.related_resources = []
-        if dataset_to_delete.resource_data:
-            session.delete(dataset_to_delete.resource_data)
-        session.delete(dataset_to_delete)
-        logger.info("removed resource '%s'" % dataset_to_delete.resource_uid)
+    orphans.remove_orphan_datasets(session, keep_resource_uids)
 
 
 def update_last_input_status(
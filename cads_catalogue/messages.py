@@ -14,17 +14,164 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
+import datetime
+import hashlib
+import json
 import os
 import pathlib
-from typing import Any, List, Sequence
+import re
+from typing import Any, Dict, List, Sequence
 
 import frontmatter
 import sqlalchemy as sa
 import structlog
+import yaml
+from sqlalchemy.dialects.postgresql import insert
 
-import cads_catalogue
+import cads_catalogue.database
+import cads_catalogue.orphans
 
 logger = structlog.get_logger(__name__)
+MESSAGES_MAX_WORKERS = int(os.getenv("MESSAGES_MAX_WORKERS", 4))
+MESSAGES_CACHE_PATH = os.getenv("MESSAGES_CACHE_PATH")
+FM_BOUNDARY = re.compile(r"^-{3,}\s*$", re.MULTILINE)
+# C-accelerated YAML parser, if available
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def compile_entries(entries: Sequence[str]) -> tuple[set[str], re.Pattern | None]:
+    """
+    Split entries of a message in exact resource uids and a pattern for the wildcards.
+
+    Parameters
+    ----------
+    entries: entries of a message: resource uids, optionally with 'xxx' as wildcard
+
+    Returns
+    -------
+    tuple (set of exact resource uids, compiled pattern of wildcard entries or None)
+    """
+    exact_uids = set()
+    wildcard_patterns = []
+    for entry in entries:
+        if "xxx" not in entry:
+            exact_uids.add(entry)
+            continue
+        # same semantic of the SQL pattern LIKE entry.replace("xxx", "%")
+        like_pattern = entry.replace("xxx", "%")
+        wildcard_patterns.append(
+            "".join(
+                ".*" if char == "%" else "." if char == "_" else re.escape(char)
+                for char in like_pattern
+            )
+        )
+    if not wildcard_patterns:
+        return exact_uids, None
+    return exact_uids, re.compile("|".join(wildcard_patterns), re.DOTALL)
+
+
+def resolve_messages_resources(
+    session: sa.orm.session.Session, msgs: Sequence[dict[str, Any]]
+) -> dict[str, List[int]]:
+    """
+    Translate the entries of the messages in ids of the resources related.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    msgs: metadata of loaded messages
+
+    Returns
+    -------
+    dict: message uid -> list of related resource ids
+    """
+    resource_table = cads_catalogue.database.Resource.__table__
+    resource_ids: Dict[str, int] = dict(
+        session.execute(
+            sa.select(resource_table.c.resource_uid, resource_table.c.resource_id)
+        )
+        .tuples()
+        .all()
+    )
+    ret_value = dict()
+    for msg in msgs:
+        message_uid = msg["message_uid"]
+        # NOTE: site messages have always entries = []
+        entries = msg.get("entries", [])
+        exact_uids, pattern = compile_entries(entries)
+        matched_ids = {resource_ids[uid] for uid in exact_uids if uid in resource_ids}
+        if pattern is not None:
+            matched_ids |= {
+                resource_id
+                for resource_uid, resource_id in resource_ids.items()
+                if pattern.fullmatch(resource_uid)
+            }
+        if entries and not matched_ids:
+            logger.warning(
+                f"message {message_uid} with entries '{entries}' is unrelated to any dataset"
+            )
+        ret_value[message_uid] = sorted(matched_ids)
+    return ret_value
+
+
+def messages_sync(
+    session: sa.orm.session.Session, msgs: Sequence[dict[str, Any]]
+) -> dict[str, int]:
+    """
+    Compare db records and files of messages and make them the same, in bulk.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    msgs: metadata of loaded messages
+
+    Returns
+    -------
+    dict: message uid -> message id of the created/updated db messages
+    """
+    if not msgs:
+        return dict()
+    msgs_resource_ids = resolve_messages_resources(session, msgs)
+    records = [
+        {key: value for key, value in msg.items() if key != "entries"} for msg in msgs
+    ]
+    columns = sorted(set().union(*records))
+    # upsert of the messages
+    insert_stmt = insert(cads_catalogue.database.Message).values(
+        [{column: record.get(column) for column in columns} for record in records]
+    )
+    upsert_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=["message_uid"],
+        set_={
+            column: insert_stmt.excluded[column]
+            for column in columns
+            if column != "message_uid"
+        },
+    ).returning(
+        cads_catalogue.database.Message.__table__.c.message_uid,
+        cads_catalogue.database.Message.__table__.c.message_id,
+    )
+    message_ids: Dict[str, int] = dict(session.execute(upsert_stmt).tuples().all())
+
+    # update of the messages' resources
+    session.execute(
+        sa.delete(cads_catalogue.database.ResourceMessage).where(
+            cads_catalogue.database.ResourceMessage.message_id.in_(
+                list(message_ids.values())
+            )
+        )
+    )
+    resources_messages = [
+        {"resource_id": resource_id, "message_id": message_ids[message_uid]}
+        for message_uid, resource_ids in msgs_resource_ids.items()
+        for resource_id in resource_ids
+    ]
+    if resources_messages:
+        session.execute(
+            sa.insert(cads_catalogue.database.ResourceMessage), resources_messages
+        )
+    return message_ids
 
 
 def message_sync(
@@ -43,53 +190,69 @@ def message_sync(
     -------
     The created/updated db message
     """
-    message = msg.copy()
-    message_uid = message["message_uid"]
-    # NOTE: site messages have always entries = []
-    entries = message.pop("entries", [])
-
-    # translate entries in resource_objs
-    msg_resource_objs: Sequence[cads_catalogue.database.Resource] = []
-    clauses = []
-    for entry in entries:
-        if "xxx" in entry:
-            pattern = entry.replace("xxx", "%")
-            clauses.append(cads_catalogue.database.Resource.resource_uid.like(pattern))
-        else:
-            clauses.append(cads_catalogue.database.Resource.resource_uid == entry)
-    if clauses:
-        clause = sa.or_(*clauses)
-        msg_resource_objs = session.scalars(
-            sa.select(cads_catalogue.database.Resource).filter(clause)
-        ).all()
-        if not msg_resource_objs:
-            logger.warning(
-                f"message {message_uid} with entries '{entries}' is unrelated to any dataset"
-            )
-    # upsert of the message
-    db_message = session.scalars(
-        sa.select(cads_catalogue.database.Message)
-        .filter_by(message_uid=message_uid)
-        .limit(1)
-    ).first()
-    if not db_message:
-        db_message = cads_catalogue.database.Message(**message)
-        session.add(db_message)
-        logger.debug("added db message %r" % message_uid)
-    else:
-        session.execute(
-            sa.update(cads_catalogue.database.Message)
-            .filter_by(message_id=db_message.message_id)
-            .values(**message)
-        )
-        logger.debug("updated db message %r" % message_uid)
+    message_id = messages_sync(session, [msg])[msg["message_uid"]]
+    logger.debug("upserted db message %r" % msg["message_uid"])
+    return session.get(  # type: ignore
+        cads_catalogue.database.Message, message_id, populate_existing=True
+    )
 
-    # update of the message's resources
-    db_message.resources = msg_resource_objs  # type: ignore
-    return db_message
 
+def parse_frontmatter(text: str) -> tuple[dict[str, Any], str]:
+    """
+    Split a text in its frontmatter metadata and its content.
 
-def md2message_record(msg_path, msg_uid, **record_attrs) -> dict[str, Any]:
+    YAML frontmatter is parsed directly, other formats are left to the frontmatter library.
+
+    Parameters
+    ----------
+    text: text to parse
+
+    Returns
+    -------
+    tuple (metadata, content)
+    """
+    text = text.strip()
+    if not FM_BOUNDARY.match(text):
+        return frontmatter.parse(text)
+    try:
+        _, fm_text, content = FM_BOUNDARY.split(text, 2)
+    except ValueError:
+        # not closed frontmatter
+        return dict(), text
+    metadata = yaml.load(fm_text, Loader=YAML_LOADER)
+    if not isinstance(metadata, dict):
+        metadata = dict()
+    return metadata, content.strip()
+
+
+def parse_message_md(text: str) -> dict[str, Any]:
+    """
+    Parse the text of a message markdown file.
+
+    Parameters
+    ----------
+    text: text of the markdown file
+
+    Returns
+    -------
+    dictionary of information parsed.
+    """
+    metadata, content = parse_frontmatter(text)
+    return {
+        "date": metadata["date"].replace(tzinfo=None),
+        "summary": metadata.get("summary"),
+        "severity": metadata.get("severity", "info"),
+        "live": metadata.get("live", "false"),
+        "show_date": str(metadata.get("show_date", "true")).lower() == "true",
+        "content": content.strip(),
+        # this is not a db field
+        "entries": [e.strip() for e in metadata.get("entries", "").split(",")],
+    }
+
+
+def md2message_record(
+    msg_path, msg_uid, parsed_md: dict[str, Any] | None = None, **record_attrs
+) -> dict[str, Any]:
     """
     Load message record from a markdown file.
 
@@ -97,24 +260,18 @@ def md2message_record(msg_path, msg_uid, **record_attrs) -> dict[str, Any]:
     ----------
     msg_path: path to the message markdown file
     msg_uid: uid of the message record
+    parsed_md: information already parsed from the file (if None, the file is parsed)
     record_attrs: force values to some fields of output record
 
     Returns
     -------
     dictionary of information parsed.
     """
-    md_obj = frontmatter.load(msg_path)
-    msg_record = {
-        "message_uid": msg_uid,
-        "date": md_obj["date"].replace(tzinfo=None),
-        "summary": md_obj.get("summary"),
-        "severity": md_obj.get("severity", "info"),
-        "live": md_obj.get("live", "false"),
-        "show_date": str(md_obj.get("show_date", "true")).lower() == "true",
-        "content": md_obj.content.strip(),
-        # this is not a db field
-        "entries": [e.strip() for e in md_obj.get("entries", "").split(",")],
-    }
+    if parsed_md is None:
+        with open(msg_path, encoding="utf-8") as fp:
+            parsed_md = parse_message_md(fp.read())
+    msg_record = {"message_uid": msg_uid, **parsed_md}
+    msg_record["entries"] = list(parsed_md["entries"])
     msg_record.update(record_attrs)
     if msg_record.get("is_global", False):
         msg_record["entries"] = []
@@ -132,37 +289,168 @@ def md2message_record(msg_path, msg_uid, **record_attrs) -> dict[str, Any]:
     return msg_record
 
 
-def load_contents_messages(
-    root_msg_folder: str | pathlib.Path, contents_folder: str | pathlib.Path
+def read_messages_cache(cache_path: str | pathlib.Path | None) -> dict[str, Any]:
+    """
+    Read the cache of parsed messages, indexed by hash of the markdown files.
+
+    Parameters
+    ----------
+    cache_path: path to the cache file (None means no cache)
+
+    Returns
+    -------
+    dict: file hash -> information parsed from the file
+    """
+    if not cache_path or not os.path.isfile(cache_path):
+        return dict()
+    try:
+        with open(cache_path) as fp:
+            cache = json.load(fp)
+        for parsed_md in cache.values():
+            parsed_md["date"] = datetime.datetime.fromisoformat(parsed_md["date"])
+    except Exception:  # noqa
+        logger.exception("cache of messages %r not readable, ignored" % cache_path)
+        return dict()
+    return cache
+
+
+def write_messages_cache(
+    cache_path: str | pathlib.Path | None, cache: dict[str, Any]
+) -> None:
+    """
+    Write the cache of parsed messages, indexed by hash of the markdown files.
+
+    Parameters
+    ----------
+    cache_path: path to the cache file (None means no cache)
+    cache: file hash -> information parsed from the file
+    """
+    if not cache_path:
+        return
+    try:
+        with open(cache_path, "w") as fp:
+            json.dump(cache, fp, default=lambda d: d.isoformat())
+    except Exception:  # noqa
+        logger.exception("cache of messages %r not writable" % cache_path)
+
+
+def load_message_files(
+    msg_files: Sequence[tuple[str, str, dict[str, Any]]],
+    max_workers: int = MESSAGES_MAX_WORKERS,
+    cache_path: str | pathlib.Path | None = MESSAGES_CACHE_PATH,
 ) -> List[dict[str, Any]]:
     """
-    Look for messages specific for a subset of datasets (i.e. not 'global').
+    Load messages from markdown files, parsing them in a pool of processes.
 
     Parameters
     ----------
-    contents_folder: root path where to look for messages (i.e. cads-messages/contents root folder)
-    root_msg_folder: base root path (i.e. cads-messages root folder) (used to generate msg uids)
+    msg_files: list of (file path, message uid, values to force to fields of the message)
+    max_workers: max number of files parsed concurrently
+    cache_path: path to the cache file of parsed messages (None means no cache)
 
     Returns
     -------
     List of found messages parsed.
     """
+    cache = read_messages_cache(cache_path)
+    file_hashes = []
+    to_parse = dict()
+    for file_path, _, _ in msg_files:
+        with open(file_path, "rb") as fp:
+            file_bytes = fp.read()
+        file_hash = hashlib.md5(file_bytes).hexdigest()
+        file_hashes.append(file_hash)
+        if file_hash not in cache:
+            to_parse[file_hash] = file_bytes.decode("utf-8")
+
+    parsed_mds: dict[str, Any] = {h: cache[h] for h in file_hashes if h in cache}
+    if max_workers > 1 and len(to_parse) > 1:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers
+        ) as executor:
+            futures = {
+                file_hash: executor.submit(parse_message_md, text)
+                for file_hash, text in to_parse.items()
+            }
+            for file_hash, future in futures.items():
+                try:
+                    parsed_mds[file_hash] = future.result()
+                except Exception as exc:  # noqa
+                    parsed_mds[file_hash] = exc
+    else:
+        for file_hash, text in to_parse.items():
+            try:
+                parsed_mds[file_hash] = parse_message_md(text)
+            except Exception as exc:  # noqa
+                parsed_mds[file_hash] = exc
+
     loaded_messages: List[dict[str, Any]] = []
+    for (file_path, msg_uid, record_attrs), file_hash in zip(msg_files, file_hashes):
+        try:
+            parsed_md = parsed_mds[file_hash]
+            if isinstance(parsed_md, Exception):
+                raise parsed_md
+            msg_record = md2message_record(
+                file_path, msg_uid, parsed_md=parsed_md, **record_attrs
+            )
+        except:  # noqa
+            logger.exception("error loading message %r" % file_path)
+            continue
+        loaded_messages.append(msg_record)
+    write_messages_cache(
+        cache_path,
+        {h: md for h, md in parsed_mds.items() if not isinstance(md, Exception)},
+    )
+    return loaded_messages
 
-    for current_root, dirs, files in os.walk(contents_folder):
+
+def find_message_files(
+    root_msg_folder: str | pathlib.Path,
+    folder: str | pathlib.Path,
+    **record_attrs,
+) -> List[tuple[str, str, dict[str, Any]]]:
+    """
+    Look for markdown files of messages inside a folder.
+
+    Parameters
+    ----------
+    root_msg_folder: base root path (i.e. cads-messages root folder) (used to generate msg uids)
+    folder: root path where to look for messages
+    record_attrs: values to force to some fields of the messages found
+
+    Returns
+    -------
+    List of (file path, message uid, record_attrs) of the messages found.
+    """
+    msg_files = []
+    for current_root, dirs, files in os.walk(folder):
         for current_file in files:
             file_path = os.path.join(current_root, current_file)
             if os.path.splitext(current_file)[1].lower() == ".md":
                 msg_uid = os.path.relpath(file_path, root_msg_folder)
-                try:
-                    msg_record = md2message_record(file_path, msg_uid, is_global=False)
-                except:  # noqa
-                    logger.exception("error loading message %r" % file_path)
-                    continue
-                loaded_messages.append(msg_record)
+                msg_files.append((file_path, msg_uid, record_attrs))
             else:
                 logger.warning("file at path %r will not be parsed" % file_path)
-    return loaded_messages
+    return msg_files
+
+
+def load_contents_messages(
+    root_msg_folder: str | pathlib.Path, contents_folder: str | pathlib.Path
+) -> List[dict[str, Any]]:
+    """
+    Look for messages specific for a subset of datasets (i.e. not 'global').
+
+    Parameters
+    ----------
+    contents_folder: root path where to look for messages (i.e. cads-messages/contents root folder)
+    root_msg_folder: base root path (i.e. cads-messages root folder) (used to generate msg uids)
+
+    Returns
+    -------
+    List of found messages parsed.
+    """
+    msg_files = find_message_files(root_msg_folder, contents_folder, is_global=False)
+    return load_message_files(msg_files)
 
 
 def load_site_messages(
@@ -180,43 +468,38 @@ def load_site_messages(
     -------
     List of found messages parsed.
     """
-    loaded_messages: List[dict[str, Any]] = []
     site = os.path.basename(site_folder)
-    for current_root, dirs, files in os.walk(site_folder):
-        for current_file in files:
-            file_path = os.path.join(current_root, current_file)
-            if os.path.splitext(current_file)[1].lower() == ".md":
-                msg_uid = os.path.relpath(file_path, root_msg_folder)
-                try:
-                    msg_record = md2message_record(
-                        file_path, msg_uid, is_global=True, site=site
-                    )
-                except:  # noqa
-                    logger.exception("error loading message %r" % file_path)
-                    continue
-                loaded_messages.append(msg_record)
-            else:
-                logger.warning("file at path %r will not be parsed" % file_path)
-    return loaded_messages
+    msg_files = find_message_files(
+        root_msg_folder, site_folder, is_global=True, site=site
+    )
+    return load_message_files(msg_files)
 
 
-def load_messages(root_msg_folder: str | pathlib.Path) -> List[dict[str, Any]]:
+def load_messages(
+    root_msg_folder: str | pathlib.Path,
+    max_workers: int = MESSAGES_MAX_WORKERS,
+    cache_path: str | pathlib.Path | None = MESSAGES_CACHE_PATH,
+) -> List[dict[str, Any]]:
     """
     Load all messages from a well-known filesystem root.
 
     Parameters
     ----------
     root_msg_folder: root path where to look for messages (i.e. cads-messages root folder)
+    max_workers: max number of files parsed concurrently
+    cache_path: path to the cache file of parsed messages (None means no cache)
 
     Returns
     -------
     List of found messages parsed.
     """
-    loaded_messages: List[dict[str, Any]] = []
+    msg_files = []
     # load 'contents' folder
     contents_folder = os.path.join(root_msg_folder, "contents")
     if os.path.isdir(contents_folder):
-        loaded_messages += load_contents_messages(root_msg_folder, contents_folder)
+        msg_files += find_message_files(
+            root_msg_folder, contents_folder, is_global=False
+        )
     else:
         logger.warning("not found folder %r" % contents_folder)
 
@@ -227,11 +510,13 @@ def load_messages(root_msg_folder: str | pathlib.Path) -> List[dict[str, Any]]:
             site_folder = os.path.join(sites_folder, site)
             if not os.path.isdir(site_folder):
                 continue
-            loaded_messages += load_site_messages(root_msg_folder, site_folder)
+            msg_files += find_message_files(
+                root_msg_folder, site_folder, is_global=True, site=site
+            )
     else:
         logger.warning("not found folder %r" % sites_folder)
 
-    return loaded_messages
+    return load_message_files(msg_files, max_workers, cache_path)
 
 
 def update_catalogue_messages(
@@ -255,33 +540,29 @@ def update_catalogue_messages(
     # load metadata of messages from files and sync each messages in the db
     msgs = load_messages(messages_folder_path)
     logger.info("loaded %s messages from folder %s" % (len(msgs), messages_folder_path))
-    involved_msg_ids = []
-    for msg in msgs:
-        msg_uid = msg["message_uid"]
-        involved_msg_ids.append(msg_uid)
-        try:
-            with session.begin_nested():
-                message_sync(session, msg)
+    involved_msg_ids = [msg["message_uid"] for msg in msgs]
+    try:
+        with session.begin_nested():
+            messages_sync(session, msgs)
+        for msg_uid in involved_msg_ids:
             logger.info("message '%s' db sync successful" % msg_uid)
-        except Exception:  # noqa
-            logger.exception("db sync for message '%s' failed, error follows" % msg_uid)
+    except Exception:  # noqa
+        logger.exception("bulk db sync of messages failed, syncing one at a time")
+        for msg in msgs:
+            msg_uid = msg["message_uid"]
+            try:
+                with session.begin_nested():
+                    message_sync(session, msg)
+                logger.info("message '%s' db sync successful" % msg_uid)
+            except Exception:  # noqa
+                logger.exception(
+                    "db sync for message '%s' failed, error follows" % msg_uid
+                )
 
     if not remove_orphans:
         return involved_msg_ids
 
     # remove not loaded messages from the db
-    msgs_to_delete = (
-        session.scalars(
-            sa.select(cads_catalogue.database.Message).filter(
-                cads_catalogue.database.Message.message_uid.notin_(involved_msg_ids)
-            )
-        )
-        .unique()
-        .all()
-    )
-    for msg_to_delete in msgs_to_delete:
-        msg_to_delete.resources = []
-        session.delete(msg_to_delete)
-        logger.info("removed old message '%s'" % msg_to_delete.message_uid)
+    cads_catalogue.orphans.remove_orphan_messages(session, involved_msg_ids)
 
     return involved_msg_ids
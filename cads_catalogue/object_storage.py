@@ -191,7 +191,10 @@ def store_file(
     if use_client:
         client = use_client
     else:
-        client = boto3.client("s3", endpoint_url=object_storage_url, **storage_kws)
+        # NOTE: a new session for each client, the default session is not thread-safe
+        client = boto3.session.Session().client(
+            "s3", endpoint_url=object_storage_url, **storage_kws
+        )
     setup_bucket(client, bucket_name)
     # NOTE: version retrieval is not supported in the public endpoint of the storage,
     # so the file is stored using a prefix including the SHA256 hash of the file content
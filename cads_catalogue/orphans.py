@@ -0,0 +1,267 @@
+"""removal of orphan records from the catalogue database."""
+
+# Copyright 2022, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Iterable, List, Sequence
+
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+
+from cads_catalogue import database
+
+logger = structlog.get_logger(__name__)
+
+
+def not_in_keep(columns: Sequence[Any], keep: Iterable) -> sa.ColumnElement[bool]:
+    """
+    Return the clause selecting records whose key is not in `keep`.
+
+    Parameters
+    ----------
+    columns: columns of the key
+    keep: values of the key to keep (tuples if the key has more columns)
+
+    Returns
+    -------
+    `NOT (key = ANY(:keep))` for single column keys, `key NOT IN (:keep)` otherwise
+    """
+    if len(columns) == 1:
+        keep_array = sa.literal(list(keep), dialect_postgresql.ARRAY(columns[0].type))
+        return sa.not_(columns[0] == sa.any_(keep_array))
+    return sa.tuple_(*columns).not_in([tuple(k) for k in keep])
+
+
+def delete_orphans(
+    session: sa.orm.session.Session,
+    model,
+    orphan_clause: sa.ColumnElement[bool],
+    returning: Sequence[Any],
+    cascades: Sequence[tuple[Any, Any, Any]],
+) -> List[sa.Row]:
+    """
+    Delete the records of a model and their rows in the association tables.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    model: ORM model of the records to delete
+    orphan_clause: clause selecting the records to delete
+    returning: columns of the deleted records to return
+    cascades: ordered list of (model or table, column, referred column of `model`)
+        of the rows referring to the records to delete, deleted before the records
+
+    Returns
+    -------
+    list: rows of the `returning` columns of the records deleted
+    """
+    for target, column, referred_column in cascades:
+        session.execute(
+            sa.delete(target).where(
+                column.in_(sa.select(referred_column).where(orphan_clause))
+            ),
+            execution_options={"synchronize_session": False},
+        )
+    deleted = list(
+        session.execute(
+            sa.delete(model).where(orphan_clause).returning(*returning),
+            execution_options={"synchronize_session": False},
+        ).all()
+    )
+    # objects already loaded must reflect the deletion
+    session.expire_all()
+    return deleted
+
+
+def remove_orphan_datasets(
+    session: sa.orm.session.Session, keep_resource_uids: Iterable[str]
+) -> List[str]:
+    """
+    Remove all datasets that not are in `keep_resource_uids`.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    keep_resource_uids: uids of resources to keep
+
+    Returns
+    -------
+    list: uids of the resources removed
+    """
+    resource_id = database.Resource.resource_id
+    related_resources = database.related_resources
+    deleted = delete_orphans(
+        session,
+        database.Resource,
+        not_in_keep([database.Resource.resource_uid], keep_resource_uids),
+        returning=[database.Resource.resource_uid],
+        cascades=[
+            (
+                database.ResourceLicence,
+                database.ResourceLicence.resource_id,
+                resource_id,
+            ),
+            (
+                database.ResourceMessage,
+                database.ResourceMessage.resource_id,
+                resource_id,
+            ),
+            (database.ResourceFacet, database.ResourceFacet.resource_id, resource_id),
+            (
+                database.ResourceContent,
+                database.ResourceContent.resource_id,
+                resource_id,
+            ),
+            (related_resources, related_resources.c.parent_resource_id, resource_id),
+            (related_resources, related_resources.c.child_resource_id, resource_id),
+            (
+                database.ResourceData,
+                database.ResourceData.resource_uid,
+                database.Resource.resource_uid,
+            ),
+        ],
+    )
+    for (resource_uid,) in deleted:
+        logger.info("removed resource '%s'" % resource_uid)
+    return [r.resource_uid for r in deleted]
+
+
+def remove_orphan_licences(
+    session: sa.orm.session.Session,
+    keep_licences: Iterable[tuple],
+    resources: Iterable[str],
+) -> List[tuple]:
+    """
+    Remove all licences that not are in `keep_licences` and unrelated to any of `resources`.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    keep_licences: (licence uid, revision) of licences to keep
+    resources: uids of resources whose licences are to keep
+
+    Returns
+    -------
+    list: (licence uid, revision) of the licences removed
+    """
+    keep_resources_array = sa.literal(
+        list(resources), dialect_postgresql.ARRAY(sa.String)
+    )
+    related_to_resources = (
+        sa.select(database.ResourceLicence.licence_id)
+        .join(
+            database.Resource,
+            database.Resource.resource_id == database.ResourceLicence.resource_id,
+        )
+        .where(database.Resource.resource_uid == sa.any_(keep_resources_array))
+    )
+    orphan_clause = sa.and_(
+        not_in_keep(
+            [database.Licence.licence_uid, database.Licence.revision], keep_licences
+        ),
+        database.Licence.licence_id.not_in(related_to_resources),
+    )
+    deleted = delete_orphans(
+        session,
+        database.Licence,
+        orphan_clause,
+        returning=[database.Licence.licence_uid, database.Licence.revision],
+        cascades=[
+            (
+                database.ResourceLicence,
+                database.ResourceLicence.licence_id,
+                database.Licence.licence_id,
+            ),
+        ],
+    )
+    for licence_uid, revision in deleted:
+        logger.info("removed licence '%s' (revision %s)" % (licence_uid, revision))
+    return [tuple(r) for r in deleted]
+
+
+def remove_orphan_messages(
+    session: sa.orm.session.Session, keep_message_uids: Iterable[str]
+) -> List[str]:
+    """
+    Remove all messages that not are in `keep_message_uids`.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    keep_message_uids: uids of messages to keep
+
+    Returns
+    -------
+    list: uids of the messages removed
+    """
+    deleted = delete_orphans(
+        session,
+        database.Message,
+        not_in_keep([database.Message.message_uid], keep_message_uids),
+        returning=[database.Message.message_uid],
+        cascades=[
+            (
+                database.ResourceMessage,
+                database.ResourceMessage.message_id,
+                database.Message.message_id,
+            ),
+        ],
+    )
+    for (message_uid,) in deleted:
+        logger.info("removed old message '%s'" % message_uid)
+    return [r.message_uid for r in deleted]
+
+
+def remove_orphan_contents(
+    session: sa.orm.session.Session, keep_content_props: Iterable[tuple]
+) -> List[tuple]:
+    """
+    Remove all contents that not are in `keep_content_props`.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    keep_content_props: (site, type, slug) of contents to keep
+
+    Returns
+    -------
+    list: (site, type, slug) of the contents removed
+    """
+    content_props = [
+        database.Content.site,
+        database.Content.type,
+        database.Content.slug,
+    ]
+    deleted = delete_orphans(
+        session,
+        database.Content,
+        not_in_keep(content_props, keep_content_props),
+        returning=content_props,
+        cascades=[
+            (
+                database.ContentsKeywordM2M,
+                database.ContentsKeywordM2M.content_id,
+                database.Content.content_id,
+            ),
+            (
+                database.ResourceContent,
+                database.ResourceContent.content_id,
+                database.Content.content_id,
+            ),
+        ],
+    )
+    for site, ctype, slug in deleted:
+        logger.info(f"removed old content {ctype} '{slug}' for site {site}")
+    return [tuple(r) for r in deleted]
@@ -0,0 +1,145 @@
+"""access to the input files of a dataset folder, each one read and parsed once."""
+
+# Copyright 2022, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import pathlib
+from typing import Any, Callable, Dict, Set, Tuple
+
+
+class ParsedDataset:
+    """Files of a dataset folder, read and parsed on first access and then cached.
+
+    The same instance can be consumed by the validators and by the loader
+    functions of the catalogue manager, so that validating and loading a dataset
+    reads each of its files only once. Parsing errors are cached as well and
+    raised again at each access.
+    """
+
+    def __init__(
+        self, folder_path: str | pathlib.Path, resource_uid: str | None = None
+    ) -> None:
+        self.folder_path = str(folder_path).rstrip(os.sep)
+        self.resource_uid = resource_uid or os.path.basename(self.folder_path)
+        self._file_names: Set[str] | None = None
+        self._texts: Dict[str, str] = dict()
+        self._hashes: Dict[str, str] = dict()
+        self._parsed: Dict[Tuple[str, str], Tuple[Any, Exception | None]] = dict()
+
+    @classmethod
+    def from_dataset_folder(cls, dataset_folder: str | pathlib.Path) -> "ParsedDataset":
+        """Return the parsed dataset of the folder of a dataset.
+
+        The folder to consider is the 'json-config' subfolder, if it contains
+        metadata.json, otherwise the dataset folder itself.
+
+        Parameters
+        ----------
+        dataset_folder: dataset folder path
+
+        Returns
+        -------
+        ParsedDataset: the parsed dataset
+        """
+        dataset_folder = str(dataset_folder).rstrip(os.sep)
+        resource_uid = os.path.basename(dataset_folder)
+        json_folder = os.path.join(dataset_folder, "json-config")
+        if os.path.isfile(os.path.join(json_folder, "metadata.json")):
+            return cls(json_folder, resource_uid)
+        return cls(dataset_folder, resource_uid)
+
+    def path(self, file_name: str) -> str:
+        """Return the path of a file of the dataset."""
+        return os.path.join(self.folder_path, file_name)
+
+    def file_names(self) -> Set[str]:
+        """Return the names of the files inside the folder (listed once)."""
+        if self._file_names is None:
+            with os.scandir(self.folder_path) as entries:
+                self._file_names = {e.name for e in entries if e.is_file()}
+        return self._file_names
+
+    def isfile(self, file_name: str) -> bool:
+        """Return True if the file exists inside the folder."""
+        return file_name in self.file_names()
+
+    def read_text(self, file_name: str) -> str:
+        """Return the text content of a file of the dataset."""
+        if file_name not in self._texts:
+            if not self.isfile(file_name):
+                raise FileNotFoundError(self.path(file_name))
+            with open(self.path(file_name)) as fp:
+                self._texts[file_name] = fp.read()
+        return self._texts[file_name]
+
+    def file_hash(self, file_name: str) -> str | None:
+        """Return the MD5 hex digest of the content of a file, None if not existing.
+
+        The hash is computed on the text read, without serialising again the data parsed.
+        """
+        if not self.isfile(file_name):
+            return None
+        if file_name not in self._hashes:
+            text = self.read_text(file_name)
+            self._hashes[file_name] = hashlib.md5(text.encode("utf-8")).hexdigest()
+        return self._hashes[file_name]
+
+    def _parse(self, file_name: str, format: str, parser: Callable[[str], Any]) -> Any:
+        key = (format, file_name)
+        if key not in self._parsed:
+            try:
+                self._parsed[key] = (parser(self.read_text(file_name)), None)
+            except Exception as exc:
+                self._parsed[key] = (None, exc)
+        data, error = self._parsed[key]
+        if error is not None:
+            raise error
+        return data
+
+    def load_json(self, file_name: str) -> Any:
+        """Return the content of a json file of the dataset.
+
+        The object returned is shared by all the consumers: it must not be modified.
+        """
+        return self._parse(file_name, "json", json.loads)
+
+    def load_yaml(self, file_name: str) -> Any:
+        """Return the content of a yaml file of the dataset.
+
+        The object returned is shared by all the consumers: it must not be modified.
+        """
+        import yaml
+
+        return self._parse(file_name, "yaml", yaml.safe_load)
+
+
+def get_parsed_dataset(
+    folder: str | pathlib.Path | ParsedDataset,
+) -> ParsedDataset:
+    """Return `folder` if already a parsed dataset, otherwise the parsed dataset of the folder.
+
+    Parameters
+    ----------
+    folder: folder path or parsed dataset
+
+    Returns
+    -------
+    ParsedDataset: the parsed dataset
+    """
+    if isinstance(folder, ParsedDataset):
+        return folder
+    return ParsedDataset(folder)
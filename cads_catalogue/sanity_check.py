@@ -17,6 +17,7 @@
 from __future__ import annotations
 
 import datetime
+import functools
 import json
 import os
 from collections import defaultdict
@@ -42,30 +43,35 @@ SCHEMA_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), "schemas"
 
 format_checking = jsonschema.FormatChecker(formats=["date", "date-time", "uuid"])
 
-ref_mapping = {}
-for schema_def in ("sanity_check", "sanity_check_item"):
-    with open(os.path.join(SCHEMA_PATH, f"{schema_def}.json")) as fp:
-        ref_mapping[f"/schemas/{schema_def}"] = json.load(fp)
 
-resolver = jsonschema.RefResolver("", {}, store=ref_mapping)
+@functools.cache
+def get_schema_validator(schema_def: str) -> Any:
+    """Return the validator of a sanity check schema, loading the schemas at first use."""
+    ref_mapping = {}
+    for ref_schema_def in ("sanity_check", "sanity_check_item"):
+        with open(os.path.join(SCHEMA_PATH, f"{ref_schema_def}.json")) as fp:
+            ref_mapping[f"/schemas/{ref_schema_def}"] = json.load(fp)
+    resolver = jsonschema.RefResolver("", {}, store=ref_mapping)
+    schema = ref_mapping[f"/schemas/{schema_def}"]
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema, resolver=resolver, format_checker=format_checking)
 
 
-def sanity_check_validate(json_data):
-    return jsonschema.validate(
-        instance=json_data,
-        schema=ref_mapping["/schemas/sanity_check"],
-        resolver=resolver,
-        format_checker=format_checking,
+def schema_validate(json_data, schema_def):
+    error = jsonschema.exceptions.best_match(
+        get_schema_validator(schema_def).iter_errors(json_data)
     )
+    if error is not None:
+        raise error
+
+
+def sanity_check_validate(json_data):
+    return schema_validate(json_data, "sanity_check")
 
 
 def sanity_check_item_validate(json_data):
-    return jsonschema.validate(
-        instance=json_data,
-        schema=ref_mapping["/schemas/sanity_check_item"],
-        resolver=resolver,
-        format_checker=format_checking,
-    )
+    return schema_validate(json_data, "sanity_check_item")
 
 
 def echo_passed_vs_failed(reports: list[cads_e2e_tests.Report]) -> None:
@@ -119,8 +125,12 @@ def update_dataset_sanity_check(
     """Update sanity check column with a new outcome."""
     current_sanity_check = report2sanity_check(report)
     with session_obj.begin() as session:
+        # the record read is updated: read it from the primary database
+        session.info["primary"] = True
         dataset_obj = session.scalars(
-            sa.select(database.Resource).filter_by(resource_uid=dataset_uid)
+            sa.select(database.Resource)
+            .filter_by(resource_uid=dataset_uid)
+            .options(sa.orm.undefer_group("sanity_check"))
         ).first()
         if not dataset_obj:
             logger.error(
@@ -154,7 +164,11 @@ def update_sanity_checks_by_file(
     for report in reports:
         dashboard_dict[report.request.collection_id].append(report2sanity_check(report))
     with session_obj.begin() as session:
-        all_datasets = session.scalars(sa.select(database.Resource)).all()
+        # the records read are updated: read them from the primary database
+        session.info["primary"] = True
+        all_datasets = session.scalars(
+            sa.select(database.Resource).options(sa.orm.undefer_group("sanity_check"))
+        ).all()
         for dataset in all_datasets:
             if dataset.resource_uid in dashboard_dict:
                 additional_sanity_checks = dashboard_dict.pop(dataset.resource_uid)
@@ -182,7 +196,9 @@ def run_sanity_check(session_obj: sa.orm.sessionmaker, retain_only: int, **kwarg
     """Run e2e sanity checks and store outcomes."""
     requests_pool = []
     with session_obj.begin() as session:
-        all_datasets = session.scalars(sa.select(database.Resource)).all()
+        all_datasets = session.scalars(
+            sa.select(database.Resource).options(sa.orm.undefer_group("sanity_check"))
+        ).all()
         for dataset in all_datasets:
             if dataset.sanity_check_conf:
                 requests_pool += dataset.sanity_check_conf
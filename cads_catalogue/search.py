@@ -0,0 +1,281 @@
+"""full-text search over the resources of the catalogue."""
+
+# Copyright 2022, European Union.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import dataclasses
+from typing import Any, Dict, List
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql as dialect_postgresql
+
+from cads_catalogue import database
+
+# text search configuration of the search_field and fts columns
+SEARCH_REGCONFIG = "english"
+# weights of the search_field labels D, C, B, A (the ts_rank defaults)
+RANK_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+SORT_OPTIONS = ("relevance", "popularity", "title", "update")
+
+
+@dataclasses.dataclass
+class SearchResults:
+    """A page of resources found by `search_resources`."""
+
+    # resources of the page, in order
+    resources: List[database.Resource]
+    # rank of each resource of the page (None if searching without text)
+    ranks: List[float | None]
+    # number of resources matching, on all the pages
+    count: int
+    # number of resources matching, by facet: category name -> category value -> count
+    facets: Dict[str, Dict[str, int]] | None = None
+
+
+def get_filters(
+    q: str | None = None,
+    facets: Dict[str, List[str]] | None = None,
+    portals: List[str] | None = None,
+    include_hidden: bool = False,
+) -> List[sa.ColumnElement[bool]]:
+    """Return the conditions on the resources table selecting the resources to search.
+
+    Parameters
+    ----------
+    q: text to search (web search syntax), None to select without text search
+    facets: dictionary category name -> category values: a resource matches if it
+        has at least one of the values of each category
+    portals: portals of the resources, None for any portal
+    include_hidden: if True, include also the hidden resources
+
+    Returns
+    -------
+    list: list of SQLAlchemy conditions, to be put in AND
+    """
+    resource_table = database.Resource.__table__
+    filters: List[sa.ColumnElement[bool]] = []
+    if q:
+        filters.append(resource_table.c.search_field.op("@@")(get_tsquery(q)))
+    if not include_hidden:
+        filters.append(resource_table.c.hidden.is_not(True))
+    if portals is not None:
+        filters.append(resource_table.c.portal.in_(portals))
+    facet_table = database.Facet.__table__
+    resources_facets = database.ResourceFacet.__table__
+    for category_name, category_values in sorted((facets or dict()).items()):
+        filters.append(
+            sa.exists()
+            .where(
+                resources_facets.c.resource_id == resource_table.c.resource_id,
+                resources_facets.c.facet_id == facet_table.c.facet_id,
+                facet_table.c.category_name == category_name,
+                facet_table.c.category_value.in_(category_values),
+            )
+            .correlate(resource_table)
+        )
+    return filters
+
+
+def get_tsquery(q: str) -> sa.ColumnElement[Any]:
+    """Return the text search query of a text in web search syntax."""
+    return sa.func.websearch_to_tsquery(
+        sa.literal_column(f"'{SEARCH_REGCONFIG}'::regconfig"), q
+    )
+
+
+def get_rank(
+    q: str, weights: List[float] = RANK_WEIGHTS, high_priority_factor: int = 1
+) -> sa.ColumnElement[float]:
+    """Return the rank of the resources for a text, as computed by ts_rank2.
+
+    Parameters
+    ----------
+    q: text to search (web search syntax)
+    weights: weights of the labels D, C, B, A of the search_field column
+    high_priority_factor: multiplier of the rank of the high priority terms
+
+    Returns
+    -------
+    SQLAlchemy expression of the rank
+    """
+    resource_table = database.Resource.__table__
+    return sa.func.ts_rank2(
+        sa.literal(weights, dialect_postgresql.ARRAY(sa.REAL)),
+        resource_table.c.search_field,
+        resource_table.c.fts,
+        get_tsquery(q),
+        high_priority_factor,
+        type_=sa.REAL,
+    )
+
+
+def search_query(
+    q: str | None = None,
+    facets: Dict[str, List[str]] | None = None,
+    portals: List[str] | None = None,
+    include_hidden: bool = False,
+    sortby: str = "relevance",
+    limit: int | None = 20,
+    offset: int = 0,
+    weights: List[float] = RANK_WEIGHTS,
+    high_priority_factor: int = 1,
+) -> sa.Select[Any]:
+    """Return the query of a page of resources and their rank.
+
+    All values are bound parameters: statements of the same shape share the same
+    compiled SQL, in the SQLAlchemy compiled cache.
+
+    Parameters
+    ----------
+    q: text to search (web search syntax), None to select without text search
+    facets: dictionary category name -> category values (see `get_filters`)
+    portals: portals of the resources, None for any portal
+    include_hidden: if True, include also the hidden resources
+    sortby: one of 'relevance' (popularity without text), 'popularity', 'title', 'update'
+    limit: maximum number of resources returned, None for no limit
+    offset: number of resources to skip
+    weights: weights of the labels D, C, B, A of the search_field column
+    high_priority_factor: multiplier of the rank of the high priority terms
+
+    Returns
+    -------
+    SQLAlchemy select of (Resource, rank)
+    """
+    if sortby not in SORT_OPTIONS:
+        raise ValueError(f"sortby must be one of {SORT_OPTIONS}, not {sortby!r}")
+    q = q.strip() if q else None
+    if q:
+        rank = get_rank(q, weights, high_priority_factor)
+    else:
+        rank = sa.null().cast(sa.REAL)
+    resource = database.Resource
+    sort_columns: Dict[str, List[Any]] = {
+        "relevance": [rank.desc(), resource.popularity.desc().nulls_last()],
+        "popularity": [resource.popularity.desc().nulls_last()],
+        "title": [resource.title],
+        "update": [resource.resource_update.desc().nulls_last()],
+    }
+    order_by = sort_columns[sortby]
+    if sortby == "relevance" and not q:
+        order_by = order_by[1:]
+    query = (
+        sa.select(resource, rank.label("rank"))
+        .where(*get_filters(q, facets, portals, include_hidden))
+        .order_by(*order_by, resource.resource_uid)
+        .offset(offset)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def facet_counts_query(
+    filters: List[sa.ColumnElement[bool]],
+) -> sa.Select[Any]:
+    """Return the query of the number of resources by facet.
+
+    Parameters
+    ----------
+    filters: conditions selecting the resources (as returned by `get_filters`)
+
+    Returns
+    -------
+    SQLAlchemy select of (category name, category value, count)
+    """
+    resource_table = database.Resource.__table__
+    facet_table = database.Facet.__table__
+    resources_facets = database.ResourceFacet.__table__
+    return (
+        sa.select(
+            facet_table.c.category_name,
+            facet_table.c.category_value,
+            sa.func.count(sa.distinct(resources_facets.c.resource_id)),
+        )
+        .join(resources_facets, resources_facets.c.facet_id == facet_table.c.facet_id)
+        .where(
+            resources_facets.c.resource_id.in_(
+                sa.select(resource_table.c.resource_id).where(*filters)
+            )
+        )
+        .group_by(facet_table.c.category_name, facet_table.c.category_value)
+    )
+
+
+def search_resources(
+    session: sa.orm.session.Session,
+    q: str | None = None,
+    facets: Dict[str, List[str]] | None = None,
+    portals: List[str] | None = None,
+    include_hidden: bool = False,
+    sortby: str = "relevance",
+    limit: int | None = 20,
+    offset: int = 0,
+    weights: List[float] = RANK_WEIGHTS,
+    high_priority_factor: int = 1,
+    with_facets: bool = False,
+) -> SearchResults:
+    """Search resources in the catalogue, returning a page of results.
+
+    Parameters
+    ----------
+    session: opened SQLAlchemy session
+    q: text to search (web search syntax), None to select without text search
+    facets: dictionary category name -> category values: a resource matches if it
+        has at least one of the values of each category
+    portals: portals of the resources, None for any portal
+    include_hidden: if True, include also the hidden resources
+    sortby: one of 'relevance' (popularity without text), 'popularity', 'title', 'update'
+    limit: maximum number of resources returned, None for no limit
+    offset: number of resources to skip
+    weights: weights of the labels D, C, B, A of the search_field column
+    high_priority_factor: multiplier of the rank of the high priority terms
+    with_facets: if True, count also the resources matching by facet
+
+    Returns
+    -------
+    SearchResults: the page of resources found
+    """
+    q = q.strip() if q else None
+    query = search_query(
+        q,
+        facets,
+        portals,
+        include_hidden,
+        sortby,
+        limit,
+        offset,
+        weights,
+        high_priority_factor,
+    )
+    rows = session.execute(query).all()
+    filters = get_filters(q, facets, portals, include_hidden)
+    count = session.scalar(
+        sa.select(sa.func.count())
+        .select_from(database.Resource.__table__)
+        .where(*filters)
+    )
+    results = SearchResults(
+        resources=[row[0] for row in rows],
+        ranks=[row[1] for row in rows],
+        count=count or 0,
+    )
+    if with_facets:
+        results.facets = dict()
+        for category_name, category_value, facet_count in session.execute(
+            facet_counts_query(filters)
+        ):
+            results.facets.setdefault(category_name, dict())[category_value] = (
+                facet_count
+            )
+    return results
@@ -18,7 +18,7 @@ import os.path
 
 import structlog
 
-from cads_catalogue import contents, manager, repos
+from cads_catalogue import contents, licence_manager, manager, repos
 
 THIS_PATH = os.path.abspath(os.path.dirname(__file__))
 CATALOGUE_DIR = os.path.abspath(os.path.join(THIS_PATH, ".."))
@@ -56,6 +56,15 @@ def can_skip_licences(new_git_hashes, last_run_status, force, filtering_kwargs):
     return True
 
 
+def get_changed_licence_uids(session, licences, force):
+    """Return the uids of the loaded licences whose source files changed since their last update."""
+    if not force:
+        licences = licence_manager.filter_changed_licences(session, licences)
+    changed_licence_uids = sorted({licence["licence_uid"] for licence in licences})
+    logger.info("detected changes of licences: %r" % changed_licence_uids)
+    return changed_licence_uids
+
+
 def can_skip_datasets(
     new_git_hashes, last_run_status, force, filtering_kwargs, to_process
 ):
@@ -26,8 +26,6 @@ import urllib.parse
 from collections import ChainMap as _ChainMap
 from typing import Any, Dict
 
-from sqlalchemy import inspect
-
 _sentinel_dict: Dict[str, str] = {}
 
 
@@ -68,6 +66,21 @@ class CADSTemplate(string.Template):
         return self.pattern.sub(convert, self.template)
 
 
+def get_template_keys(text: str, template_class=CADSTemplate) -> set[str]:
+    """
+    Return the keys of the variables used in a template text.
+
+    :param text: template text
+    :param template_class: class to be used for templating
+    :return: set of the keys found
+    """
+    return {
+        mo.group("braced")
+        for mo in template_class.pattern.finditer(text)
+        if mo.group("braced") is not None
+    }
+
+
 def list_render(
     input_list: list[Any], context: dict[str, Any], template_class=CADSTemplate
 ) -> list[Any]:
@@ -211,6 +224,13 @@ def file2hash(file_path, the_hash=None):
     return the_hash
 
 
+def data2hash(data: Any) -> str:
+    """Return the MD5 hex digest of bytes, or of the json serialization of data."""
+    if not isinstance(data, bytes):
+        data = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.md5(data).hexdigest()
+
+
 def folder2hash(folder_path, the_hash=None, ignore_names=(".git",)):
     """Return a MD5 hash object of the folder contents."""
     if the_hash is None:
@@ -251,7 +271,9 @@ def normalize_abstract(text: str) -> str:
 
 def object_as_dict(obj: Any) -> dict[str, Any]:
     """Convert a sqlalchemy object in a python dictionary."""
-    return {c.key: getattr(obj, c.key) for c in inspect(obj).mapper.column_attrs}
+    import sqlalchemy as sa  # imported here for a fast startup of the CLI
+
+    return {c.key: getattr(obj, c.key) for c in sa.inspect(obj).mapper.column_attrs}
 
 
 def str2bool(value: str, raise_if_unknown=True, default=False):
@@ -14,19 +14,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
 import datetime
 import enum
+import functools
 import glob
 import json
 import logging
 import os
-from typing import Any
+import time
+from typing import Any, Dict, Iterator, List
 
 import cads_common.logging
 
-from cads_catalogue import layout_manager, utils
+from cads_catalogue import parsed_dataset, utils
 
 logger = logging.getLogger(__name__)
+# maximum number of problems reported for each analysis of constraints.json
+MAX_REPORTED_CONSTRAINTS = 10
 
 
 class ValidationLogLevel(enum.Enum):
@@ -37,6 +42,34 @@ class ValidationLogLevel(enum.Enum):
     error = "error"
 
 
+class ValidationReportFormat(enum.Enum):
+    """Format of the validation report."""
+
+    text = "text"
+    json = "json"
+
+
+class RecordsCollector(logging.Handler):
+    """Logging handler collecting the log records of the validations."""
+
+    def __init__(self, level: int | str = logging.NOTSET) -> None:
+        super().__init__(level=level)
+        self.setFormatter(logging.Formatter("%(message)s"))
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+    def pop_messages(self) -> List[Dict[str, str]]:
+        """Return level and message of the records collected, and clear them."""
+        messages = [
+            {"level": r.levelname.lower(), "message": self.format(r)}
+            for r in self.records
+        ]
+        self.records = []
+        return messages
+
+
 def is_parsable_as_date(value, pattern="%Y-%m-%d", allow_none=True):
     """Return true only if a value is parsable as a valid date."""
     if allow_none and value is None:
@@ -79,20 +112,19 @@ def check_values(input_obj, values_to_exclude=[]):
 
 
 def validate_base_json(folder, file_name, required=True):
-    """Do a base validation of a json file inside a folder."""
+    """Do a base validation of a json file inside a folder (or a parsed dataset)."""
     logger.info(f"-starting validation of {file_name}-")
-    file_path = os.path.join(folder, file_name)
-    if not os.path.isfile(file_path):
+    dataset = parsed_dataset.get_parsed_dataset(folder)
+    if not dataset.isfile(file_name):
         if required:
             logger.error(f"{file_name} not found")
         return
 
-    with open(file_path) as fp:
-        try:
-            data = json.load(fp)
-        except Exception:  # noqa
-            logger.exception(f"{file_name} is not a valid json")
-            return
+    try:
+        data = dataset.load_json(file_name)
+    except Exception:  # noqa
+        logger.exception(f"{file_name} is not a valid json")
+        return
     return data
 
 
@@ -153,38 +185,34 @@ def validate_stringchoicewidget(widget_data: dict[str, Any]):
 def validate_adaptors(dataset_folder):
     """Validate adaptor information of a dataset."""
     logger.info("-starting validation of adaptors-")
-    adaptor_conf_file_path = os.path.join(dataset_folder, "adaptor.json")
-    adaptor_code_file_path = os.path.join(dataset_folder, "adaptor.py")
-    if not os.path.isfile(adaptor_conf_file_path):
-        if os.path.isfile(adaptor_code_file_path):
+    dataset = parsed_dataset.get_parsed_dataset(dataset_folder)
+    if not dataset.isfile("adaptor.json"):
+        if dataset.isfile("adaptor.py"):
             logger.error("found adaptor.py without adaptor.json")
         return
 
-    with open(adaptor_conf_file_path) as fp:
-        try:
-            data = json.load(fp)
-        except Exception:  # noqa
-            logger.exception("adaptor.json is not a valid json")
-            return
+    try:
+        data = dataset.load_json("adaptor.json")
+    except Exception:  # noqa
+        logger.exception("adaptor.json is not a valid json")
+        return
 
     entry_point = data.get("entry_point")
     if not entry_point:
         return
 
-    adaptor_code_file_path = os.path.join(dataset_folder, "adaptor.py")
     if ":" in entry_point:
-        if os.path.isfile(adaptor_code_file_path):
+        if dataset.isfile("adaptor.py"):
             logger.error(
                 f"found adaptor.py: remove it or change inconsistent entry_point '{entry_point}'"
             )
     else:
-        if not os.path.isfile(adaptor_code_file_path):
+        if not dataset.isfile("adaptor.py"):
             logger.error(
                 f"adaptor.py not found: add it or change inconsistent entry_point '{entry_point}'"
             )
         else:
-            with open(adaptor_code_file_path) as fp:
-                code = fp.read()
+            code = dataset.read_text("adaptor.py")
             if entry_point not in code:
                 logger.error(f"class name '{entry_point}' not found in adaptor.py")
 
@@ -196,9 +224,56 @@ def validate_constraints(dataset_folder):
     if not data:  # file not existing or not parsable
         return
     check_values(data, values_to_exclude=[None])
+    analyse_constraints(dataset_folder, data)
     return data
 
 
+def analyse_constraints(dataset_folder, data):
+    """Check duplicated and subsumed constraints and their consistency with form.json."""
+    try:
+        # the analysis is vectorized with NumPy, an optional dependency
+        from cads_catalogue import constraints
+    except ImportError:
+        logger.info("NumPy not available: skipping the analysis of constraints.json")
+        return
+    if not isinstance(data, list) or not all(isinstance(c, dict) for c in data):
+        logger.error("constraints.json is not a list of dictionaries")
+        return
+    try:
+        encoded = constraints.encode_constraints(data)
+    except TypeError:
+        logger.exception("constraints.json has values not hashable")
+        return
+    stats = constraints.constraints_statistics(encoded)
+    logger.info(
+        f"found {stats['constraints']} constraints allowing "
+        f"{stats['combinations']} combinations"
+    )
+    for label, pairs in [
+        ("a duplicate of", constraints.find_duplicates(encoded)),
+        ("included in", constraints.find_subsumed(encoded)),
+    ]:
+        for i, j in pairs[:MAX_REPORTED_CONSTRAINTS]:
+            logger.warning(f"constraint #{i} is {label} constraint #{j}")
+        if len(pairs) > MAX_REPORTED_CONSTRAINTS:
+            logger.warning(f"...other {len(pairs) - MAX_REPORTED_CONSTRAINTS} found")
+
+    dataset = parsed_dataset.get_parsed_dataset(dataset_folder)
+    # problems of form.json are reported by validate_form
+    try:
+        form_data = dataset.load_json("form.json")
+    except Exception:  # noqa
+        return
+    unknown_widgets, unknown_values = constraints.check_against_form(encoded, form_data)
+    for widget in unknown_widgets:
+        logger.warning(f"widget '{widget}' of constraints.json not found in form.json")
+    for widget, values in unknown_values.items():
+        logger.error(
+            f"values of widget '{widget}' of constraints.json not found in form.json: "
+            f"{values[:MAX_REPORTED_CONSTRAINTS]}"
+        )
+
+
 def validate_form(dataset_folder):
     """Validate form.json of a dataset."""
     file_name = "form.json"
@@ -218,14 +293,17 @@ def validate_form(dataset_folder):
 def validate_layout(dataset_folder):
     """Validate layout.json of a dataset."""
     file_name = "layout.json"
-    layout_data = validate_base_json(dataset_folder, file_name)
+    dataset = parsed_dataset.get_parsed_dataset(dataset_folder)
+    layout_data = validate_base_json(dataset, file_name)
     if not layout_data:  # file not existing or not parsable
         return
-    # validate for images
+    # validate for images (layout_manager imports the object storage client)
+    from cads_catalogue import layout_manager
+
     try:
         layout_manager.transform_image_blocks(
             layout_data,
-            dataset_folder,
+            dataset.folder_path,
             "validations",
             None,
             disable_upload=True,
@@ -409,26 +487,32 @@ def validate_variables(dataset_folder):
     return validate_base_json(dataset_folder, file_name, required=False)
 
 
-def validate_dataset(dataset_folder: str, loglevel: str | None = "info") -> None:
+def validate_dataset_report(
+    dataset_folder: str | parsed_dataset.ParsedDataset,
+    loglevel: str = "info",
+    propagate: bool = False,
+) -> Dict[str, Any]:
     """
-    Validate a dataset folder for the catalogue manager.
+    Run all the validators on a dataset folder and return the report of the validation.
+
+    The files of the dataset are read and parsed once and shared by all the validators.
 
     Parameters
     ----------
-    dataset_folder: dataset folder path
+    dataset_folder: dataset folder path, or its parsed dataset
+    loglevel: minimum log level of the messages to report
+    propagate: if True, log messages are also shown by the configured logging
+
+    Returns
+    -------
+    dict: report with number of errors/warnings and, for each validator, its
+        running time (in seconds) and the messages logged
     """
-    if loglevel is None:
-        cads_common.logging.logging_configure(format="%(levelname)-7s %(message)s")
-    else:
-        cads_common.logging.logging_configure(
-            format="%(levelname)-7s %(message)s", level=loglevel.upper()
-        )
-    resource_uid = os.path.basename(dataset_folder.rstrip(os.sep))
-    print(f"---starting validation of resource {resource_uid}---")
     # for all validators, input folder is the folder where metadata.json is located
-    input_folder = os.path.join(dataset_folder, "json-config")
-    if not os.path.isfile(os.path.join(input_folder, "metadata.json")):
-        input_folder = dataset_folder
+    if isinstance(dataset_folder, parsed_dataset.ParsedDataset):
+        dataset = dataset_folder
+    else:
+        dataset = parsed_dataset.ParsedDataset.from_dataset_folder(dataset_folder)
     validators = [
         validate_metadata_json,
         validate_adaptors,
@@ -438,35 +522,150 @@ def validate_dataset(dataset_folder: str, loglevel: str | None = "info") -> None
         validate_mapping,
         validate_variables,
     ]
-    for validator in validators:
-        try:
-            validator(input_folder)
-        except Exception:
-            logger.exception(
-                f"unexpected error running {validator.__name__}. Error follows."
-            )
+    report: Dict[str, Any] = {
+        "resource_uid": dataset.resource_uid,
+        "errors": 0,
+        "warnings": 0,
+        "time": 0.0,
+        "validators": [],
+    }
+    collector = RecordsCollector(level=loglevel.upper())
+    old_level, old_propagate = logger.level, logger.propagate
+    logger.addHandler(collector)
+    logger.setLevel(loglevel.upper())
+    logger.propagate = propagate
+    try:
+        for validator in validators:
+            start_time = time.perf_counter()
+            try:
+                validator(dataset)
+            except Exception:
+                logger.exception(
+                    f"unexpected error running {validator.__name__}. Error follows."
+                )
+            messages = collector.pop_messages()
+            validator_report = {
+                "validator": validator.__name__,
+                "time": round(time.perf_counter() - start_time, 6),
+                "errors": len([m for m in messages if m["level"] == "error"]),
+                "warnings": len([m for m in messages if m["level"] == "warning"]),
+                "messages": messages,
+            }
+            report["errors"] += validator_report["errors"]
+            report["warnings"] += validator_report["warnings"]
+            report["time"] += validator_report["time"]
+            report["validators"].append(validator_report)
+    finally:
+        logger.removeHandler(collector)
+        logger.setLevel(old_level)
+        logger.propagate = old_propagate
+    report["time"] = round(report["time"], 6)
+    return report
+
+
+def print_dataset_report(report: Dict[str, Any]) -> None:
+    """Print the report of the validation of a dataset as text."""
+    print(f"---starting validation of resource {report['resource_uid']}---")
+    for validator_report in report["validators"]:
+        for message in validator_report["messages"]:
+            print(f"{message['level'].upper():7} {message['message']}")
+    print()
+
+
+def validate_dataset(
+    dataset_folder: str, loglevel: str | None = "info"
+) -> Dict[str, Any]:
+    """
+    Validate a dataset folder for the catalogue manager.
+
+    Parameters
+    ----------
+    dataset_folder: dataset folder path
+    loglevel: minimum log level to show on screen
+
+    Returns
+    -------
+    dict: the report of the validation (see `validate_dataset_report`)
+    """
+    if loglevel is None:
+        cads_common.logging.logging_configure(format="%(levelname)-7s %(message)s")
+    else:
+        cads_common.logging.logging_configure(
+            format="%(levelname)-7s %(message)s", level=loglevel.upper()
+        )
+    resource_uid = os.path.basename(dataset_folder.rstrip(os.sep))
+    print(f"---starting validation of resource {resource_uid}---")
+    report = validate_dataset_report(
+        dataset_folder,
+        loglevel=logging.getLevelName(logging.getLogger().getEffectiveLevel()),
+        propagate=True,
+    )
     print()
+    return report
 
 
-def validate_datasets(datasets_folder: str, loglevel: str = "info") -> None:
+def validate_datasets(
+    datasets_folder: str,
+    loglevel: str = "info",
+    jobs: int = 1,
+    report_format: str = "text",
+) -> int:
     """
     Explore and report subfolders to validate contents as valid datasets for the catalogue manager.
 
+    With more than one job, datasets are validated in a pool of processes and their
+    reports are printed in order when ready. With format 'json', the report of
+    each dataset is printed as a line of JSON (JSONL).
+
     Parameters
     ----------
     datasets_folder: the root folder where to search dataset subfolders in
     loglevel: minimum log level to show on screen
+    jobs: number of processes validating datasets
+    report_format: 'text' or 'json'
+
+    Returns
+    -------
+    int: number of datasets with errors
     """
-    cads_common.logging.logging_configure(
-        format="%(levelname)-7s %(message)s", level=loglevel.upper()
-    )
     exclude_folders = (".git",)
-    print(f"----starting validations of root folder {datasets_folder}----")
-    # load metadata of each resource from files and sync each resource in the db
+    dataset_folders = []
     for dataset_folder in sorted(glob.glob(os.path.join(datasets_folder, "*/"))):
         resource_uid = os.path.basename(dataset_folder.rstrip(os.sep))
         if resource_uid in exclude_folders:
             logger.debug(f"excluding folder {resource_uid}")
             continue
-        validate_dataset(dataset_folder, loglevel=None)
-    print("----end of validations----")
+        dataset_folders.append(dataset_folder)
+    if report_format == "text" and jobs <= 1:
+        cads_common.logging.logging_configure(
+            format="%(levelname)-7s %(message)s", level=loglevel.upper()
+        )
+        print(f"----starting validations of root folder {datasets_folder}----")
+        reports: Iterator[dict[str, Any]] = (
+            validate_dataset(f, loglevel=None) for f in dataset_folders
+        )
+        failed = len([r for r in reports if r["errors"]])
+        print("----end of validations----")
+        return failed
+
+    validate = functools.partial(validate_dataset_report, loglevel=loglevel)
+    if report_format == "text":
+        print(f"----starting validations of root folder {datasets_folder}----")
+    failed = 0
+    executor = None
+    if jobs > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    try:
+        reports = (executor.map if executor else map)(validate, dataset_folders)
+        for report in reports:
+            failed += bool(report["errors"])
+            if report_format == "json":
+                print(json.dumps(report), flush=True)
+            else:
+                print_dataset_report(report)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+    if report_format == "text":
+        print("----end of validations----")
+    return failed
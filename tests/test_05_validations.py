@@ -1,7 +1,14 @@
+import json
 import logging
+import os
+import pathlib
+import shutil
 
 from cads_catalogue import validations
 
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TESTDATA_PATH = os.path.join(THIS_PATH, "data")
+
 
 def test_validate_stringchoicewidget(caplog) -> None:
     widget_data = {
@@ -99,3 +106,45 @@ def test_validate_stringchoicewidget(caplog) -> None:
         log_msgs = [r.msg for r in caplog.records]
         assert not log_msgs
     caplog.clear()
+
+
+def test_validate_datasets_json(tmp_path: pathlib.Path, capsys) -> None:
+    for dataset_folder in (
+        "reanalysis-era5-land",
+        "reanalysis-era5-land-monthly-means",
+    ):
+        shutil.copytree(
+            os.path.join(TESTDATA_PATH, "cads-forms-json", dataset_folder),
+            tmp_path / dataset_folder,
+        )
+    (tmp_path / "empty-dataset").mkdir()
+
+    failed = validations.validate_datasets(
+        str(tmp_path), loglevel="warning", jobs=2, report_format="json"
+    )
+    assert failed == 1
+    reports = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["resource_uid"] for r in reports] == [
+        "empty-dataset",
+        "reanalysis-era5-land-monthly-means",
+        "reanalysis-era5-land",
+    ]
+    assert reports[0]["errors"] == 4
+    assert {"level": "error", "message": "metadata.json not found"} in reports[0][
+        "validators"
+    ][0]["messages"]
+    assert reports[2]["errors"] == 0
+    assert reports[2]["warnings"] == 7
+    assert [v["validator"] for v in reports[2]["validators"]] == [
+        "validate_metadata_json",
+        "validate_adaptors",
+        "validate_constraints",
+        "validate_form",
+        "validate_layout",
+        "validate_mapping",
+        "validate_variables",
+    ]
+    for report in reports:
+        for validator_report in report["validators"]:
+            assert validator_report["time"] >= 0
+            assert all(m["level"] != "info" for m in validator_report["messages"])
@@ -0,0 +1,85 @@
+import builtins
+import collections
+import os
+import pathlib
+
+import pytest
+import pytest_mock
+
+from cads_catalogue import manager, parsed_dataset, validations
+
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TESTDATA_PATH = os.path.join(THIS_PATH, "data")
+
+
+def test_parsed_dataset(tmp_path: pathlib.Path) -> None:
+    dataset_folder = tmp_path / "a-dataset"
+    json_folder = dataset_folder / "json-config"
+    json_folder.mkdir(parents=True)
+    (json_folder / "metadata.json").write_text('{"title": "a title"}')
+    (json_folder / "broken.json").write_text("{not a json")
+    (json_folder / "requests.yaml").write_text("- collection_id: a-dataset\n")
+    (json_folder / "a-folder.json").mkdir()
+
+    dataset = parsed_dataset.ParsedDataset.from_dataset_folder(dataset_folder)
+    assert dataset.resource_uid == "a-dataset"
+    assert dataset.folder_path == str(json_folder)
+    assert dataset.file_names() == {"metadata.json", "broken.json", "requests.yaml"}
+    assert dataset.isfile("metadata.json")
+    assert not dataset.isfile("a-folder.json")
+
+    metadata = dataset.load_json("metadata.json")
+    assert metadata == {"title": "a title"}
+    # parsed once
+    assert dataset.load_json("metadata.json") is metadata
+    assert dataset.load_yaml("requests.yaml") == [{"collection_id": "a-dataset"}]
+    with pytest.raises(ValueError):
+        dataset.load_json("broken.json")
+    # parsing errors are raised again
+    with pytest.raises(ValueError):
+        dataset.load_json("broken.json")
+    with pytest.raises(FileNotFoundError):
+        dataset.read_text("not-existing.json")
+
+    # without json-config, the folder is the dataset folder
+    (json_folder / "metadata.json").unlink()
+    dataset = parsed_dataset.ParsedDataset.from_dataset_folder(dataset_folder)
+    assert dataset.folder_path == str(dataset_folder)
+    assert dataset.resource_uid == "a-dataset"
+
+    assert parsed_dataset.get_parsed_dataset(dataset) is dataset
+    assert parsed_dataset.get_parsed_dataset(json_folder).folder_path == str(
+        json_folder
+    )
+
+
+def test_validate_and_load_once(mocker: pytest_mock.MockerFixture) -> None:
+    resource_folder_path = os.path.join(
+        TESTDATA_PATH, "cads-forms-json", "reanalysis-era5-land"
+    )
+    expected_resource = manager.load_resource_from_folder(resource_folder_path)
+    expected_report = validations.validate_dataset_report(resource_folder_path)
+
+    opened: collections.Counter = collections.Counter()
+    builtin_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        opened[str(file)] += 1
+        return builtin_open(file, *args, **kwargs)
+
+    mocker.patch("builtins.open", side_effect=counting_open)
+    dataset = parsed_dataset.ParsedDataset.from_dataset_folder(resource_folder_path)
+    report = validations.validate_dataset_report(dataset)
+    resource = manager.load_resource_from_folder(resource_folder_path, dataset=dataset)
+
+    assert resource == expected_resource
+    for validator_report in report["validators"] + expected_report["validators"]:
+        validator_report.pop("time")
+    report.pop("time")
+    expected_report.pop("time")
+    assert report == expected_report
+    dataset_files = {
+        k: v for k, v in opened.items() if k.startswith(resource_folder_path)
+    }
+    assert dataset_files
+    assert set(dataset_files.values()) == {1}
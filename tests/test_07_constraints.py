@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from cads_catalogue import constraints, validations  # noqa: E402
+
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TESTDATA_PATH = os.path.join(THIS_PATH, "data")
+
+CONSTRAINTS = [
+    {"year": ["2000", "2001"], "month": ["01", "02"], "format": ["grib"]},
+    {"year": ["2000"], "month": ["01"], "format": ["grib"]},  # included in #0
+    {"year": ["2001", "2000"], "month": ["02", "01"], "format": ["grib"]},  # = #0
+    {"year": ["2002"], "month": ["01"]},
+    {"year": ["2002"], "month": ["01"], "format": []},  # = #3
+    {"year": ["2002"], "month": ["03"], "format": ["netcdf"]},
+]
+FORM = [
+    {"name": "year", "type": "StringListWidget", "details": {"values": ["2000"]}},
+    {
+        "name": "month",
+        "type": "StringListArrayWidget",
+        "details": {
+            "groups": [
+                {"label": "a", "values": ["01"]},
+                {"label": "b", "groups": [{"label": "c", "values": ["02", "03"]}]},
+            ]
+        },
+    },
+    {"name": "area", "type": "GeographicExtentWidget", "details": {}},
+]
+
+
+def test_encode_constraints() -> None:
+    encoded = constraints.encode_constraints(CONSTRAINTS)
+    assert len(encoded) == 6
+    assert encoded.widgets == ["format", "month", "year"]
+    assert encoded.values == {
+        "format": ["grib", "netcdf"],
+        "month": ["01", "02", "03"],
+        "year": ["2000", "2001", "2002"],
+    }
+    assert encoded.masks["year"].tolist()[0] == [True, True, False]
+    assert encoded.present.tolist()[3] == [False, True, True]
+    assert encoded.present.tolist()[4] == [False, True, True]
+
+    decoded = constraints.decode_constraints(encoded)
+    assert decoded[0] == {
+        "format": ["grib"],
+        "month": ["01", "02"],
+        "year": ["2000", "2001"],
+    }
+    assert decoded[4] == {"month": ["01"], "year": ["2002"]}
+
+    assert constraints.constraints_statistics(encoded) == {
+        "constraints": 6,
+        "combinations": 4 + 1 + 4 + 1 + 1 + 1,
+        "widgets": {"format": 2, "month": 3, "year": 3},
+    }
+    empty = constraints.encode_constraints([])
+    assert len(empty) == 0
+    assert constraints.find_duplicates(empty) == []
+    assert constraints.find_subsumed(empty) == []
+
+
+def test_find_duplicates_and_subsumed() -> None:
+    encoded = constraints.encode_constraints(CONSTRAINTS)
+    assert constraints.find_duplicates(encoded) == [(2, 0), (4, 3)]
+    # the first constraint including it is reported
+    assert constraints.find_subsumed(encoded) == [(1, 0)]
+
+
+def test_check_against_form() -> None:
+    assert constraints.form_widgets_values(FORM) == {
+        "year": {"2000"},
+        "month": {"01", "02", "03"},
+        "area": None,
+    }
+    encoded = constraints.encode_constraints(CONSTRAINTS)
+    assert constraints.check_against_form(encoded, FORM) == (
+        ["format"],
+        {"year": ["2001", "2002"]},
+    )
+
+
+def test_validate_constraints(tmp_path, caplog) -> None:
+    caplog.set_level(logging.INFO)
+    with open(tmp_path / "constraints.json", "w") as fp:
+        json.dump(CONSTRAINTS, fp)
+    with open(tmp_path / "form.json", "w") as fp:
+        json.dump(FORM, fp)
+    validations.validate_constraints(str(tmp_path))
+    messages = [(r.levelname, r.getMessage()) for r in caplog.records]
+    assert ("INFO", "found 6 constraints allowing 12 combinations") in messages
+    assert ("WARNING", "constraint #2 is a duplicate of constraint #0") in messages
+    assert ("WARNING", "constraint #1 is included in constraint #0") in messages
+    assert (
+        "WARNING",
+        "widget 'format' of constraints.json not found in form.json",
+    ) in messages
+    assert (
+        "ERROR",
+        "values of widget 'year' of constraints.json not found in form.json: "
+        "['2001', '2002']",
+    ) in messages
+
+    # test data are consistent
+    caplog.clear()
+    resource_folder_path = os.path.join(
+        TESTDATA_PATH, "cads-forms-json", "reanalysis-era5-land"
+    )
+    validations.validate_constraints(resource_folder_path)
+    assert [r for r in caplog.records if r.levelname in ("WARNING", "ERROR")] == []
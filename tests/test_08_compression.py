@@ -0,0 +1,85 @@
+import pytest
+import pytest_mock
+import sqlalchemy as sa
+
+pytest.importorskip("zstandard")
+
+from cads_catalogue import compression, database, manager  # noqa: E402
+
+
+def add_datasets(session: sa.orm.Session, count: int) -> None:
+    for i in range(count):
+        resource_uid = f"dataset{i}"
+        session.add(
+            database.Resource(
+                resource_uid=resource_uid, abstract="a", description={}, type="dataset"
+            )
+        )
+        constraints_data = [
+            {
+                "year": [str(year) for year in range(1950 + i, 2000 + j)],
+                "variable": [f"variable_{i}_{k}" for k in range(j % 7 + 1)],
+                "format": ["grib", "netcdf"],
+            }
+            for j in range(20)
+        ]
+        session.add(
+            database.ResourceData(
+                resource_uid=resource_uid, constraints_data=constraints_data
+            )
+        )
+    session.flush()
+
+
+def test_compress_all_constraints(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        add_datasets(session, 50)
+        expected = compression.get_constraints_data(session, "dataset1")
+        assert len(expected) == 20
+
+        # no dictionary
+        assert compression.compress_all_constraints(session) == 50
+        resource_data = session.scalars(
+            sa.select(database.ResourceData).filter_by(resource_uid="dataset1")
+        ).one()
+        assert resource_data.constraints_data is None
+        assert resource_data.zstd_dictionary_id is None
+        assert compression.get_constraints_data(session, "dataset1") == expected
+
+        # shared dictionary
+        zstd_dictionary_id = compression.train_dictionary(session, 4096)
+        assert zstd_dictionary_id is not None
+        compression.compress_all_constraints(session)
+        assert resource_data.zstd_dictionary_id == zstd_dictionary_id
+        compression.DICTIONARIES.clear()
+        assert compression.get_constraints_data(session, "dataset1") == expected
+        assert resource_data.data_hashes["constraints_zstd"]
+
+        # back uncompressed
+        compression.compress_all_constraints(session, compress=False)
+        assert resource_data.constraints_zstd is None
+        assert resource_data.constraints_data == expected
+        assert compression.get_constraints_data(session, "not-existing") is None
+
+
+def test_upsert_compressed_constraints(
+    session_obj: sa.orm.sessionmaker, mocker: pytest_mock.MockerFixture
+) -> None:
+    mocker.patch.object(compression, "COMPRESS_CONSTRAINTS", True)
+    assert compression.is_compression_enabled()
+    with session_obj() as session:
+        add_datasets(session, 1)
+        constraints_data = [{"year": ["2000"]}]
+        resource_data_attrs = {
+            "resource_uid": "dataset0",
+            "adaptor_configuration": None,
+            "form_data": None,
+            "mapping": None,
+            **compression.compress_constraints(session, constraints_data),
+        }
+        assert "constraints_zstd" in manager.upsert_resource_data(
+            session, resource_data_attrs
+        )
+        assert manager.upsert_resource_data(session, resource_data_attrs) == []
+        session.commit()
+        assert compression.get_constraints_data(session, "dataset0") == constraints_data
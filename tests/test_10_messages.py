@@ -1,7 +1,11 @@
 import datetime
+import json
 import operator
 import os.path
+import pathlib
 
+import frontmatter
+import pytest_mock
 import sqlalchemy as sa
 
 import cads_catalogue.database
@@ -148,6 +152,40 @@ def test_load_messages() -> None:
     ]
     loaded_msgs = messages.load_messages(msg_root)
     assert sorted(loaded_msgs, key=operator.itemgetter("date")) == expected_msgs
+    loaded_msgs = messages.load_messages(msg_root, max_workers=1)
+    assert sorted(loaded_msgs, key=operator.itemgetter("date")) == expected_msgs
+
+
+def test_parse_frontmatter() -> None:
+    for current_root, _, files in os.walk(TEST_MESSAGE_ROOT_PATH):
+        for current_file in files:
+            with open(os.path.join(current_root, current_file)) as fp:
+                text = fp.read()
+            md_obj = frontmatter.loads(text)
+            assert messages.parse_frontmatter(text) == (md_obj.metadata, md_obj.content)
+    assert messages.parse_frontmatter("no metadata\n") == ({}, "no metadata")
+    assert messages.parse_frontmatter("---\nnot closed: 1\n") == (
+        {},
+        "---\nnot closed: 1",
+    )
+
+
+def test_load_messages_cache(
+    tmp_path: pathlib.Path, mocker: pytest_mock.MockerFixture
+) -> None:
+    cache_path = tmp_path / "messages_cache.json"
+    loaded_msgs = messages.load_messages(TEST_MESSAGE_ROOT_PATH, cache_path=cache_path)
+    assert len(loaded_msgs) == 9
+    assert len(json.loads(cache_path.read_text())) == 9
+
+    # all the files are taken from the cache
+    spy = mocker.spy(messages, "parse_message_md")
+    cached_msgs = messages.load_messages(
+        TEST_MESSAGE_ROOT_PATH, max_workers=1, cache_path=cache_path
+    )
+    assert spy.call_count == 0
+    key = operator.itemgetter("message_uid")
+    assert sorted(cached_msgs, key=key) == sorted(loaded_msgs, key=key)
 
 
 def test_message_sync(session_obj: sa.orm.sessionmaker) -> None:
@@ -245,3 +283,92 @@ def test_message_sync(session_obj: sa.orm.sessionmaker) -> None:
                 continue
             assert getattr(db_message3, key) == value
         assert db_message3.resources == []
+
+
+def test_compile_entries() -> None:
+    exact_uids, pattern = messages.compile_entries(["dataset-a", "dataset-b"])
+    assert exact_uids == {"dataset-a", "dataset-b"}
+    assert pattern is None
+
+    exact_uids, pattern = messages.compile_entries(
+        ["dataset-a", "satellite-xxx", "xxx-era5_monthly"]
+    )
+    assert exact_uids == {"dataset-a"}
+    assert pattern is not None
+    assert pattern.fullmatch("satellite-sea-ice")
+    assert pattern.fullmatch("satellite-")
+    assert not pattern.fullmatch("a-satellite-sea-ice")
+    # as in SQL LIKE, '_' matches any single character
+    assert pattern.fullmatch("reanalysis-era5-monthly")
+    assert not pattern.fullmatch("reanalysis-era5-monthly-means")
+
+
+def test_messages_sync(session_obj: sa.orm.sessionmaker) -> None:
+    msgs = [
+        messages.md2message_record(
+            os.path.join(
+                TEST_MESSAGE_ROOT_PATH,
+                "contents",
+                "foo-bar",
+                "this-will-be-also-taken.md",
+            ),
+            "msg1",
+            is_global=False,
+        ),
+        messages.md2message_record(
+            os.path.join(
+                TEST_MESSAGE_ROOT_PATH,
+                "contents",
+                "foo-bar",
+                "this-will-be-also-taken.md",
+            ),
+            "msg2",
+            is_global=True,
+            site="cds",
+        ),
+    ]
+    msgs[0]["entries"] = ["dataset-a", "satellite-xxx"]
+    with session_obj() as session:
+        for resource_id, resource_uid in enumerate(
+            ["dataset-a", "dataset-b", "satellite-1", "satellite-2"], start=1
+        ):
+            session.add(
+                cads_catalogue.database.Resource(
+                    resource_id=resource_id,
+                    resource_uid=resource_uid,
+                    abstract="an abstract",
+                    description="",
+                    type="dataset",
+                )
+            )
+        session.commit()
+
+        message_ids = messages.messages_sync(session, msgs)
+        session.commit()
+        assert sorted(message_ids) == ["msg1", "msg2"]
+        resources_messages_query = sa.select(
+            cads_catalogue.database.ResourceMessage.message_id,
+            cads_catalogue.database.ResourceMessage.resource_id,
+        ).order_by("message_id", "resource_id")
+        assert session.execute(resources_messages_query).all() == [
+            (message_ids["msg1"], 1),
+            (message_ids["msg1"], 3),
+            (message_ids["msg1"], 4),
+        ]
+
+        # update of existing messages
+        msgs[0]["entries"] = ["dataset-b"]
+        msgs[1]["summary"] = "a new summary"
+        assert messages.messages_sync(session, msgs) == message_ids
+        session.commit()
+        assert session.execute(resources_messages_query).all() == [
+            (message_ids["msg1"], 2),
+        ]
+        assert (
+            session.scalar(
+                sa.select(cads_catalogue.database.Message.summary).filter_by(
+                    message_uid="msg2"
+                )
+            )
+            == "a new summary"
+        )
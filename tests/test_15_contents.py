@@ -8,7 +8,14 @@ import pytest
 import pytest_mock
 import sqlalchemy as sa
 
-from cads_catalogue import config, contents, layout_manager, object_storage, utils
+from cads_catalogue import (
+    config,
+    contents,
+    database,
+    layout_manager,
+    object_storage,
+    utils,
+)
 
 THIS_PATH = os.path.abspath(os.path.dirname(__file__))
 TESTDATA_PATH = os.path.join(THIS_PATH, "data")
@@ -94,6 +101,9 @@ def test_load_content_folder() -> None:
     ]
 
     effective_contents = contents.load_content_folder(content_folder)
+    assert effective_contents is not None
+    for effective_content in effective_contents:
+        assert len(effective_content.pop("sources_hash")) == 32
     assert effective_contents == expected_contents
 
     # templated content
@@ -123,8 +133,20 @@ def test_load_content_folder() -> None:
     ]
     global_context = contents.yaml2context(yaml_config)
     effective_contents = contents.load_content_folder(content_folder, global_context)
+    assert effective_contents is not None
+    sources_hash = effective_contents[0].pop("sources_hash")
     assert effective_contents == expected_contents
 
+    # the hash changes only if the part of the context used changes
+    global_context["ads"]["not_used_prop"] = "a value"
+    effective_contents = contents.load_content_folder(content_folder, global_context)
+    assert effective_contents is not None
+    assert effective_contents[0]["sources_hash"] == sources_hash
+    global_context["ads"]["apiSnippet"] = "a different snippet"
+    effective_contents = contents.load_content_folder(content_folder, global_context)
+    assert effective_contents is not None
+    assert effective_contents[0]["sources_hash"] != sources_hash
+
 
 def test_load_contents() -> None:
     yaml_config = os.path.join(TEST_CONTENT_ROOT_PATH, "template_config.yaml")
@@ -242,6 +264,8 @@ def test_load_contents() -> None:
         contents.load_contents(TEST_CONTENT_ROOT_PATH, global_context),
         key=itemgetter("slug", "site"),
     )
+    for effective_content in effective_contents:
+        assert len(effective_content.pop("sources_hash")) == 32
     assert effective_contents == expected_contents
 
 
@@ -383,6 +407,32 @@ def test_content_sync(
             assert getattr(db_content2, key) == value
 
 
+def test_resolve_keywords(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        keyword_ids = contents.resolve_keywords(
+            session, ["Provider: C3S", "Provider: C3S", "not compliant"]
+        )
+        session.commit()
+        assert list(keyword_ids) == ["Provider: C3S"]
+        # existing keywords are not inserted again
+        new_keyword_ids = contents.resolve_keywords(
+            session, ["Provider: C3S", "Spatial coverage: Global"]
+        )
+        session.commit()
+        assert new_keyword_ids["Provider: C3S"] == keyword_ids["Provider: C3S"]
+        assert (
+            session.scalar(sa.select(sa.func.count(database.ContentKeyword.keyword_id)))
+            == 2
+        )
+        keyword_obj = session.get(
+            database.ContentKeyword, new_keyword_ids["Spatial coverage: Global"]
+        )
+        assert keyword_obj.category_name == "Spatial coverage"  # type: ignore
+        assert keyword_obj.category_value == "Global"  # type: ignore
+        # datasets not in the db are excluded
+        assert contents.resolve_resource_ids(session, ["foo", "bar"]) == dict()
+
+
 def test_transform_layout(mocker: pytest_mock.MockerFixture):
     mocker.patch.object(object_storage, "store_file", return_value="an url")
     _store_layout_by_data = mocker.spy(layout_manager, "store_layout_by_data")
@@ -453,6 +503,117 @@ def test_transform_layout(mocker: pytest_mock.MockerFixture):
     ]
 
 
+def test_prepare_contents(mocker: pytest_mock.MockerFixture) -> None:
+    _store_file = mocker.patch.object(
+        object_storage, "store_file", return_value="an url"
+    )
+    my_settings_dict = {
+        "object_storage_url": "https://object/storage/url/",
+        "storage_admin": "admin1",
+        "storage_password": "secret1",
+        "catalogue_bucket": "mycatalogue_bucket",
+        "document_storage_url": "https://document/storage/url/",
+    }
+    storage_settings = config.ObjectStorageSettings(**my_settings_dict)
+    yaml_config = os.path.join(TEST_CONTENT_ROOT_PATH, "template_config.yaml")
+    global_context = contents.yaml2context(yaml_config)
+    loaded_contents = contents.load_contents(TEST_CONTENT_ROOT_PATH, global_context)
+    # load is not affected by the number of workers
+    assert loaded_contents == contents.load_contents(
+        TEST_CONTENT_ROOT_PATH, global_context, max_workers=1
+    )
+    # a content with a not renderable layout is excluded
+    effective_contents = contents.prepare_contents(
+        loaded_contents, storage_settings, {}, max_workers=4
+    )
+    assert [(c["site"], c["slug"]) for c in effective_contents] == [
+        ("cds", "copernicus-interactive-climates-atlas")
+    ]
+    _store_file.reset_mock()
+    effective_contents = contents.prepare_contents(
+        loaded_contents, storage_settings, global_context, max_workers=4
+    )
+    assert [(c["site"], c["slug"]) for c in effective_contents] == [
+        (c["site"], c["slug"]) for c in loaded_contents
+    ]
+    for content in effective_contents:
+        assert content["layout"] in (None, "an url")
+        assert content["image"] in (None, "an url")
+    # 1 image + 3 layouts
+    assert _store_file.call_count == 4
+
+
+def test_update_catalogue_contents_skip(
+    session_obj: sa.orm.sessionmaker, mocker: pytest_mock.MockerFixture
+) -> None:
+    _store_file = mocker.patch.object(
+        object_storage, "store_file", return_value="an url"
+    )
+    my_settings_dict = {
+        "object_storage_url": "https://object/storage/url/",
+        "storage_admin": "admin1",
+        "storage_password": "secret1",
+        "catalogue_bucket": "mycatalogue_bucket",
+        "document_storage_url": "https://document/storage/url/",
+    }
+    storage_settings = config.ObjectStorageSettings(**my_settings_dict)
+    yaml_config = os.path.join(TEST_CONTENT_ROOT_PATH, "template_config.yaml")
+    with session_obj() as session:
+        involved = contents.update_catalogue_contents(
+            session, TEST_CONTENT_ROOT_PATH, storage_settings, yaml_path=yaml_config
+        )
+        session.commit()
+        assert len(involved) == 4
+        db_hashes = session.execute(
+            sa.select(database.Content.slug, database.Content.sources_hash)
+        ).all()
+        assert len(db_hashes) == 4
+        assert all(len(r.sources_hash) == 32 for r in db_hashes)
+        assert _store_file.call_count == 4
+
+        # nothing changed: no content is updated
+        _store_file.reset_mock()
+        involved = contents.update_catalogue_contents(
+            session, TEST_CONTENT_ROOT_PATH, storage_settings, yaml_path=yaml_config
+        )
+        session.commit()
+        assert len(involved) == 4
+        assert _store_file.call_count == 0
+
+        # forcing updates all the contents
+        involved = contents.update_catalogue_contents(
+            session,
+            TEST_CONTENT_ROOT_PATH,
+            storage_settings,
+            yaml_path=yaml_config,
+            force=True,
+        )
+        session.commit()
+        assert _store_file.call_count == 4
+
+        # a changed hash triggers the update of the only content involved
+        _store_file.reset_mock()
+        session.execute(
+            sa.update(database.Content)
+            .where(database.Content.slug == "copernicus-interactive-climates-atlas")
+            .values(sources_hash="an old hash")
+        )
+        session.commit()
+        contents.update_catalogue_contents(
+            session, TEST_CONTENT_ROOT_PATH, storage_settings, yaml_path=yaml_config
+        )
+        session.commit()
+        assert _store_file.call_count == 1
+        assert (
+            session.scalar(
+                sa.select(database.Content.sources_hash).where(
+                    database.Content.slug == "copernicus-interactive-climates-atlas"
+                )
+            )
+            != "an old hash"
+        )
+
+
 # def test_update_catalogue_contents(
 #         session_obj: sa.orm.sessionmaker,
 #         mocker: pytest_mock.MockerFixture,
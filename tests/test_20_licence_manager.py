@@ -82,7 +82,9 @@ def test_licence_sync(
         session.commit()
         db_licences = session.scalars(sa.select(database.Licence)).all()
         assert len(db_licences) == 1
-        assert utils.object_as_dict(db_licences[0]) == licence_md
+        db_licence_md = utils.object_as_dict(db_licences[0])
+        assert len(db_licence_md.pop("sources_hash")) == 32
+        assert db_licence_md == licence_md
 
     assert patch.call_count == 2
     assert (
@@ -121,7 +123,9 @@ def test_licence_sync(
         session.commit()
         db_licences = session.scalars(sa.select(database.Licence)).all()
         assert len(db_licences) == 1
-        assert utils.object_as_dict(db_licences[0]) == licence_md2
+        db_licence_md = utils.object_as_dict(db_licences[0])
+        assert len(db_licence_md.pop("sources_hash")) == 32
+        assert db_licence_md == licence_md2
 
     # reset globals for tests following
     config.dbsettings = None
@@ -195,7 +199,8 @@ def test_load_licences_from_folder() -> None:
         licence_manager.load_licences_from_folder(licences_folder_path),
         key=operator.itemgetter("licence_uid"),
     )
-
+    for licence in licences:
+        assert len(licence.pop("sources_hash")) == 32
     assert licences == expected_licences
 
 
@@ -212,7 +217,7 @@ def test_update_catalogue_licences(
         "document_storage_url": "my/url",
     }
     storage_settings = config.ObjectStorageSettings(**my_settings_dict)
-    _ = mocker.patch(
+    _store_file = mocker.patch(
         "cads_catalogue.object_storage.store_file",
         return_value="an url",
     )
@@ -234,6 +239,40 @@ def test_update_catalogue_licences(
                 )
             ).all()
             assert len(licence_obj) == 1
+        # md + pdf for each licence, except 1 external URL
+        assert _store_file.call_count == 7
+
+        # licences not changed are not updated
+        _store_file.reset_mock()
+        assert (
+            licence_manager.update_catalogue_licences(
+                session, licences_folder_path, storage_settings
+            )
+            == licence_attrs
+        )
+        assert _store_file.call_count == 0
+
+        # a changed licence is the only one updated
+        session.execute(
+            sa.update(database.Licence)
+            .filter_by(licence_uid="eumetsat-cm-saf")
+            .values(sources_hash="an old hash")
+        )
+        licences = licence_manager.load_licences_from_folder(licences_folder_path)
+        changed_licences = licence_manager.filter_changed_licences(session, licences)
+        assert [r["licence_uid"] for r in changed_licences] == ["eumetsat-cm-saf"]
+        licence_manager.update_catalogue_licences(
+            session, licences_folder_path, storage_settings
+        )
+        assert _store_file.call_count == 1
+        assert licence_manager.filter_changed_licences(session, licences) == []
+
+        # force mode updates all the licences
+        _store_file.reset_mock()
+        licence_manager.update_catalogue_licences(
+            session, licences_folder_path, storage_settings, force=True
+        )
+        assert _store_file.call_count == 7
 
 
 def test_remove_orphan_licences(session_obj: sa.orm.sessionmaker) -> None:
@@ -1575,6 +1575,11 @@ def test_load_resource_from_folder(folder: str) -> None:
             },
         ],
         "adaptor": None,
+        "config_files_hashes": {
+            "adaptor.json": "0836f2c057de8dacadd735318aefeab6",
+            "constraints.json": "fe10fd0bbfaec3b252aac5aa21b3dbcd",
+            "mapping.json": None,
+        },
         "documentation": [],
         "abstract": "ERA5-Land is a reanalysis dataset providing a consistent view of the evolution "
         "of land variables over several decades at an enhanced resolution compared to ERA5. "
@@ -1747,7 +1752,7 @@ def test_resource_sync(
         utils.compare_resources_with_dumped_file(
             all_db_resources,
             os.path.join(TESTDATA_PATH, "dumped_resources1.txt"),
-            exclude_fields=("record_update", "resource_id"),
+            exclude_fields=("record_update", "resource_id", "row_fingerprint"),
         )
         assert session.execute(
             sa.text(
@@ -1817,7 +1822,12 @@ def test_resource_sync(
         utils.compare_resources_with_dumped_file(
             all_db_resources,
             os.path.join(TESTDATA_PATH, "dumped_resources2.txt"),
-            exclude_fields=("record_update", "resource_id", "search_field"),
+            exclude_fields=(
+                "record_update",
+                "resource_id",
+                "row_fingerprint",
+                "search_field",
+            ),
         )
         assert set(
             session.execute(
@@ -1842,6 +1852,36 @@ def test_resource_sync(
             )
         ).all() == [(1, 2)]
 
+    # sync again the second dataset not changed: nothing is rewritten
+    resource_stmt = sa.text(
+        "select xmin::text, row_fingerprint, sources_hash from resources "
+        "where resource_uid = 'reanalysis-era5-land-monthly-means'"
+    )
+    associations_stmt = sa.text(
+        "select xmin::text, resource_id, licence_id from resources_licences "
+        "union all select xmin::text, resource_id, facet_id from resources_facets"
+    )
+    with session_obj() as session:
+        db_resource = session.execute(resource_stmt).one()
+        db_associations = session.execute(associations_stmt).all()
+        assert db_resource[1] is not None
+        manager.resource_sync(session, resource2, storage_settings)
+        session.commit()
+        assert session.execute(resource_stmt).one() == db_resource
+        assert session.execute(associations_stmt).all() == db_associations
+
+    # only the sources hash is changed: only the sources hash is rewritten
+    resource2["sources_hash"] = "a new sources hash"
+    with session_obj() as session:
+        db_obj = manager.resource_sync(session, resource2, storage_settings)
+        session.commit()
+        assert db_obj.sources_hash == "a new sources hash"
+        assert session.execute(resource_stmt).one()[1:] == (
+            db_resource[1],
+            "a new sources hash",
+        )
+        assert session.execute(associations_stmt).all() == db_associations
+
     # reset globals for tests following
     config.dbsettings = None
     config.storagesettings = None
@@ -1857,6 +1897,30 @@ def test_resource_sync(
             ("reanalysis-era5-land",),
         ]
 
+    # add costing to the adaptor of the remaining dataset
+    resource["adaptor_configuration"] = {"costing": {"max_costs": {"size": 10}}}
+    # hashes of the files loaded are no more valid
+    resource.pop("config_files_hashes")
+    with session_obj() as session:
+        manager.resource_sync(session, resource, storage_settings)
+        session.commit()
+        assert session.scalars(
+            sa.select(database.Resource.resource_uid).where(
+                database.Resource.has_adaptor_costing.is_(True)
+            )
+        ).all() == ["reanalysis-era5-land"]
+        assert session.scalars(
+            sa.select(database.ResourceData.adaptor_configuration)
+        ).all() == [{"costing": {"max_costs": {"size": 10}}}]
+
+
+def test_adaptor_has_costing() -> None:
+    assert manager.adaptor_has_costing({"costing": {}, "entry_point": "x"})
+    assert not manager.adaptor_has_costing({"entry_point": "x"})
+    assert not manager.adaptor_has_costing({"entry_point": {"costing": {}}})
+    assert manager.adaptor_has_costing(["costing"])
+    assert not manager.adaptor_has_costing(None)
+
 
 def test_find_related_resources():
     def _to_testable_structure(raw_related):
@@ -1960,3 +2024,196 @@ def test_find_related_resources():
     related = manager.find_related_resources([res1, res2])
 
     assert _to_testable_structure(related) == []
+
+
+def test_upsert_resource_data(session_obj: sa.orm.sessionmaker) -> None:
+    resource_data_attrs = {
+        "resource_uid": "dataset1",
+        "adaptor_configuration": {"entry_point": "an:adaptor"},
+        "constraints_data": [{"year": ["2000"]}],
+        "form_data": [{"name": "year"}],
+        "mapping": None,
+        "constraints_zstd": None,
+        "zstd_dictionary_id": None,
+    }
+    with session_obj() as session:
+        session.add(
+            database.Resource(
+                resource_uid="dataset1", abstract="a", description={}, type="dataset"
+            )
+        )
+        assert manager.upsert_resource_data(session, resource_data_attrs) == [
+            "adaptor_configuration",
+            "constraints_data",
+            "constraints_zstd",
+            "form_data",
+            "mapping",
+            "zstd_dictionary_id",
+        ]
+        # nothing changed: nothing written
+        assert manager.upsert_resource_data(session, resource_data_attrs) == []
+        resource_data_attrs["form_data"] = [{"name": "month"}]
+        assert manager.upsert_resource_data(session, resource_data_attrs) == [
+            "form_data"
+        ]
+        session.commit()
+        resource_data = session.scalars(sa.select(database.ResourceData)).one()
+        assert resource_data.form_data == [{"name": "month"}]
+        assert resource_data.constraints_data == [{"year": ["2000"]}]
+        assert resource_data.data_hashes["form_data"] == utils.data2hash(
+            [{"name": "month"}]
+        )
+
+
+def test_resources_sync_batch(
+    session_obj: sa.orm.sessionmaker, mocker: pytest_mock.MockerFixture
+) -> None:
+    storage_settings = config.ObjectStorageSettings(
+        object_storage_url="object/storage/url",
+        storage_admin="admin1",
+        storage_password="secret1",
+        catalogue_bucket="mycatalogue_bucket",
+        document_storage_url="my/url",
+    )
+    mocker.patch.object(object_storage, "store_file", return_value="an url")
+    licences_folder_path = os.path.join(TESTDATA_PATH, "cads-licences")
+    licences = licence_manager.load_licences_from_folder(licences_folder_path)
+    resource_uids = ["reanalysis-era5-land", "reanalysis-era5-land-monthly-means"]
+    resources = []
+    for resource_uid in resource_uids:
+        resource = manager.load_resource_from_folder(
+            os.path.join(TESTDATA_PATH, "cads-forms-json", resource_uid)
+        )
+        resource["form_data"] = "content of form.json"
+        resources.append(resource)
+    with session_obj() as session:
+        for licence in licences:
+            licence_manager.licence_sync(
+                session, licence["licence_uid"], licences, storage_settings
+            )
+        prepared = [
+            manager.prepare_resource_sync(session, r, storage_settings)
+            for r in resources
+        ]
+        assert manager.resources_sync_batch(session, prepared) == resource_uids
+        session.commit()
+        db_resources = session.scalars(
+            sa.select(database.Resource).order_by(database.Resource.resource_uid)
+        ).all()
+        assert [r.resource_uid for r in db_resources] == resource_uids
+        assert [len(r.facets) for r in db_resources] == [7, 7]
+        assert [len(r.licences) for r in db_resources] == [1, 1]
+        assert len(session.scalars(sa.select(database.ResourceData)).all()) == 2
+        # nothing changed: nothing rewritten
+        assert manager.write_prepared_resources(session, prepared) == []
+        assert manager.write_prepared_resources(
+            session, prepared, rewrite_unchanged=True
+        ) == (resource_uids)
+
+    # a resource failing: the batch is synced one resource by one
+    resources[0]["ds_contactemail"] = "a_new_test@email"
+    resources[1]["ds_contactemail"] = "a_new_test@email"
+    resources[1]["facets"] = ["a facet without category"]
+    with session_obj() as session:
+        prepared = [
+            manager.prepare_resource_sync(session, r, storage_settings)
+            for r in resources
+        ]
+        assert manager.resources_sync_batch(session, prepared) == resource_uids[:1]
+        session.commit()
+        assert session.execute(
+            sa.select(
+                database.Resource.resource_uid, database.Resource.ds_contactemail
+            ).order_by(database.Resource.resource_uid)
+        ).all() == [
+            (resource_uids[0], "a_new_test@email"),
+            (resource_uids[1], "https://support.ecmwf.int"),
+        ]
+
+
+@pytest.mark.parametrize("batch_size", [0, 2])
+def test_update_catalogue_resources_force_unchanged(
+    session_obj: sa.orm.sessionmaker,
+    mocker: pytest_mock.MockerFixture,
+    batch_size: int,
+) -> None:
+    storage_settings = config.ObjectStorageSettings(
+        object_storage_url="object/storage/url",
+        storage_admin="admin1",
+        storage_password="secret1",
+        catalogue_bucket="mycatalogue_bucket",
+        document_storage_url="my/url",
+    )
+    mocker.patch.object(object_storage, "store_file", return_value="an url")
+    licences_folder_path = os.path.join(TESTDATA_PATH, "cads-licences")
+    licences = licence_manager.load_licences_from_folder(licences_folder_path)
+    resources_folder_paths = [os.path.join(TESTDATA_PATH, "cads-forms-json")]
+    cim_folder_path = os.path.join(TESTDATA_PATH, "cads-forms-cim-json")
+    include = ["reanalysis-era5-land", "reanalysis-era5-land-monthly-means"]
+    xmin_stmt = sa.text(
+        "select 'resources', xmin::text, resource_id from resources "
+        "union all select 'resources_licences', xmin::text, resource_id "
+        "from resources_licences "
+        "union all select 'resources_facets', xmin::text, resource_id "
+        "from resources_facets order by 1, 3, 2"
+    )
+    with session_obj() as session:
+        for licence in licences:
+            licence_manager.licence_sync(
+                session, licence["licence_uid"], licences, storage_settings
+            )
+        manager.update_catalogue_resources(
+            session,
+            resources_folder_paths,
+            cim_folder_path,
+            storage_settings,
+            include=include,
+            batch_size=batch_size,
+        )
+        session.commit()
+        db_xmins = session.execute(xmin_stmt).all()
+        assert len([r for r in db_xmins if r[0] == "resources"]) == 2
+
+    # forced update of the same data: no new tuple is written
+    with session_obj() as session:
+        manager.update_catalogue_resources(
+            session,
+            resources_folder_paths,
+            cim_folder_path,
+            storage_settings,
+            force=True,
+            include=include,
+            batch_size=batch_size,
+        )
+        session.commit()
+        assert session.execute(xmin_stmt).all() == db_xmins
+
+
+def test_estimate_resources_updates(session_obj: sa.orm.sessionmaker) -> None:
+    resources_folder_paths = [os.path.join(TESTDATA_PATH, "cads-forms-json")]
+    with session_obj() as session:
+        assert manager.estimate_resources_updates(session, resources_folder_paths) == 9
+        assert (
+            manager.estimate_resources_updates(
+                session, resources_folder_paths, include=["reanalysis-era5-*"]
+            )
+            == 4
+        )
+        for resource_uid in ("reanalysis-era5-land", "reanalysis-era5-single-levels"):
+            session.add(
+                database.Resource(
+                    resource_uid=resource_uid,
+                    abstract="a",
+                    description={},
+                    type="dataset",
+                    sources_hash="a hash",
+                )
+            )
+        session.flush()
+        assert manager.estimate_resources_updates(session, resources_folder_paths) == 7
+        assert (
+            manager.estimate_resources_updates(
+                session, resources_folder_paths, force=True
+            )
+            == 9
+        )
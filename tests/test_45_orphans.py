@@ -0,0 +1,140 @@
+import datetime
+from typing import Any
+
+import sqlalchemy as sa
+
+from cads_catalogue import database, orphans
+
+
+def mock_dataset(resource_uid: str, **kwargs) -> database.Resource:
+    return database.Resource(
+        resource_uid=resource_uid,
+        abstract="abstract",
+        description=dict(),
+        type="dataset",
+        **kwargs,
+    )
+
+
+def mock_content(site: str, slug: str, **kwargs) -> database.Content:
+    content_md: dict[str, Any] = {
+        "content_update": datetime.datetime(2024, 1, 1),
+        "publication_date": datetime.datetime(2024, 1, 1),
+        "description": "description",
+        "title": "title",
+        "type": "page",
+    }
+    content_md.update(kwargs)
+    return database.Content(site=site, slug=slug, **content_md)
+
+
+def count_rows(session: sa.orm.Session, table_name: str) -> int:
+    return session.scalar(sa.text(f"select count(*) from {table_name}"))  # type: ignore
+
+
+def test_remove_orphan_datasets(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        dataset1 = mock_dataset("dataset1")
+        dataset2 = mock_dataset("dataset2")
+        dataset2.licences = [
+            database.Licence(
+                licence_uid="licence",
+                revision=1,
+                title="title",
+                download_filename="licence.pdf",
+                md_filename="licence.md",
+            ),
+        ]
+        dataset2.facets = [database.Facet(facet_name="a facet")]
+        dataset2.messages = [
+            database.Message(
+                message_uid="msg", date=datetime.datetime(2024, 1, 1), severity="info"
+            )
+        ]
+        dataset2.contents = [mock_content("cds", "a-content")]
+        dataset1.related_resources = [dataset2]
+        dataset2.related_resources = [dataset1]
+        session.add_all([dataset1, dataset2])
+        session.flush()
+        session.add(database.ResourceData(resource_uid="dataset2", constraints_data=[]))
+        session.commit()
+
+        assert orphans.remove_orphan_datasets(session, ["dataset1"]) == ["dataset2"]
+        session.commit()
+        assert session.scalars(sa.select(database.Resource.resource_uid)).all() == [
+            "dataset1"
+        ]
+        for table_name in (
+            "resources_licences",
+            "resources_facets",
+            "resources_messages",
+            "resources_contents",
+            "related_resources",
+            "resource_data",
+        ):
+            assert count_rows(session, table_name) == 0
+        # related records are not removed
+        for table_name in ("licences", "facets", "messages", "contents"):
+            assert count_rows(session, table_name) == 1
+        # loaded objects reflect the deletion
+        assert (
+            session.scalars(sa.select(database.Resource)).one().related_resources == []
+        )
+
+        # nothing to keep
+        assert orphans.remove_orphan_datasets(session, []) == ["dataset1"]
+        session.commit()
+        assert count_rows(session, "resources") == 0
+
+
+def test_remove_orphan_messages(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        dataset = mock_dataset("dataset1")
+        dataset.messages = [
+            database.Message(
+                message_uid=message_uid,
+                date=datetime.datetime(2024, 1, 1),
+                severity="info",
+            )
+            for message_uid in ("msg1", "msg2", "msg3")
+        ]
+        session.add(dataset)
+        session.commit()
+
+        removed = orphans.remove_orphan_messages(session, ["msg2", "not-in-db"])
+        session.commit()
+        assert sorted(removed) == ["msg1", "msg3"]
+        assert session.scalars(sa.select(database.Message.message_uid)).all() == [
+            "msg2"
+        ]
+        assert count_rows(session, "resources_messages") == 1
+
+
+def test_remove_orphan_contents(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        dataset = mock_dataset("dataset1")
+        dataset.contents = [
+            mock_content("cds", "content1"),
+            mock_content("ads", "content1"),
+            mock_content("cds", "content2", type="application"),
+        ]
+        for i, content in enumerate(dataset.contents):
+            content.keywords = [database.ContentKeyword(keyword_name=f"keyword {i}")]
+        session.add(dataset)
+        session.commit()
+
+        removed = orphans.remove_orphan_contents(
+            session, [("cds", "page", "content1"), ("cds", "page", "content2")]
+        )
+        session.commit()
+        assert sorted(removed) == [
+            ("ads", "page", "content1"),
+            ("cds", "application", "content2"),
+        ]
+        assert session.execute(
+            sa.select(
+                database.Content.site, database.Content.type, database.Content.slug
+            )
+        ).all() == [("cds", "page", "content1")]
+        assert count_rows(session, "resources_contents") == 1
+        assert count_rows(session, "contents_keywords_m2m") == 1
@@ -0,0 +1,145 @@
+import os.path
+
+import pytest
+import pytest_mock
+import sqlalchemy as sa
+
+from cads_catalogue import (
+    bootstrap,
+    config,
+    database,
+    licence_manager,
+    manager,
+    object_storage,
+    utils,
+)
+
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TESTDATA_PATH = os.path.join(THIS_PATH, "data")
+
+
+def dump_catalogue(session: sa.orm.session.Session) -> tuple:
+    resources = []
+    for resource in session.scalars(
+        sa.select(database.Resource).order_by(database.Resource.resource_uid)
+    ):
+        resource_dict = utils.object_as_dict(resource)
+        for field in ("record_update", "resource_id"):
+            resource_dict.pop(field)
+        resources.append(resource_dict)
+    resources_data = [
+        utils.object_as_dict(r)
+        for r in session.scalars(
+            sa.select(database.ResourceData).order_by(
+                database.ResourceData.resource_uid
+            )
+        )
+    ]
+    for resource_data in resources_data:
+        resource_data.pop("resource_data_id")
+    associations = {}
+    for name, sql in [
+        (
+            "licences",
+            "select r.resource_uid, l.licence_uid from resources_licences "
+            "join resources r using (resource_id) join licences l using (licence_id)",
+        ),
+        (
+            "facets",
+            "select r.resource_uid, f.facet_name from resources_facets "
+            "join resources r using (resource_id) join facets f using (facet_id)",
+        ),
+        (
+            "related",
+            "select c.resource_uid, p.resource_uid from related_resources "
+            "join resources c on c.resource_id = child_resource_id "
+            "join resources p on p.resource_id = parent_resource_id",
+        ),
+    ]:
+        associations[name] = sorted(session.execute(sa.text(sql)).all())
+    return resources, resources_data, associations
+
+
+def test_csv_value() -> None:
+    columns = database.Resource.__table__.c
+    assert bootstrap.csv_value(None, columns.title) == ""
+    assert bootstrap.csv_value("", columns.title) == '""'
+    assert bootstrap.csv_value('a "title", 1', columns.title) == '"a ""title"", 1"'
+    assert bootstrap.csv_value(True, columns.hidden) == '"t"'
+    assert bootstrap.csv_value(None, columns.geo_extent) == '"null"'
+    assert bootstrap.csv_value({"a": [1]}, columns.geo_extent) == '"{""a"": [1]}"'
+    assert (
+        bootstrap.csv_value(["a", 'b"c', "d e", None], columns.qos_tags)
+        == '"{a,""b\\""c"",""d e"",NULL}"'
+    )
+    assert (
+        bootstrap.csv_value(
+            b"\x01\xff", database.ResourceData.__table__.c.constraints_zstd
+        )
+        == '"\\x01ff"'
+    )
+
+
+def test_bootstrap_resources(
+    session_obj: sa.orm.sessionmaker, mocker: pytest_mock.MockerFixture
+) -> None:
+    storage_settings = config.ObjectStorageSettings(
+        object_storage_url="object/storage/url",
+        storage_admin="admin1",
+        storage_password="secret1",
+        catalogue_bucket="mycatalogue_bucket",
+        document_storage_url="my/url",
+    )
+    mocker.patch.object(object_storage, "store_file", return_value="an url")
+    resources_folder_paths = [os.path.join(TESTDATA_PATH, "cads-forms-json")]
+    cim_folder_path = os.path.join(TESTDATA_PATH, "cads-forms-cim-json")
+    licences_folder_path = os.path.join(TESTDATA_PATH, "cads-licences")
+    with session_obj() as session:
+        licence_manager.update_catalogue_licences(
+            session, licences_folder_path, storage_settings
+        )
+        resource_uids = bootstrap.bootstrap_resources(
+            session, resources_folder_paths, cim_folder_path, storage_settings
+        )
+        session.commit()
+        assert len(resource_uids) == 8
+        bootstrapped = dump_catalogue(session)
+        # GIN indexes built again
+        assert {
+            r[0]
+            for r in session.execute(
+                sa.text(
+                    "select indexname from pg_indexes where tablename = 'resources'"
+                )
+            )
+        } >= {"idx_resources_search_field", "idx_resources_fts"}
+        # search fields computed
+        assert (
+            session.scalar(
+                sa.select(sa.func.count()).where(
+                    database.Resource.search_field.is_(None)
+                )
+            )
+            == 0
+        )
+
+        # only for an empty catalogue
+        with pytest.raises(ValueError):
+            bootstrap.bootstrap_resources(
+                session, resources_folder_paths, cim_folder_path, storage_settings
+            )
+
+    # same content as loading resources by update
+    with session_obj() as session:
+        session.execute(
+            sa.text(
+                "truncate resources, resource_data, resources_licences, "
+                "resources_facets, related_resources, facets cascade"
+            )
+        )
+        manager.update_catalogue_resources(
+            session, resources_folder_paths, cim_folder_path, storage_settings
+        )
+        manager.update_related_resources(session)
+        session.commit()
+        assert dump_catalogue(session) == bootstrapped
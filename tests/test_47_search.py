@@ -0,0 +1,183 @@
+import os.path
+
+import pytest
+import pytest_mock
+import sqlalchemy as sa
+
+from cads_catalogue import (
+    config,
+    database,
+    licence_manager,
+    manager,
+    object_storage,
+    search,
+)
+
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TESTDATA_PATH = os.path.join(THIS_PATH, "data")
+
+
+def load_catalogue(
+    session_obj: sa.orm.sessionmaker, mocker: pytest_mock.MockerFixture
+) -> None:
+    storage_settings = config.ObjectStorageSettings(
+        object_storage_url="object/storage/url",
+        storage_admin="admin1",
+        storage_password="secret1",
+        catalogue_bucket="mycatalogue_bucket",
+        document_storage_url="my/url",
+    )
+    mocker.patch.object(object_storage, "store_file", return_value="an url")
+    with session_obj.begin() as session:  # type: ignore
+        licence_manager.update_catalogue_licences(
+            session, os.path.join(TESTDATA_PATH, "cads-licences"), storage_settings
+        )
+        manager.update_catalogue_resources(
+            session,
+            [os.path.join(TESTDATA_PATH, "cads-forms-json")],
+            os.path.join(TESTDATA_PATH, "cads-forms-cim-json"),
+            storage_settings,
+        )
+
+
+def test_search_resources(
+    session_obj: sa.orm.sessionmaker, mocker: pytest_mock.MockerFixture
+) -> None:
+    load_catalogue(session_obj, mocker)
+    with session_obj() as session:
+        # text search, ranked (high priority terms first)
+        results = search.search_resources(session, "ERA5 land", with_facets=True)
+        assert [r.resource_uid for r in results.resources] == [
+            "reanalysis-era5-land",
+            "reanalysis-era5-land-monthly-means",
+            "derived-near-surface-meteorological-variables",
+        ]
+        assert results.count == 3
+        assert results.ranks == sorted(results.ranks, reverse=True)  # type: ignore
+        assert results.ranks[0] > 1  # type: ignore
+        assert results.facets == {
+            "Product type": {"Derived reanalysis": 1, "Reanalysis": 2},
+            "Provider": {"Copernicus C3S": 2},
+            "Spatial coverage": {"Global": 3},
+            "Temporal coverage": {"Past": 3},
+            "Variable domain": {
+                "Atmosphere (surface)": 1,
+                "Land (biosphere)": 2,
+                "Land (hydrology)": 2,
+                "Land (physics)": 2,
+            },
+        }
+        # the high priority terms weigh by the factor
+        ranks = search.search_resources(
+            session, "ERA5 land", high_priority_factor=2
+        ).ranks
+        assert ranks[0] > results.ranks[0] and ranks[1:] == results.ranks[1:]  # type: ignore
+        assert search.search_resources(session, "not-existing-word").count == 0
+
+        # facets: values of a category in OR, categories in AND
+        results = search.search_resources(
+            session,
+            facets={
+                "Product type": ["Reanalysis", "Satellite observations"],
+                "Variable domain": ["Atmosphere (surface)"],
+            },
+            sortby="title",
+        )
+        assert [r.resource_uid for r in results.resources] == [
+            "reanalysis-era5-pressure-levels",
+            "reanalysis-era5-single-levels",
+            "satellite-surface-radiation-budget",
+        ]
+        assert results.ranks == [None] * 3
+        results = search.search_resources(
+            session, "ERA5", facets={"Variable domain": ["Atmosphere (surface)"]}
+        )
+        assert {r.resource_uid for r in results.resources} == {
+            "derived-near-surface-meteorological-variables",
+            "reanalysis-era5-pressure-levels",
+            "reanalysis-era5-single-levels",
+        }
+        assert results.facets is None
+
+        # without text, relevance is popularity
+        results = search.search_resources(session, " ")
+        assert results.count == 8
+        assert results.resources[0].resource_uid == "reanalysis-era5-land"
+
+        # pagination
+        all_uids = [
+            r.resource_uid
+            for r in search.search_resources(
+                session, sortby="update", limit=None
+            ).resources
+        ]
+        assert len(all_uids) == 8
+        pages = [
+            search.search_resources(session, sortby="update", limit=3, offset=offset)
+            for offset in (0, 3, 6)
+        ]
+        assert [r.resource_uid for p in pages for r in p.resources] == all_uids
+        assert [p.count for p in pages] == [8, 8, 8]
+
+        # portals and hidden resources
+        assert search.search_resources(session, portals=["c3s"]).count == 8
+        assert search.search_resources(session, portals=["cams"]).count == 0
+        session.execute(
+            sa.update(database.Resource)
+            .where(database.Resource.resource_uid == "reanalysis-era5-land")
+            .values(hidden=True)
+        )
+        assert search.search_resources(session, "ERA5 land").count == 2
+        assert (
+            search.search_resources(session, "ERA5 land", include_hidden=True).count
+            == 3
+        )
+
+        with pytest.raises(ValueError):
+            search.search_resources(session, sortby="unknown")
+
+
+def test_ts_rank2(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        # an SQL function, inlined in the queries
+        assert (
+            session.scalar(
+                sa.text(
+                    "select l.lanname from pg_proc p join pg_language l "
+                    "on l.oid = p.prolang where p.proname = 'ts_rank2'"
+                )
+            )
+            == "sql"
+        )
+        query = search.search_query("ERA5 land")
+        plan = "\n".join(
+            session.scalars(
+                sa.text(
+                    "explain verbose "
+                    + str(
+                        query.compile(
+                            dialect=session.get_bind().dialect,
+                            compile_kwargs={"literal_binds": True},
+                        )
+                    )
+                )
+            )
+        )
+        assert "ts_rank(" in plan and "ts_rank2" not in plan
+        # same values of the first plpgsql version
+        session.execute(
+            sa.text(
+                database.add_rank_function_plpgsql_sql.replace(
+                    "ts_rank2(", "ts_rank2_plpgsql("
+                )
+            )
+        )
+        args = (
+            "'{0.1, 0.2, 0.4, 1.0}', to_tsvector('english', 'the ERA5 land data'), "
+            "to_tsvector('english', 'reanalysis land'), "
+            "websearch_to_tsquery('english', 'land'), 3"
+        )
+        sql_rank, plpgsql_rank = session.execute(
+            sa.text(f"select ts_rank2({args}), ts_rank2_plpgsql({args})")
+        ).one()
+        assert sql_rank == plpgsql_rank > 0
@@ -0,0 +1,122 @@
+import os.path
+
+import pytest_mock
+import sqlalchemy as sa
+
+from cads_catalogue import (
+    config,
+    database,
+    facet_index,
+    licence_manager,
+    manager,
+    object_storage,
+    orphans,
+    search,
+)
+
+THIS_PATH = os.path.abspath(os.path.dirname(__file__))
+TESTDATA_PATH = os.path.join(THIS_PATH, "data")
+
+SELECTIONS = [
+    None,
+    {"Product type": ["Reanalysis"]},
+    {"Product type": ["Reanalysis", "Satellite observations"]},
+    {"Product type": ["Reanalysis"], "Variable domain": ["Atmosphere (surface)"]},
+    {"Provider": ["not existing"]},
+]
+
+
+def test_bitmaps() -> None:
+    ids = [0, 3, 7, 8, 1000]
+    bitmap = facet_index.ids_to_bitmap(ids)
+    assert bitmap == sum(1 << i for i in ids)
+    assert facet_index.bitmap_to_ids(bitmap) == ids
+    assert facet_index.ids_to_bitmap([]) == 0
+    assert facet_index.bitmap_to_ids(0) == []
+
+    bitmaps = facet_index.FacetBitmaps(
+        {
+            "type": {"a": facet_index.ids_to_bitmap([1, 2, 3])},
+            "domain": {
+                "x": facet_index.ids_to_bitmap([1, 4]),
+                "y": facet_index.ids_to_bitmap([2, 4]),
+            },
+        }
+    )
+    assert bitmaps.resource_ids() == [1, 2, 3, 4]
+    assert bitmaps.resource_ids({"domain": ["x", "y"]}) == [1, 2, 4]
+    assert bitmaps.resource_ids({"type": ["a"], "domain": ["y"]}) == [2]
+    assert bitmaps.resource_ids({"type": ["b"]}) == []
+    assert bitmaps.counts({"type": ["a"]}) == {
+        "type": {"a": 3},
+        "domain": {"x": 1, "y": 1},
+    }
+    assert bitmaps.counts({"type": ["b"]}) == {}
+
+
+def test_refresh_facet_index(
+    session_obj: sa.orm.sessionmaker, mocker: pytest_mock.MockerFixture
+) -> None:
+    storage_settings = config.ObjectStorageSettings(
+        object_storage_url="object/storage/url",
+        storage_admin="admin1",
+        storage_password="secret1",
+        catalogue_bucket="mycatalogue_bucket",
+        document_storage_url="my/url",
+    )
+    mocker.patch.object(object_storage, "store_file", return_value="an url")
+    index_sql = sa.text("select * from facet_index order by facet_id")
+    with session_obj() as session:
+        licence_manager.update_catalogue_licences(
+            session, os.path.join(TESTDATA_PATH, "cads-licences"), storage_settings
+        )
+        manager.update_catalogue_resources(
+            session,
+            [os.path.join(TESTDATA_PATH, "cads-forms-json")],
+            os.path.join(TESTDATA_PATH, "cads-forms-cim-json"),
+            storage_settings,
+        )
+        facets_count = session.scalar(
+            sa.select(sa.func.count(sa.distinct(database.ResourceFacet.facet_id)))
+        )
+        # the index empty is built from scratch
+        assert facet_index.refresh_facet_index(session, []) == facets_count
+        for selection in SELECTIONS:
+            assert (
+                facet_index.FacetBitmaps.load(session).counts(selection)
+                == search.search_resources(
+                    session, facets=selection, with_facets=True
+                ).facets
+            )
+
+        # a resource changed, a resource removed
+        fingerprints_before = facet_index.get_resources_fingerprints(session)
+        session.execute(
+            sa.update(database.Resource)
+            .where(database.Resource.resource_uid == "reanalysis-era5-land")
+            .values(hidden=True, row_fingerprint="another fingerprint")
+        )
+        orphans.remove_orphan_datasets(
+            session,
+            set(session.scalars(sa.select(database.Resource.resource_uid)))
+            - {"satellite-surface-radiation-budget"},
+        )
+        changed_ids = facet_index.get_changed_resource_ids(
+            fingerprints_before, facet_index.get_resources_fingerprints(session)
+        )
+        assert len(changed_ids) == 2
+        # only the facets of the two resources
+        assert facet_index.refresh_facet_index(session, changed_ids) < facets_count
+        assert facet_index.refresh_facet_index(session, []) == 0
+        bitmaps = facet_index.FacetBitmaps.load(session)
+        for selection in SELECTIONS:
+            assert (
+                bitmaps.counts(selection)
+                == search.search_resources(
+                    session, facets=selection, with_facets=True
+                ).facets
+            )
+        assert "ESA CCI" not in bitmaps.bitmaps["Provider"]
+        index_rows = session.execute(index_sql).all()
+        facet_index.refresh_facet_index(session)
+        assert session.execute(index_sql).all() == index_rows
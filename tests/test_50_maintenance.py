@@ -24,3 +24,30 @@ def test_force_vacuum(
     effective_sql_calls = [c[1].text for c in effective_args_object_storage_calls]
     for current_sql in all_sqls:
         assert current_sql in effective_sql_calls
+
+
+def test_gin_bulk_update(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        assert not maintenance.is_bulk_update(session, 0)
+        # empty db
+        assert maintenance.is_bulk_update(session, 1)
+        for i in range(8):
+            session.add(
+                database.Resource(
+                    resource_uid=f"dataset{i}", abstract="a", description={}, type="t"
+                )
+            )
+        session.flush()
+        assert not maintenance.is_bulk_update(session, 1)
+        assert maintenance.is_bulk_update(session, 2)
+        assert maintenance.is_bulk_update(session, 1, fraction=0.1)
+
+        maintenance.defer_gin_maintenance(session, pending_list_limit=1024)
+        assert session.scalar(sa.text("SHOW gin_pending_list_limit")) == "1MB"
+        assert set(maintenance.clean_gin_pending_lists(session)) == {
+            "idx_resources_search_field",
+            "idx_resources_fts",
+        }
+        session.commit()
+        # only for the transaction
+        assert session.scalar(sa.text("SHOW gin_pending_list_limit")) == "4MB"
@@ -1,9 +1,16 @@
+import collections
+import datetime
+import http.server
+import json
+import threading
+from typing import Any, Dict
+
 import pytest_mock
 import sqlalchemy as sa
 from psycopg import Connection
 
 from cads_catalogue import database
-from cads_catalogue.fair import update_fair_score
+from cads_catalogue.fair import extract_fair_score, update_fair_score
 
 
 def test_fair_integration(
@@ -43,3 +50,100 @@ def test_fair_integration(
         assert res1.resource_uid == "res1"
         assert res1.fair_timestamp is not None
         assert res1_data.fair_data == {"foo": "bar"}
+        assert res1.fair_score is None
+
+
+def test_extract_fair_score() -> None:
+    assert extract_fair_score({"summary": {"score_percent": {"FAIR": 57.9}}}) == 57
+    assert extract_fair_score({"summary": {"score_percent": {"FAIR": "x"}}}) is None
+    assert extract_fair_score({"summary": {}}) is None
+    assert extract_fair_score(None) is None
+
+
+class FairCheckerStandIn(http.server.BaseHTTPRequestHandler):
+    """Stand-in of the F-UJI service, failing on first request of some datasets."""
+
+    calls: collections.Counter = collections.Counter()
+    flaky_uids = {"res2"}
+    failing_uids = {"res4"}
+
+    def do_POST(self) -> None:
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        dataset_uid = payload["object_identifier"].rsplit("/", 1)[-1]
+        self.calls[dataset_uid] += 1
+        if dataset_uid in self.failing_uids or (
+            dataset_uid in self.flaky_uids and self.calls[dataset_uid] == 1
+        ):
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({"summary": {"score_percent": {"FAIR": 50}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+def test_update_fair_score_concurrent(postgresql: Connection[str]) -> None:
+    connection_string = (
+        f"postgresql://{postgresql.info.user}:"
+        f"@{postgresql.info.host}:{postgresql.info.port}/{postgresql.info.dbname}"
+    )
+    engine = database.init_database(connection_string, force=True)
+    session_obj = sa.orm.sessionmaker(engine)
+    recently = datetime.datetime.now(datetime.timezone.utc)
+    with session_obj() as session:
+        for i in range(1, 5):
+            session.add(
+                database.Resource(
+                    resource_uid=f"res{i}",
+                    portal="c3s",
+                    abstract="an abstract",
+                    description="",
+                    type="dataset",
+                    fair_timestamp=recently if i == 3 else None,
+                    resource_data=database.ResourceData(form_data={}),
+                )
+            )
+        session.commit()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FairCheckerStandIn)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    fair_checker_host = f"127.0.0.1:{server.server_address[1]}"
+    try:
+        with session_obj() as session:
+            update_fair_score(
+                session,
+                fair_checker_host,
+                concurrency=3,
+                only_older_than=datetime.timedelta(days=1),
+                retries=2,
+                backoff_factor=0,
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # res3 skipped (recently evaluated), res2 retried, res4 failed 1 + 2 retries
+    assert FairCheckerStandIn.calls == {"res1": 1, "res2": 2, "res4": 3}
+    with session_obj() as session:
+        fair_scores: Dict[str | None, int | None] = dict(
+            session.execute(
+                sa.select(database.Resource.resource_uid, database.Resource.fair_score)
+            )
+            .tuples()
+            .all()
+        )
+        assert fair_scores == {"res1": 50, "res2": 50, "res3": None, "res4": None}
+        evaluated = session.scalars(
+            sa.select(database.Resource.resource_uid).where(
+                database.Resource.fair_timestamp.is_not(None)
+            )
+        ).all()
+        # res4 will be evaluated again in the next run
+        assert sorted(str(uid) for uid in evaluated) == ["res1", "res2", "res3"]
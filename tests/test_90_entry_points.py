@@ -15,6 +15,7 @@ from cads_catalogue import (
     contents,
     database,
     entry_points,
+    facet_index,
     licence_manager,
     manager,
     messages,
@@ -672,6 +673,7 @@ def test_update_catalogue(
             exclude_fields=(
                 "record_update",
                 "resource_id",
+                "row_fingerprint",
                 "search_field",
                 "sources_hash",
             ),
@@ -986,12 +988,12 @@ def test_update_catalogue(
     _update_catalogue_contents.assert_called_once()
     _update_catalogue_contents.reset_mock()
     # check object storage called
-    assert _store_file.call_count == 34
+    assert _store_file.call_count == 30
     #     # num.datasets overview.png * 2 = 12
     #     # num.datasets layout.json = 6
     #     # num.datasets form.json = 6
     #     # num.datasets constraints.json = 6
-    #     # num.contents = 4
+    #     # num.contents = 0 (not changed)
     _store_file.reset_mock()
 
     # check db content
@@ -1006,6 +1008,7 @@ def test_update_catalogue(
             exclude_fields=(
                 "record_update",
                 "resource_id",
+                "row_fingerprint",
                 "search_field",
                 "sources_hash",
             ),
@@ -1086,12 +1089,12 @@ def test_update_catalogue(
     _update_catalogue_contents.assert_called_once()
     _update_catalogue_contents.reset_mock()
     # check object storage called
-    assert _store_file.call_count == 9
+    assert _store_file.call_count == 6
     #     # num.datasets overview.png * 2 = 2
     #     # num.datasets layout.json = 1
     #     # num.datasets form.json = 1
     #     # num.datasets constraints.json = 1
-    #     # num. contents = 4
+    #     # num. contents = 1 (related datasets changed)
     _store_file.reset_mock()
 
     # check db content
@@ -1106,6 +1109,7 @@ def test_update_catalogue(
             exclude_fields=(
                 "record_update",
                 "resource_id",
+                "row_fingerprint",
                 "search_field",
                 "sources_hash",
             ),
@@ -1218,7 +1222,7 @@ def test_update_catalogue(
     _store_file.assert_not_called()
     _store_file.reset_mock()
 
-    # 9. change a dataset and run again with force ---------------------------------------
+    # 9. change a dataset and run again with force, rewriting unchanged resources ------
     with session_obj() as session:
         session.execute(
             sa.text(
@@ -1245,6 +1249,7 @@ def test_update_catalogue(
             "--contents-folder-path",
             TEST_CONTENTS_DATA_PATH,
             "--force",
+            "--rewrite-unchanged",
             "--contents-config-path",
             os.path.join(TEST_CONTENTS_DATA_PATH, "template_config2.yaml"),
         ],
@@ -1298,6 +1303,7 @@ def test_update_catalogue(
             exclude_fields=(
                 "record_update",
                 "resource_id",
+                "row_fingerprint",
                 "search_field",
                 "sources_hash",
             ),
@@ -1429,6 +1435,7 @@ def test_update_catalogue(
             exclude_fields=(
                 "record_update",
                 "resource_id",
+                "row_fingerprint",
                 "search_field",
                 "sources_hash",
             ),
@@ -1489,6 +1496,86 @@ def test_update_catalogue(
     _store_file.assert_not_called()
     _store_file.reset_mock()
 
+    # the facet index, refreshed incrementally, is as built from scratch
+    with session_obj() as session:
+        index_sql = "select * from facet_index order by facet_id"
+        index_rows = session.execute(sa.text(index_sql)).all()
+        assert index_rows
+        facet_index.refresh_facet_index(session)
+        assert session.execute(sa.text(index_sql)).all() == index_rows
+
+
+def test_bootstrap_catalogue(
+    postgresql: Connection[str], mocker: pytest_mock.MockerFixture
+) -> None:
+    connection_string = (
+        f"postgresql://{postgresql.info.user}:"
+        f"@{postgresql.info.host}:{postgresql.info.port}/{postgresql.info.dbname}"
+    )
+    sqlalchemy_utils.drop_database(connection_string)
+    engine = sa.create_engine(connection_string)
+    session_obj = sa.orm.sessionmaker(engine)
+    mocker.patch("cads_catalogue.object_storage.store_file", return_value="an url")
+    mocker.patch("cads_catalogue.repos.get_repo_url", return_value="a_repo_url")
+    mocker.patch("cads_catalogue.object_storage.test_connection")
+    mocker.patch.object(
+        repos,
+        "get_last_commit_hash",
+        new=get_last_commit_factory(["a", "b", "c", "d", "e", "f"]),
+    )
+    mocker.patch.object(alembic.config, "main")
+    _resource_sync = mocker.spy(manager, "resource_sync")
+    folders_args = [
+        "--connection-string",
+        connection_string,
+        "--resources-folder-path",
+        TEST_RESOURCES_DATA_PATH,
+        "--messages-folder-path",
+        TEST_MESSAGES_DATA_PATH,
+        "--licences-folder-path",
+        TEST_LICENCES_DATA_PATH,
+        "--cim-folder-path",
+        TEST_CIM_DATA_PATH,
+        "--contents-folder-path",
+        TEST_CONTENTS_DATA_PATH,
+    ]
+    env = {
+        "OBJECT_STORAGE_URL": "http://myobject-storage:myport/",
+        "DOCUMENT_STORAGE_URL": "http://mypublic-storage/",
+        "STORAGE_ADMIN": "storage_user",
+        "STORAGE_PASSWORD": "storage_password",
+        "CATALOGUE_BUCKET": "my_bucket",
+    }
+    result = runner.invoke(
+        entry_points.app, ["bootstrap-catalogue"] + folders_args, env=env
+    )
+    assert result.exit_code == 0
+    _resource_sync.assert_not_called()
+    with session_obj() as session:
+        assert session.scalar(sa.text("select count(*) from resources")) == 8
+        assert session.scalar(sa.text("select count(*) from resources_licences")) == 10
+        assert session.scalar(sa.text("select count(*) from licences")) == 4
+        assert session.scalar(sa.text("select count(*) from messages")) > 0
+        assert session.scalar(sa.text("select count(*) from contents")) > 0
+        assert session.scalar(
+            sa.text("select count(*) from facet_index")
+        ) == session.scalar(
+            sa.text("select count(distinct facet_id) from resources_facets")
+        )
+
+    # inputs status stored: a following update has nothing to do
+    result = runner.invoke(
+        entry_points.app, ["update-catalogue"] + folders_args, env=env
+    )
+    assert result.exit_code == 0
+    _resource_sync.assert_not_called()
+
+    # only for an empty catalogue
+    result = runner.invoke(
+        entry_points.app, ["bootstrap-catalogue"] + folders_args, env=env
+    )
+    assert result.exit_code != 0
+
 
 def test_update_sanity_check(
     caplog: pytest.LogCaptureFixture,
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+# max import time (in seconds) of the CLI, without the interpreter startup
+IMPORT_TIME_BUDGET = float(os.getenv("CATALOGUE_IMPORT_TIME_BUDGET", 1.0))
+# subsystems that must not be imported at startup of the CLI
+LAZY_MODULES = (
+    "alembic",
+    "boto3",
+    "cads_catalogue.database",
+    "cads_catalogue.manager",
+    "cads_catalogue.sanity_check",
+    "cads_common.portal",
+    "cads_e2e_tests",
+    "frontmatter",
+    "git",
+    "jsonschema",
+    "requests",
+    "sqlalchemy",
+)
+
+
+def get_import_times(module: str) -> dict[str, float]:
+    """Return the cumulative import times (in seconds) of `python -X importtime`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    import_times = dict()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        import_times[name.strip()] = int(cumulative) / 1e6
+    return import_times
+
+
+def test_entry_points_startup() -> None:
+    import_times = get_import_times("cads_catalogue.entry_points")
+    assert "cads_catalogue.entry_points" in import_times
+    assert not [m for m in LAZY_MODULES if m in import_times]
+
+    # best of some runs, to not depend on the load of the machine
+    startup_time = min(
+        get_import_times("cads_catalogue.entry_points")["cads_catalogue.entry_points"]
+        for _ in range(3)
+    )
+    assert startup_time < IMPORT_TIME_BUDGET
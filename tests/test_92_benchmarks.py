@@ -0,0 +1,222 @@
+import json
+import pathlib
+import random
+import time
+from typing import Any, Callable, Dict
+
+import pytest_mock
+import sqlalchemy as sa
+
+from cads_catalogue import (
+    bootstrap,
+    database,
+    facet_index,
+    manager,
+    parsed_dataset,
+    search,
+)
+
+# number of constraints of the large dataset of the benchmarks
+LARGE_CONSTRAINTS_COUNT = 20000
+# number of resources of the synthetic catalogue of the benchmarks
+LARGE_CATALOGUE_COUNT = 10000
+
+
+def best_time(function: Callable[[], Any], runs: int = 3) -> float:
+    """Return the best running time (in seconds) of some runs of `function`."""
+    times = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def test_config_hash_benchmark(
+    tmp_path: pathlib.Path, mocker: pytest_mock.MockerFixture
+) -> None:
+    constraints_data = [
+        {
+            "year": [str(1940 + i % 85)],
+            "month": [f"{m:02d}" for m in range(1, 13)],
+            "variable": [f"variable_{i}_{k}" for k in range(10)],
+            "product_type": ["reanalysis", "ensemble_members"],
+        }
+        for i in range(LARGE_CONSTRAINTS_COUNT)
+    ]
+    (tmp_path / "constraints.json").write_text(json.dumps(constraints_data, indent=2))
+    (tmp_path / "adaptor.json").write_text('{"entry_point": "an:adaptor"}')
+
+    def load_and_hash(dataset_folder):
+        resource = manager.load_adaptor_information(
+            parsed_dataset.ParsedDataset(dataset_folder)
+        )
+        return manager.compute_config_hash(resource)
+
+    resource = manager.load_adaptor_information(parsed_dataset.ParsedDataset(tmp_path))
+    legacy_resource = resource.copy()
+    legacy_resource.pop("config_files_hashes")
+
+    def hash_files():
+        # files are read again, but not parsed
+        dataset = parsed_dataset.ParsedDataset(tmp_path)
+        return manager.compute_config_hash(
+            {
+                "config_files_hashes": {
+                    n: dataset.file_hash(n)
+                    for n in ("adaptor.json", "constraints.json")
+                }
+            }
+        )
+
+    files_hashes_time = best_time(hash_files)
+    serialisation_time = best_time(lambda: manager.compute_config_hash(legacy_resource))
+    print(
+        f"hashing {LARGE_CONSTRAINTS_COUNT} constraints: "
+        f"{files_hashes_time:.3f}s with files hashes, "
+        f"{serialisation_time:.3f}s serialising data"
+    )
+    # with the files hashes, the data loaded are not serialised again
+    dumps = mocker.spy(manager.json, "dumps")
+    assert hash_files() == manager.compute_config_hash(resource)
+    dumps.assert_not_called()
+
+    # hashes change with the content
+    expected = load_and_hash(tmp_path)
+    assert load_and_hash(tmp_path) == expected
+    (tmp_path / "adaptor.json").write_text('{"entry_point": "another:adaptor"}')
+    assert load_and_hash(tmp_path) != expected
+
+
+def load_synthetic_catalogue(session: sa.orm.Session, count: int) -> None:
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(500)] + ["temperature", "precipitation"]
+    resource_rows = []
+    facet_rows = [
+        {
+            "facet_id": i + 1,
+            "category_name": "Variable domain",
+            "category_value": f"domain {i}",
+            "facet_name": f"Variable domain: domain {i}",
+        }
+        for i in range(10)
+    ] + [
+        {
+            "facet_id": i + 11,
+            "category_name": "Provider",
+            "category_value": f"provider {i}",
+            "facet_name": f"Provider: provider {i}",
+        }
+        for i in range(30)
+    ]
+    resource_facet_rows = []
+    for i in range(count):
+        resource_rows.append(
+            {
+                "resource_id": i + 1,
+                "resource_uid": f"dataset-{i}",
+                "title": " ".join(rng.choices(words, k=6)),
+                "abstract": " ".join(rng.choices(words, k=60)),
+                "description": {},
+                "type": "dataset",
+                "portal": "c3s" if i % 2 else "cams",
+                "popularity": rng.randint(1, 100),
+                "high_priority_terms": "temperature" if i % 10 == 0 else "",
+            }
+        )
+        resource_facet_rows.append({"resource_id": i + 1, "facet_id": i % 10 + 1})
+        for facet_id in set(rng.choices(range(11, 41), k=2)):
+            resource_facet_rows.append({"resource_id": i + 1, "facet_id": facet_id})
+    bootstrap.copy_rows(session, database.Resource.__table__, resource_rows)
+    bootstrap.copy_rows(session, database.Facet.__table__, facet_rows)
+    bootstrap.copy_rows(session, database.ResourceFacet.__table__, resource_facet_rows)
+    bootstrap.analyze_tables(session, bootstrap.BOOTSTRAP_TABLES)
+
+
+def test_search_benchmark(session_obj: sa.orm.sessionmaker) -> None:
+    with session_obj() as session:
+        load_synthetic_catalogue(session, LARGE_CATALOGUE_COUNT)
+        session.execute(
+            sa.text(
+                database.add_rank_function_plpgsql_sql.replace(
+                    "ts_rank2(", "ts_rank2_plpgsql("
+                )
+            )
+        )
+        ranked_sql = (
+            "select resource_uid, {function}('{{0.1, 0.2, 0.4, 1.0}}', search_field, "
+            "fts, websearch_to_tsquery('english', 'temperature'), 1) as rank "
+            "from resources "
+            "where search_field @@ websearch_to_tsquery('english', 'temperature') "
+            "order by rank desc, resource_uid"
+        )
+
+        def rank_with(function):
+            return session.execute(sa.text(ranked_sql.format(function=function))).all()
+
+        matching = len(rank_with("ts_rank2"))
+        sql_time = best_time(lambda: rank_with("ts_rank2"), runs=5)
+        plpgsql_time = best_time(lambda: rank_with("ts_rank2_plpgsql"), runs=5)
+        search_time = best_time(
+            lambda: search.search_resources(
+                session, "temperature", portals=["c3s"], with_facets=True
+            )
+        )
+        print(
+            f"ranking {matching} of {LARGE_CATALOGUE_COUNT} resources: "
+            f"{sql_time:.3f}s with sql ts_rank2, {plpgsql_time:.3f}s with plpgsql; "
+            f"search page with facets: {search_time:.3f}s"
+        )
+        assert rank_with("ts_rank2") == rank_with("ts_rank2_plpgsql")
+        # the sql function is inlined in the query, the plpgsql one is called
+        for function, inlined in (("ts_rank2", True), ("ts_rank2_plpgsql", False)):
+            plan = "\n".join(
+                session.scalars(
+                    sa.text("EXPLAIN (VERBOSE) " + ranked_sql.format(function=function))
+                )
+            )
+            assert ("ts_rank2" not in plan) == inlined
+
+        results = search.search_resources(
+            session,
+            "temperature",
+            facets={"Variable domain": ["domain 0"]},
+            with_facets=True,
+        )
+        # high priority terms first
+        assert results.resources[0].high_priority_terms == "temperature"
+        assert results.count == len(
+            search.search_resources(
+                session,
+                "temperature",
+                facets={"Variable domain": ["domain 0"]},
+                limit=None,
+            ).resources
+        )
+        assert results.facets["Variable domain"] == {"domain 0": results.count}  # type: ignore
+
+
+def test_facet_counts_benchmark(session_obj: sa.orm.sessionmaker) -> None:
+    selection = {"Variable domain": ["domain 0", "domain 1"]}
+    with session_obj() as session:
+        load_synthetic_catalogue(session, LARGE_CATALOGUE_COUNT)
+        facet_index.refresh_facet_index(session)
+        bitmaps = facet_index.FacetBitmaps.load(session)
+
+        def sql_counts():
+            counts: Dict[str, Dict[str, int]] = dict()
+            query = search.facet_counts_query(search.get_filters(facets=selection))
+            for category_name, category_value, count in session.execute(query):
+                counts.setdefault(category_name, dict())[category_value] = count
+            return counts
+
+        bitmaps_time = best_time(lambda: bitmaps.counts(selection), runs=5)
+        sql_time = best_time(sql_counts, runs=5)
+        print(
+            f"facet counts of {LARGE_CATALOGUE_COUNT} resources: "
+            f"{bitmaps_time * 1e6:.0f}us with bitmaps, {sql_time * 1e3:.1f}ms with sql"
+        )
+        expected = sql_counts()
+    # no access to the db
+    assert bitmaps.counts(selection) == expected
+    assert expected["Variable domain"] == {"domain 0": 1000, "domain 1": 1000}